@@ -0,0 +1,50 @@
+"""add indexes for monitoring and upgrade task queries
+
+Revision ID: 3f9a2c7d1b04
+Revises: 
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a2c7d1b04'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 表由 init_db 创建，新安装时索引已随模型创建，因此只在不存在时创建
+    op.create_index(
+        'ix_clients_status_last_heartbeat', 'clients', ['status', 'last_heartbeat'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_clients_last_heartbeat', 'clients', ['last_heartbeat'],
+        sqlite_where=sa.text('last_heartbeat IS NOT NULL'),
+        postgresql_where=sa.text('last_heartbeat IS NOT NULL'),
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_upgrade_tasks_client_id_status_created_at', 'upgrade_tasks', ['client_id', 'status', 'created_at'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_upgrade_tasks_status_created_at', 'upgrade_tasks', ['status', 'created_at'],
+        if_not_exists=True
+    )
+    op.create_index(
+        'ix_upgrade_packages_name_created_at', 'upgrade_packages', ['name', 'created_at'],
+        if_not_exists=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_upgrade_packages_name_created_at', table_name='upgrade_packages', if_exists=True)
+    op.drop_index('ix_upgrade_tasks_status_created_at', table_name='upgrade_tasks', if_exists=True)
+    op.drop_index('ix_upgrade_tasks_client_id_status_created_at', table_name='upgrade_tasks', if_exists=True)
+    op.drop_index('ix_clients_last_heartbeat', table_name='clients', if_exists=True)
+    op.drop_index('ix_clients_status_last_heartbeat', table_name='clients', if_exists=True)
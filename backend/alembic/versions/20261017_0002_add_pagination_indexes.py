@@ -0,0 +1,27 @@
+"""add (created_at, id) indexes for keyset pagination
+
+Revision ID: 8c41d5e0a7f2
+Revises: 3f9a2c7d1b04
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '8c41d5e0a7f2'
+down_revision = '3f9a2c7d1b04'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_clients_created_at_id', 'clients', ['created_at', 'id'], if_not_exists=True)
+    op.create_index('ix_upgrade_tasks_created_at_id', 'upgrade_tasks', ['created_at', 'id'], if_not_exists=True)
+    op.create_index('ix_upgrade_packages_created_at_id', 'upgrade_packages', ['created_at', 'id'], if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_upgrade_packages_created_at_id', table_name='upgrade_packages', if_exists=True)
+    op.drop_index('ix_upgrade_tasks_created_at_id', table_name='upgrade_tasks', if_exists=True)
+    op.drop_index('ix_clients_created_at_id', table_name='clients', if_exists=True)
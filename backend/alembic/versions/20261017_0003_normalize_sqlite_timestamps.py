@@ -0,0 +1,36 @@
+"""normalize SQLite timestamps written by CURRENT_TIMESTAMP
+
+Revision ID: 5d2e9b7c4a13
+Revises: 8c41d5e0a7f2
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e9b7c4a13'
+down_revision = '8c41d5e0a7f2'
+branch_labels = None
+depends_on = None
+
+TABLES = ('admins', 'clients', 'upgrade_packages', 'upgrade_tasks')
+
+
+def upgrade() -> None:
+    # SQLite以文本保存时间：数据库默认值写入'YYYY-MM-DD HH:MM:SS'，
+    # 而SQLAlchemy绑定的时间为'YYYY-MM-DD HH:MM:SS.ffffff'，两种格式混用时按字符串比较会出错，
+    # 统一补齐微秒，使游标分页的行值比较与排序一致
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table in TABLES:
+        for column in ('created_at', 'updated_at'):
+            op.execute(
+                f"UPDATE {table} SET {column} = {column} || '.000000' "
+                f"WHERE length({column}) = 19"
+            )
+
+
+def downgrade() -> None:
+    # 补齐的微秒不影响旧格式的读取，无需回退
+    pass
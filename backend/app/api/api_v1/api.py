@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.api_v1.endpoints import auth, admin, heartbeat, logs
+from app.api.api_v1.endpoints import auth, admin, clients, heartbeat, logs, upgrades
 
 api_router = APIRouter()
 
@@ -9,6 +9,12 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 # 管理员相关路由 (需要认证)
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
 
+# 客户端列表路由 (需要认证)
+api_router.include_router(clients.router, prefix="/clients", tags=["clients"])
+
+# 升级包和升级任务路由 (需要认证)
+api_router.include_router(upgrades.router, prefix="/upgrades", tags=["upgrades"])
+
 # 心跳相关路由
 api_router.include_router(heartbeat.router, prefix="/client", tags=["heartbeat"])
 
@@ -1,6 +1,8 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.api.deps import get_db, get_current_admin
+from app.core.auth_cache import auth_cache
+from app.core.logger import logger_manager
 from app.models.admin import Admin
 from typing import Dict, Any
 
@@ -47,4 +49,30 @@ def get_admin_dashboard(
             "total_admins": 1,  # 这里可以查询实际的管理员数量
             "status": "active"
         }
-    }
\ No newline at end of file
+    }
+
+
+@router.get("/auth-cache")
+def get_auth_cache_stats(
+    current_admin: Admin = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """
+    获取认证缓存统计信息
+    
+    Returns:
+        dict: token和管理员缓存的大小与命中率
+    """
+    return auth_cache.get_info()
+
+
+@router.get("/log-queue")
+def get_log_queue_stats(
+    current_admin: Admin = Depends(get_current_admin)
+) -> Dict[str, Any]:
+    """
+    获取日志队列统计信息
+    
+    Returns:
+        dict: 队列长度、容量以及按级别统计的丢弃数量
+    """
+    return logger_manager.get_queue_stats()
@@ -1,9 +1,11 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
 from app.core.config import settings
+from app.core.password_hasher import PasswordHasherBusy
 from app.core.security import jwt_handler
 from app.crud.crud_admin import admin
 from app.schemas.auth import LoginRequest, TokenResponse, TokenRefreshRequest
@@ -15,10 +17,10 @@ security = HTTPBearer()
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(
+async def login(
     login_data: LoginRequest, 
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> TokenResponse:
     """
     管理员登录接口
@@ -32,10 +34,18 @@ def login(
     client_ip = request.client.host if request.client else "unknown"
     auth_logger.info(f"Login attempt for user: {login_data.username} from IP: {client_ip}")
     
-    # 验证管理员账号密码
-    admin_user = admin.authenticate(
-        db, username=login_data.username, password=login_data.password
-    )
+    # 验证管理员账号密码（bcrypt在专用线程池中执行）
+    try:
+        admin_user = await admin.authenticate_async(
+            db, username=login_data.username, password=login_data.password
+        )
+    except PasswordHasherBusy as e:
+        auth_logger.warning(f"Login rejected for user: {login_data.username} from IP: {client_ip}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"},
+        )
     
     if not admin_user:
         auth_logger.warning(f"Failed login attempt for user: {login_data.username} from IP: {client_ip}")
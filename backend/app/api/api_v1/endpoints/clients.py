@@ -0,0 +1,61 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_admin
+from app.crud import client as client_crud
+from app.crud.base import InvalidCursorError
+from app.models.admin import Admin
+from app.models.client import Client as ClientModel
+from app.schemas.client import Client
+from app.schemas.pagination import CursorPage
+from app.services.export import EXPORT_MEDIA_TYPES, stream_export
+
+router = APIRouter()
+
+
+@router.get("", response_model=CursorPage[Client])
+def list_clients(
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页数量"),
+    client_status: Optional[str] = Query(None, alias="status", description="按状态过滤"),
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    获取客户端列表（游标分页，按创建时间倒序）
+    """
+    filters = []
+    if client_status:
+        filters.append(ClientModel.status == client_status)
+
+    try:
+        items, next_cursor = client_crud.get_page(db, cursor=cursor, limit=limit, filters=filters)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return CursorPage[Client](items=items, next_cursor=next_cursor, has_more=next_cursor is not None)
+
+
+@router.get("/export")
+def export_clients(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="导出格式: ndjson, csv"),
+    client_status: Optional[str] = Query(None, alias="status", description="按状态过滤"),
+    current_admin: Admin = Depends(get_current_admin)
+) -> StreamingResponse:
+    """
+    流式导出客户端列表（NDJSON或CSV）
+    
+    数据分批读取并边读边发送，内存占用与客户端数量无关
+    """
+    filters = []
+    if client_status:
+        filters.append(ClientModel.status == client_status)
+
+    return StreamingResponse(
+        stream_export(client_crud, fmt=export_format, filters=filters),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="clients.{export_format}"'}
+    )
@@ -1,15 +1,25 @@
 from datetime import datetime
 from typing import Any, List
 
-from fastapi import APIRouter, Depends, HTTPException, status, WebSocket, WebSocketDisconnect
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status, WebSocket, WebSocketDisconnect
+from sqlalchemy.ext.asyncio import AsyncSession
 import json
 
 from app.api import deps
 from app.crud import crud_client
 from app.schemas.client import Client
-from app.schemas.heartbeat import HeartbeatRequest, HeartbeatResponse
+from app.schemas.heartbeat import (
+    HeartbeatRequest,
+    HeartbeatResponse,
+    HeartbeatBatchRequest,
+    HeartbeatBatchItemResult,
+    HeartbeatBatchResponse,
+)
+from app.core.config import settings
 from app.core.websocket_manager import websocket_manager, MessageType
+from app.services.heartbeat_buffer import heartbeat_buffer
+from app.services.liveness_registry import liveness_registry
+from app.services.monitoring import monitoring_service
 
 router = APIRouter()
 
@@ -17,80 +27,234 @@ router = APIRouter()
 @router.post("/heartbeat", response_model=HeartbeatResponse)
 async def receive_heartbeat(
     *,
-    db: Session = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_async_db),
     heartbeat_data: HeartbeatRequest
 ) -> Any:
     """
     接收客户端心跳
     
-    - 验证客户端是否存在
-    - 更新客户端的心跳时间和状态
+    - 验证客户端是否存在（优先查询内存存活表）
+    - 更新客户端的心跳时间和状态（启用心跳缓冲时合并后批量写库，立即确认）
     - 返回心跳确认
     """
-    # 获取客户端
-    client = crud_client.client.get(db, heartbeat_data.client_id)
-    if not client:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Client not found"
-        )
+    now = datetime.utcnow()
     
-    # 更新客户端信息
-    update_data = {
-        "status": heartbeat_data.status,
-        "last_heartbeat": datetime.utcnow()
-    }
-    
-    # 如果提供了版本信息，也更新版本
-    if heartbeat_data.version:
-        update_data["version"] = heartbeat_data.version
+    if settings.HEARTBEAT_BUFFER_ENABLED:
+        # 从内存存活表获取客户端（未命中时从数据库加载）
+        client = await liveness_registry.get_or_load_async(db, heartbeat_data.client_id)
+        if not client:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Client not found"
+            )
+        
+        # 更新内存存活表，并写入心跳缓冲，由后台任务批量刷新到数据库
+        client = liveness_registry.record_heartbeat(
+            client_id=client.id,
+            status=heartbeat_data.status,
+            last_heartbeat=now,
+            version=heartbeat_data.version,
+            ip_address=heartbeat_data.ip_address
+        ) or client
+        heartbeat_buffer.add(
+            client_id=client.id,
+            status=heartbeat_data.status,
+            last_heartbeat=now,
+            version=heartbeat_data.version,
+            ip_address=heartbeat_data.ip_address
+        )
+    else:
+        # 更新客户端信息
+        update_data = {
+            "status": heartbeat_data.status,
+            "last_heartbeat": now
+        }
+        
+        # 如果提供了版本信息，也更新版本
+        if heartbeat_data.version:
+            update_data["version"] = heartbeat_data.version
+        
+        # 如果提供了IP地址，也更新IP地址
+        if heartbeat_data.ip_address:
+            update_data["ip_address"] = heartbeat_data.ip_address
+        
+        # 执行更新（单条UPDATE ... RETURNING，客户端不存在时返回None）
+        updated_client = await crud_client.client.update_fields_async(
+            db,
+            id=heartbeat_data.client_id,
+            obj_in=update_data
+        )
+        if not updated_client:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Client not found"
+            )
+        client = liveness_registry.put(updated_client)
+        now = client.last_heartbeat
     
-    # 如果提供了IP地址，也更新IP地址
-    if heartbeat_data.ip_address:
-        update_data["ip_address"] = heartbeat_data.ip_address
+    # 重新安排心跳超时截止时间
+    monitoring_service.record_heartbeat(client.id, client.status, now)
     
-    # 执行更新
-    updated_client = crud_client.client.update(
-        db=db, 
-        db_obj=client, 
-        obj_in=update_data
-    )
+    client_info = {
+        "name": client.name,
+        "ip_address": client.ip_address,
+        "version": client.version,
+        "status": client.status
+    }
     
     # 通过WebSocket发送状态更新通知
     await websocket_manager.send_client_status_update(
-        client_id=updated_client.id,
-        status=updated_client.status,
-        last_heartbeat=updated_client.last_heartbeat
+        client_id=client.id,
+        status=client_info["status"],
+        last_heartbeat=now
     )
     
     # 发送心跳接收通知
     await websocket_manager.send_heartbeat_received(
-        client_id=updated_client.id,
-        client_info={
-            "name": updated_client.name,
-            "ip_address": updated_client.ip_address,
-            "version": updated_client.version,
-            "status": updated_client.status
-        }
+        client_id=client.id,
+        client_info=client_info
     )
     
     return HeartbeatResponse(
         success=True,
         message="Heartbeat received successfully",
         timestamp=datetime.utcnow(),
-        client_status=updated_client.status
+        client_status=client_info["status"]
+    )
+
+
+async def check_heartbeat_batch_size(request: Request):
+    """
+    在逐条校验心跳之前检查批量大小
+    
+    依赖先于请求体校验执行，超大的批量直接返回413，不会先把每条心跳都校验一遍。
+    请求体已由FastAPI解析并缓存，这里不会重复解析；无法解析时交给请求体校验报错。
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        return
+    heartbeats = data.get("heartbeats") if isinstance(data, dict) else None
+    if isinstance(heartbeats, list) and len(heartbeats) > settings.HEARTBEAT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many heartbeats in one batch (max {settings.HEARTBEAT_BATCH_MAX_SIZE})"
+        )
+
+
+@router.post(
+    "/heartbeat/batch",
+    response_model=HeartbeatBatchResponse,
+    dependencies=[Depends(check_heartbeat_batch_size)]
+)
+async def receive_heartbeat_batch(
+    *,
+    db: AsyncSession = Depends(deps.get_async_db),
+    batch_data: HeartbeatBatchRequest
+) -> Any:
+    """
+    批量接收客户端心跳（供边缘网关代理多个客户端上报）
+    
+    - 单次请求最多包含 HEARTBEAT_BATCH_MAX_SIZE 个心跳（在逐条校验之前检查）
+    - 通过内存存活表校验客户端是否存在（未命中的一次查询加载）
+    - 同一客户端出现多次时以最后一条为准
+    - 所有有效心跳通过一条批量UPDATE写入（启用心跳缓冲时写入缓冲统一刷新）
+    - 返回每个心跳的处理结果
+    """
+    heartbeats = batch_data.heartbeats
+    
+    # 从内存存活表获取客户端，未命中的一次查询加载
+    clients = await liveness_registry.get_many_or_load_async(db, [hb.client_id for hb in heartbeats])
+    
+    now = datetime.utcnow()
+    results: List[HeartbeatBatchItemResult] = []
+    accepted = {}
+    
+    for hb in heartbeats:
+        if hb.client_id not in clients:
+            results.append(HeartbeatBatchItemResult(
+                client_id=hb.client_id,
+                success=False,
+                message="Client not found"
+            ))
+            continue
+        
+        accepted[hb.client_id] = {
+            "id": hb.client_id,
+            "status": hb.status,
+            "last_heartbeat": now,
+            "version": hb.version,
+            "ip_address": hb.ip_address
+        }
+        results.append(HeartbeatBatchItemResult(
+            client_id=hb.client_id,
+            success=True,
+            message="Heartbeat received successfully",
+            client_status=hb.status
+        ))
+    
+    for item in accepted.values():
+        liveness_registry.record_heartbeat(
+            client_id=item["id"],
+            status=item["status"],
+            last_heartbeat=item["last_heartbeat"],
+            version=item["version"],
+            ip_address=item["ip_address"]
+        )
+        monitoring_service.record_heartbeat(item["id"], item["status"], item["last_heartbeat"])
+    
+    if accepted:
+        if settings.HEARTBEAT_BUFFER_ENABLED:
+            for item in accepted.values():
+                heartbeat_buffer.add(
+                    client_id=item["id"],
+                    status=item["status"],
+                    last_heartbeat=item["last_heartbeat"],
+                    version=item["version"],
+                    ip_address=item["ip_address"]
+                )
+        else:
+            await crud_client.client.bulk_update_heartbeats_async(db, heartbeats=list(accepted.values()))
+    
+    # 通过WebSocket发送状态更新通知
+    for item in accepted.values():
+        client = clients[item["id"]]
+        await websocket_manager.send_client_status_update(
+            client_id=client.id,
+            status=item["status"],
+            last_heartbeat=now
+        )
+        await websocket_manager.send_heartbeat_received(
+            client_id=client.id,
+            client_info={
+                "name": client.name,
+                "ip_address": client.ip_address,
+                "version": client.version,
+                "status": client.status
+            }
+        )
+    
+    rejected = sum(1 for r in results if not r.success)
+    return HeartbeatBatchResponse(
+        success=rejected == 0,
+        timestamp=datetime.utcnow(),
+        accepted=len(results) - rejected,
+        rejected=rejected,
+        results=results
     )
 
 
 @router.get("/heartbeat/status/{client_id}", response_model=Client)
-def get_client_status(
+async def get_client_status(
     client_id: int,
-    db: Session = Depends(deps.get_db)
+    db: AsyncSession = Depends(deps.get_async_db)
 ) -> Any:
     """
     获取客户端状态信息
+    
+    优先从内存存活表读取，未命中时从数据库加载
     """
-    client = crud_client.client.get(db, client_id)
+    client = await liveness_registry.get_or_load_async(db, client_id)
     if not client:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -130,28 +294,30 @@ async def websocket_endpoint(websocket: WebSocket):
                 
                 elif action == "get_info":
                     info = websocket_manager.get_connection_info()
-                    await websocket.send_text(json.dumps({
+                    await websocket_manager.send_to_connection(connection_id, {
                         "type": MessageType.SYSTEM_MESSAGE,
                         "message": "连接信息",
                         "data": info,
                         "timestamp": datetime.utcnow().isoformat()
-                    }, ensure_ascii=False))
+                    })
                 
                 else:
-                    await websocket.send_text(json.dumps({
+                    await websocket_manager.send_to_connection(connection_id, {
                         "type": MessageType.SYSTEM_MESSAGE,
                         "message": f"未知操作: {action}",
                         "timestamp": datetime.utcnow().isoformat()
-                    }, ensure_ascii=False))
+                    })
             
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({
+                await websocket_manager.send_to_connection(connection_id, {
                     "type": MessageType.SYSTEM_MESSAGE,
                     "message": "无效的JSON格式",
                     "timestamp": datetime.utcnow().isoformat()
-                }, ensure_ascii=False))
+                })
     
     except WebSocketDisconnect:
+        pass
+    finally:
         websocket_manager.disconnect(connection_id)
 
 
@@ -1,19 +1,32 @@
-from typing import Any
-import os
-import json
+from typing import Any, List, Optional, Tuple
 from datetime import datetime
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
-import logging
+import asyncio
+import json
+import time
+import zlib
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from pydantic import BaseModel
 
+from app.api.deps import get_current_admin
+from app.core.config import settings
+from app.core.log_store import LEVEL_NUMBERS, log_store
 from app.core.logger import get_logger
+from app.models.admin import Admin
+from app.services.frontend_log_writer import frontend_log_writer
+from app.services.log_reader import log_stats_cache, read_from_offset, tail_lines
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+GZIP_MAGIC = b"\x1f\x8b"
+
 
 class FrontendLogEntry(BaseModel):
     timestamp: str
@@ -27,144 +40,325 @@ class FrontendLogEntry(BaseModel):
     logLine: str
 
 
-class FrontendLogger:
-    """前端日志文件管理器"""
-    
-    def __init__(self):
-        # 创建前端日志目录
-        self.log_dir = Path("frontend/logs")
-        self.log_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 设置文件处理器
-        self.setup_file_handlers()
-    
-    def setup_file_handlers(self):
-        """设置文件处理器"""
-        # 应用日志文件处理器
-        self.app_handler = RotatingFileHandler(
-            filename=self.log_dir / "app.log",
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        
-        # 错误日志文件处理器
-        self.error_handler = RotatingFileHandler(
-            filename=self.log_dir / "error.log",
-            maxBytes=10 * 1024 * 1024,  # 10MB
-            backupCount=3,
-            encoding='utf-8'
-        )
-        
-        # 每日日志文件处理器
-        from logging.handlers import TimedRotatingFileHandler
-        self.daily_handler = TimedRotatingFileHandler(
-            filename=self.log_dir / "daily.log",
-            when='midnight',
-            interval=1,
-            backupCount=30,
-            encoding='utf-8'
-        )
+def frontend_record(item: dict, received_at: float) -> dict:
+    """
+    构造写入结构化日志存储的记录
     
-    def write_log(self, log_entry: FrontendLogEntry):
-        """写入日志到文件"""
-        try:
-            # 写入应用日志
-            with open(self.log_dir / "app.log", "a", encoding='utf-8') as f:
-                f.write(log_entry.logLine + "\n")
-            
-            # 如果是错误级别，也写入错误日志
-            if log_entry.level.upper() == "ERROR":
-                with open(self.log_dir / "error.log", "a", encoding='utf-8') as f:
-                    f.write(log_entry.logLine + "\n")
-            
-            # 写入每日日志
-            with open(self.log_dir / "daily.log", "a", encoding='utf-8') as f:
-                f.write(log_entry.logLine + "\n")
-                
-        except Exception as e:
-            logger.error(f"Failed to write frontend log to file: {e}")
-            raise
-
-
-# 全局前端日志管理器实例
-frontend_logger = FrontendLogger()
+    时间以服务端接收时间为准（客户端时钟可能不准），客户端时间保存在client_timestamp中
+    """
+    record = {
+        "ts": received_at,
+        "level": str(item.get("level") or "INFO").upper(),
+        "logger": str(item.get("logger") or "frontend"),
+        "message": str(item.get("message") or item.get("logLine", "")),
+        "source": "frontend",
+        "client_timestamp": item.get("timestamp")
+    }
+    for key in ("data", "stack", "url", "userAgent"):
+        if item.get(key) is not None:
+            record[key] = item[key]
+    return record
 
 
 @router.post("/frontend")
 async def save_frontend_log(log_entry: FrontendLogEntry):
     """
     保存前端日志到文件
+    
+    日志先放入写缓冲，由后台线程批量写入文件
+    """
+    # 记录后端接收到前端日志的信息
+    logger.debug(f"Received frontend log: {log_entry.level} - {log_entry.message}")
+    
+    record = frontend_record(log_entry.model_dump(), time.time())
+    if not frontend_log_writer.write(log_entry.level, log_entry.logLine, record):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Log buffer is full"
+        )
+    
+    return {"status": "success", "message": "Log saved successfully"}
+
+
+async def check_frontend_log_batch_size(request: Request):
+    """
+    在逐条校验日志之前检查批量大小（同心跳批量接口）
+    
+    依赖先于请求体校验执行，请求体已由FastAPI解析并缓存；无法解析时交给请求体校验报错
     """
     try:
-        # 记录后端接收到前端日志的信息
-        logger.debug(f"Received frontend log: {log_entry.level} - {log_entry.message}")
-        
-        # 写入前端日志文件
-        frontend_logger.write_log(log_entry)
-        
-        return {"status": "success", "message": "Log saved successfully"}
-        
-    except Exception as e:
-        logger.error(f"Failed to save frontend log: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to save log: {str(e)}")
+        data = await request.json()
+    except ValueError:
+        return
+    if isinstance(data, list) and len(data) > settings.FRONTEND_LOG_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many log entries in one batch (max {settings.FRONTEND_LOG_BATCH_MAX_SIZE})"
+        )
+
+
+@router.post("/frontend/batch", dependencies=[Depends(check_frontend_log_batch_size)])
+async def save_frontend_log_batch(log_entries: List[FrontendLogEntry]):
+    """
+    批量保存前端日志到文件
+    
+    - 单次请求最多包含 FRONTEND_LOG_BATCH_MAX_SIZE 条日志（在逐条校验之前检查）
+    - 写缓冲已满时多出的日志被丢弃，返回实际接收和丢弃的条数
+    """
+    received_at = time.time()
+    accepted = frontend_log_writer.write_many(
+        [(entry.level, entry.logLine) for entry in log_entries],
+        [frontend_record(entry.model_dump(), received_at) for entry in log_entries]
+    )
+    logger.debug(f"Received {len(log_entries)} frontend logs, accepted {accepted}")
+    
+    return {
+        "status": "success",
+        "accepted": accepted,
+        "dropped": len(log_entries) - accepted
+    }
+
+
+def decode_log_body(body: bytes, content_encoding: str, max_size: int) -> bytes:
+    """
+    解压gzip请求体
+    
+    按Content-Encoding或gzip文件头识别压缩数据（sendBeacon无法设置请求头），
+    解压后超过 max_size 字节时抛出413，数据不完整时抛出400
+    """
+    if "gzip" not in content_encoding.lower() and not body.startswith(GZIP_MAGIC):
+        if len(body) > max_size:
+            raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Log batch too large")
+        return body
+    
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = decompressor.decompress(body, max_size + 1)
+    except zlib.error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid gzip body")
+    if len(data) > max_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Log batch too large")
+    if not decompressor.eof:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Truncated gzip body")
+    return data
+
+
+def parse_ndjson_logs(data: bytes) -> Tuple[List[Tuple[str, str]], List[dict], int]:
+    """
+    解析NDJSON日志，每行一个前端日志对象
+    
+    只取写文件需要的level和logLine字段，不为每条日志构造Pydantic模型；
+    无法解析或缺少logLine的行计入rejected
+    
+    Returns:
+        ([(level, logLine), ...], 结构化记录列表, rejected)
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    received_at = time.time()
+    entries = []
+    records = []
+    rejected = 0
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = loads(line)
+        except ValueError:
+            rejected += 1
+            continue
+        if not isinstance(item, dict) or not isinstance(item.get("logLine"), str):
+            rejected += 1
+            continue
+        level = item.get("level")
+        entries.append((level if isinstance(level, str) else "INFO", item["logLine"]))
+        records.append(frontend_record(item, received_at))
+    return entries, records, rejected
+
+
+@router.post("/frontend/ndjson")
+async def save_frontend_log_ndjson(request: Request):
+    """
+    批量保存NDJSON格式的前端日志（可gzip压缩）
+    
+    - 请求体每行一个 FrontendLogEntry 对象，Content-Encoding: gzip 时先解压
+    - 单次请求最多包含 FRONTEND_LOG_BATCH_MAX_SIZE 条日志，
+      解压后不超过 FRONTEND_LOG_MAX_BODY_SIZE 字节
+    - 返回接收、丢弃（写缓冲已满）和无法解析的条数
+    """
+    body = await request.body()
+    data = decode_log_body(body, request.headers.get("content-encoding", ""), settings.FRONTEND_LOG_MAX_BODY_SIZE)
+    entries, records, rejected = parse_ndjson_logs(data)
+    
+    if len(entries) + rejected > settings.FRONTEND_LOG_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many log entries in one batch (max {settings.FRONTEND_LOG_BATCH_MAX_SIZE})"
+        )
+    
+    accepted = frontend_log_writer.write_many(entries, records)
+    logger.debug(f"Received {len(entries)} NDJSON frontend logs, accepted {accepted}, rejected {rejected}")
+    
+    return {
+        "status": "success",
+        "accepted": accepted,
+        "dropped": len(entries) - accepted,
+        "rejected": rejected
+    }
+
+
+@router.get("/frontend/writer")
+async def get_frontend_log_writer_stats():
+    """
+    获取前端日志写缓冲统计信息
+    """
+    return frontend_log_writer.get_stats()
+
+
+def collect_log_stats(log_dir: Path) -> dict:
+    """汇总日志目录下各文件的统计信息，行数来自增量缓存（在线程池中执行）"""
+    stats = {
+        "files": {},
+        "total_size": 0
+    }
+    if not log_dir.exists():
+        return stats
+    
+    log_files = sorted(log_dir.glob("*.log"))
+    for log_file in log_files:
+        try:
+            file_stats = log_stats_cache.get(log_file)
+        except FileNotFoundError:
+            # 统计过程中文件被滚动或删除
+            continue
+        stats["files"][log_file.name] = {
+            "size": file_stats.size,
+            "modified": datetime.fromtimestamp(file_stats.mtime).isoformat(),
+            "lines": file_stats.lines
+        }
+        stats["total_size"] += file_stats.size
+    log_stats_cache.prune(log_files)
+    
+    return stats
 
 
 @router.get("/frontend/stats")
 async def get_frontend_log_stats():
     """
     获取前端日志统计信息
+    
+    文件未变化时直接使用缓存的行数，文件增长时只统计新增部分
     """
     try:
-        log_dir = Path("frontend/logs")
-        
-        stats = {
-            "files": {},
-            "total_size": 0
-        }
-        
-        if log_dir.exists():
-            for log_file in log_dir.glob("*.log"):
-                file_stats = log_file.stat()
-                stats["files"][log_file.name] = {
-                    "size": file_stats.st_size,
-                    "modified": datetime.fromtimestamp(file_stats.st_mtime).isoformat(),
-                    "lines": sum(1 for _ in open(log_file, 'r', encoding='utf-8', errors='ignore'))
-                }
-                stats["total_size"] += file_stats.st_size
-        
-        return stats
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, collect_log_stats, frontend_log_writer.log_dir)
         
     except Exception as e:
         logger.error(f"Failed to get frontend log stats: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get log stats: {str(e)}")
 
 
+def resolve_log_file(filename: str) -> Path:
+    """校验文件名并返回前端日志目录下的文件路径，防止路径穿越"""
+    if not filename or Path(filename).name != filename or filename.startswith("."):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid log file name")
+    log_file = frontend_log_writer.log_dir / filename
+    if not log_file.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Log file not found")
+    return log_file
+
+
+def read_log_file(log_file: Path, lines: int, offset: Optional[int], file_id: Optional[str], max_bytes: int) -> dict:
+    """读取日志文件末尾N行，或从offset开始追加的内容（在线程池中执行）"""
+    if offset is None:
+        chunk = tail_lines(log_file, lines)
+        total_lines = log_stats_cache.get(log_file).lines
+    else:
+        chunk = read_from_offset(log_file, offset, max_bytes, file_id)
+        total_lines = None
+    
+    return {
+        "filename": log_file.name,
+        "total_lines": total_lines,
+        "returned_lines": chunk.line_count,
+        "content": chunk.content.decode("utf-8", errors="replace"),
+        "offset": chunk.end_offset,
+        "file_id": chunk.file_id,
+        "reset": chunk.reset
+    }
+
+
 @router.get("/frontend/{filename}")
-async def get_frontend_log_file(filename: str, lines: int = 100):
+async def get_frontend_log_file(
+    filename: str,
+    lines: int = Query(100, ge=0, le=10000),
+    offset: Optional[int] = Query(None, ge=0),
+    file_id: Optional[str] = None,
+    max_bytes: int = Query(256 * 1024, ge=1, le=4 * 1024 * 1024)
+):
     """
     获取前端日志文件内容
+    
+    - 不带offset时返回最后 lines 行（从文件末尾按块向前读取，不读取整个文件）
+    - 带offset时为跟踪模式，只返回offset之后追加的完整行（最多 max_bytes 字节）
+    - 返回的offset和file_id用于下一次跟踪请求；文件滚动或被截断时从头读取并返回reset=true
     """
+    log_file = resolve_log_file(filename)
+    
     try:
-        log_file = Path("frontend/logs") / filename
-        
-        if not log_file.exists():
-            raise HTTPException(status_code=404, detail="Log file not found")
-        
-        # 读取最后N行
-        with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
-            all_lines = f.readlines()
-            recent_lines = all_lines[-lines:] if len(all_lines) > lines else all_lines
-        
-        return {
-            "filename": filename,
-            "total_lines": len(all_lines),
-            "returned_lines": len(recent_lines),
-            "content": "".join(recent_lines)
-        }
-        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, read_log_file, log_file, lines, offset, file_id, max_bytes)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Log file not found")
     except Exception as e:
         logger.error(f"Failed to read frontend log file {filename}: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to read log file: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Failed to read log file: {str(e)}")
+
+
+@router.get("/query")
+async def query_logs(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    level: Optional[str] = Query(None, description="最低级别，如 WARNING 返回WARNING及以上"),
+    logger_name: Optional[str] = Query(None, alias="logger", description="日志器名称，包含其子日志器"),
+    source: Optional[str] = Query(None, description="来源: backend 或 frontend"),
+    q: Optional[str] = Query(None, description="消息中包含的子串"),
+    limit: int = Query(100, ge=1, le=1000),
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    查询结构化日志
+    
+    - 支持时间范围、最低级别、日志器、来源和消息子串过滤
+    - 通过稀疏索引跳过不相关的段和块，只读取候选块
+    - 按写入顺序从新到旧返回最多limit条记录
+    """
+    if level and level.upper() not in LEVEL_NUMBERS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown log level: {level}")
+    
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None,
+            lambda: log_store.query(
+                start=start,
+                end=end,
+                level=level,
+                logger=logger_name,
+                source=source,
+                q=q,
+                limit=limit
+            )
+        )
+    except Exception as e:
+        logger.error(f"Failed to query logs: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to query logs: {str(e)}")
+
+
+@router.get("/store")
+async def get_log_store_info(
+    current_admin: Admin = Depends(get_current_admin)
+):
+    """
+    获取结构化日志存储的段数、块数和大小
+    """
+    return log_store.get_info()
@@ -0,0 +1,93 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_admin
+from app.crud import upgrade_package as upgrade_package_crud
+from app.crud import upgrade_task as upgrade_task_crud
+from app.crud.base import InvalidCursorError
+from app.models.admin import Admin
+from app.models.upgrade_package import UpgradePackage as UpgradePackageModel
+from app.models.upgrade_task import UpgradeTask as UpgradeTaskModel
+from app.schemas.pagination import CursorPage
+from app.schemas.upgrade_package import UpgradePackage
+from app.schemas.upgrade_task import UpgradeTask
+from app.services.export import EXPORT_MEDIA_TYPES, stream_export
+
+router = APIRouter()
+
+
+@router.get("/packages", response_model=CursorPage[UpgradePackage])
+def list_upgrade_packages(
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页数量"),
+    name: Optional[str] = Query(None, description="按升级包名称过滤"),
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    获取升级包列表（游标分页，按创建时间倒序）
+    """
+    filters = []
+    if name:
+        filters.append(UpgradePackageModel.name == name)
+
+    try:
+        items, next_cursor = upgrade_package_crud.get_page(db, cursor=cursor, limit=limit, filters=filters)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return CursorPage[UpgradePackage](items=items, next_cursor=next_cursor, has_more=next_cursor is not None)
+
+
+@router.get("/tasks", response_model=CursorPage[UpgradeTask])
+def list_upgrade_tasks(
+    cursor: Optional[str] = Query(None, description="上一页返回的next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页数量"),
+    client_id: Optional[int] = Query(None, description="按客户端ID过滤"),
+    task_status: Optional[str] = Query(None, alias="status", description="按任务状态过滤"),
+    current_admin: Admin = Depends(get_current_admin),
+    db: Session = Depends(get_db)
+) -> Any:
+    """
+    获取升级任务列表（游标分页，按创建时间倒序）
+    """
+    filters = []
+    if client_id is not None:
+        filters.append(UpgradeTaskModel.client_id == client_id)
+    if task_status:
+        filters.append(UpgradeTaskModel.status == task_status)
+
+    try:
+        items, next_cursor = upgrade_task_crud.get_page(db, cursor=cursor, limit=limit, filters=filters)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return CursorPage[UpgradeTask](items=items, next_cursor=next_cursor, has_more=next_cursor is not None)
+
+
+@router.get("/tasks/export")
+def export_upgrade_tasks(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$", description="导出格式: ndjson, csv"),
+    client_id: Optional[int] = Query(None, description="按客户端ID过滤"),
+    task_status: Optional[str] = Query(None, alias="status", description="按任务状态过滤"),
+    current_admin: Admin = Depends(get_current_admin)
+) -> StreamingResponse:
+    """
+    流式导出升级任务历史（NDJSON或CSV）
+    
+    数据分批读取并边读边发送，内存占用与任务数量无关
+    """
+    filters = []
+    if client_id is not None:
+        filters.append(UpgradeTaskModel.client_id == client_id)
+    if task_status:
+        filters.append(UpgradeTaskModel.status == task_status)
+
+    return StreamingResponse(
+        stream_export(upgrade_task_crud, fmt=export_format, filters=filters),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="upgrade_tasks.{export_format}"'}
+    )
@@ -1,10 +1,10 @@
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal
-from app.core.security import jwt_handler
-from app.crud.crud_admin import admin
+from app.core.auth_cache import auth_cache
+from app.core.database import AsyncSessionLocal, SessionLocal
 from app.models.admin import Admin
 
 security = HTTPBearer(auto_error=False)
@@ -19,6 +19,12 @@ def get_db() -> Generator:
         db.close()
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """获取异步数据库会话"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_current_admin(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: Session = Depends(get_db)
@@ -38,15 +44,15 @@ def get_current_admin(
         raise credentials_exception
         
     try:
-        # 验证token并获取用户名
-        username = jwt_handler.verify_token(credentials.credentials)
+        # 验证token并获取用户名（验证结果缓存到token过期）
+        username = auth_cache.verify_token(credentials.credentials)
         if username is None:
             raise credentials_exception
     except Exception:
         raise credentials_exception
     
-    # 从数据库获取管理员信息
-    admin_user = admin.get_by_username(db, username=username)
+    # 获取管理员信息（优先使用缓存）
+    admin_user = auth_cache.get_admin(db, username)
     if admin_user is None:
         raise credentials_exception
     
@@ -66,11 +72,11 @@ def get_current_admin_optional(
         return None
         
     try:
-        username = jwt_handler.verify_token(credentials.credentials)
+        username = auth_cache.verify_token(credentials.credentials)
         if username is None:
             return None
             
-        admin_user = admin.get_by_username(db, username=username)
+        admin_user = auth_cache.get_admin(db, username)
         return admin_user
     except Exception:
         return None
\ No newline at end of file
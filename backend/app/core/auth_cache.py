@@ -0,0 +1,130 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.security import jwt_handler
+from app.crud.crud_admin import admin as admin_crud
+from app.models.admin import Admin
+
+
+class AuthCache:
+    """
+    认证缓存
+    
+    - 已验证的token：以token的SHA-256为键缓存用户名，过期时间不晚于token的exp
+    - 管理员记录：以用户名为键缓存管理员列数据，命中时合并到当前会话，不查询数据库
+    
+    管理员通过ORM更新或删除时自动失效；通过Core批量语句修改管理员时需调用invalidate_admin。
+    """
+    
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        token_cache_size: Optional[int] = None,
+        token_ttl: Optional[float] = None,
+        admin_cache_size: Optional[int] = None,
+        admin_ttl: Optional[float] = None
+    ):
+        self.enabled = settings.AUTH_CACHE_ENABLED if enabled is None else enabled
+        self.tokens = TTLCache(
+            maxsize=token_cache_size or settings.AUTH_TOKEN_CACHE_SIZE,
+            ttl=token_ttl or settings.AUTH_TOKEN_CACHE_TTL_SECONDS
+        )
+        self.admins = TTLCache(
+            maxsize=admin_cache_size or settings.AUTH_ADMIN_CACHE_SIZE,
+            ttl=admin_ttl or settings.AUTH_ADMIN_CACHE_TTL_SECONDS
+        )
+    
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+    
+    def verify_token(self, token: str) -> Optional[str]:
+        """
+        验证token并返回用户名，验证结果缓存到token过期为止
+        
+        Returns:
+            Optional[str]: 用户名，token无效返回None
+        """
+        if not self.enabled:
+            return jwt_handler.verify_token(token)
+        
+        key = self._token_key(token)
+        username = self.tokens.get(key)
+        if username is not None:
+            return username
+        
+        payload = jwt_handler.decode_token(token)
+        username = payload.get("sub") if payload else None
+        if username is None:
+            return None
+        self.tokens.set(key, username, expires_at=payload.get("exp"))
+        return username
+    
+    def get_admin(self, db: Session, username: str) -> Optional[Admin]:
+        """
+        根据用户名获取管理员，优先使用缓存
+        
+        返回的对象属于db会话；缓存命中时不发出SQL
+        """
+        if not self.enabled:
+            return admin_crud.get_by_username(db, username=username)
+        
+        snapshot = self.admins.get(username)
+        if snapshot is not None:
+            return db.merge(self._detached_copy(snapshot), load=False)
+        
+        admin_user = admin_crud.get_by_username(db, username=username)
+        if admin_user is not None:
+            self.admins.set(username, self._snapshot(admin_user))
+        return admin_user
+    
+    @staticmethod
+    def _snapshot(admin_user: Admin) -> Dict[str, Any]:
+        """提取管理员的列数据"""
+        return {attr.key: getattr(admin_user, attr.key) for attr in inspect(Admin).column_attrs}
+    
+    @staticmethod
+    def _detached_copy(snapshot: Dict[str, Any]) -> Admin:
+        """由列数据构造已脱离会话的管理员对象，用于合并到当前会话"""
+        admin_user = Admin(**snapshot)
+        make_transient_to_detached(admin_user)
+        return admin_user
+    
+    def invalidate_admin(self, username: str):
+        """管理员变更后调用，使其缓存失效"""
+        self.admins.invalidate(username)
+    
+    def invalidate_token(self, token: str):
+        """使单个token的验证结果失效"""
+        self.tokens.invalidate(self._token_key(token))
+    
+    def clear(self):
+        """清空所有缓存"""
+        self.tokens.clear()
+        self.admins.clear()
+    
+    def get_info(self) -> Dict[str, Any]:
+        """缓存大小和命中率统计"""
+        return {
+            "enabled": self.enabled,
+            "tokens": self.tokens.get_info(),
+            "admins": self.admins.get_info()
+        }
+
+
+# 全局实例
+auth_cache = AuthCache()
+
+
+@event.listens_for(Admin, "after_update")
+@event.listens_for(Admin, "after_delete")
+def _invalidate_changed_admin(mapper, connection, target: Admin):
+    """管理员通过ORM更新或删除后使缓存失效（包括改名前的用户名）"""
+    history = inspect(target).attrs.username.history
+    for username in {target.username, *(history.deleted or ())}:
+        auth_cache.invalidate_admin(username)
@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    带过期时间的有界LRU缓存（线程安全）
+    
+    每个条目有独立的过期时间（不晚于默认TTL），容量满时淘汰最久未使用的条目，
+    并统计命中、未命中、过期和淘汰次数。
+    """
+    
+    def __init__(self, maxsize: int, ttl: float, timer: Callable[[], float] = time.time):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+    
+    def __len__(self) -> int:
+        return len(self._data)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """获取未过期的值，不存在或已过期返回None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            expires_at, value = item
+            if expires_at <= self.timer():
+                del self._data[key]
+                self.stats["expired"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+    
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None):
+        """
+        写入缓存
+        
+        Args:
+            key: 缓存键
+            value: 缓存值
+            expires_at: 绝对过期时间（与timer同一时钟），不会晚于当前时间加默认TTL
+        """
+        deadline = self.timer() + self.ttl
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        with self._lock:
+            self._data[key] = (deadline, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def invalidate(self, key: Hashable):
+        """删除指定条目"""
+        with self._lock:
+            self._data.pop(key, None)
+    
+    def clear(self):
+        """清空缓存（保留统计）"""
+        with self._lock:
+            self._data.clear()
+    
+    @property
+    def hit_rate(self) -> float:
+        """命中率"""
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+    
+    def get_info(self) -> Dict[str, Any]:
+        """缓存大小和命中统计"""
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hit_rate": round(self.hit_rate, 4),
+            **self.stats
+        }
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings
 
@@ -22,21 +22,94 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str = "sqlite:///./xiaoxin_rpa.db"
+    ASYNC_DATABASE_URL: str = ""  # 异步驱动URL；为空时由DATABASE_URL推导（sqlite→aiosqlite，postgresql→asyncpg）
+    DB_POOL_SIZE: int = 5  # 连接池常驻连接数
+    DB_MAX_OVERFLOW: int = 10  # 连接池允许超出常驻连接数的临时连接数
+    DB_POOL_RECYCLE: int = 1800  # 连接最长复用时间（秒），-1表示不回收
+    DB_POOL_TIMEOUT: int = 30  # 从连接池获取连接的等待超时（秒）
+    DB_POOL_PRE_PING: bool = True  # 取出连接前检测连接是否可用
+    
+    # SQLite
+    SQLITE_WAL_ENABLED: bool = True  # 启用WAL日志模式，写入时不阻塞读取
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # 同步级别: OFF, NORMAL, FULL；WAL模式下NORMAL足够安全
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000  # 数据库被锁定时的等待时间（毫秒）
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # 内存映射读取的大小（字节），0表示禁用
 
     # Security
     SECRET_KEY: str = "your-secret-key-here"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    BCRYPT_ROUNDS: int = 12  # bcrypt计算成本，修改后旧密码哈希在下次登录时自动重新计算
+    PASSWORD_HASH_WORKERS: int = 2  # 密码哈希专用线程数
+    PASSWORD_HASH_MAX_PENDING: int = 32  # 同时等待或执行中的密码哈希任务上限，超出时登录返回503
+    AUTH_CACHE_ENABLED: bool = True  # 是否缓存token验证结果和管理员记录
+    AUTH_TOKEN_CACHE_SIZE: int = 1024  # 缓存的已验证token数量上限
+    AUTH_TOKEN_CACHE_TTL_SECONDS: int = 300  # token验证结果最长缓存时间（秒），且不晚于token过期时间
+    AUTH_ADMIN_CACHE_SIZE: int = 256  # 缓存的管理员记录数量上限
+    AUTH_ADMIN_CACHE_TTL_SECONDS: int = 60  # 管理员记录缓存时间（秒）
     
     # Client Monitoring
     HEARTBEAT_TIMEOUT_SECONDS: int = 60  # 客户端心跳超时时间（秒）
     HEARTBEAT_CHECK_INTERVAL_SECONDS: int = 30  # 心跳检查间隔（秒）
+    HEARTBEAT_MONITOR_MODE: str = "deadline"  # 超时检测模式: deadline（截止时间堆）, sweep（定期单条UPDATE扫描）
+    HEARTBEAT_MONITOR_TICK_MS: int = 1000  # deadline模式的检测精度（毫秒），每次只处理已到期的客户端
+
+    # Heartbeat Buffer
+    HEARTBEAT_BUFFER_ENABLED: bool = True  # 是否启用心跳写缓冲（合并后批量写库）
+    HEARTBEAT_FLUSH_INTERVAL_MS: int = 1000  # 心跳缓冲刷新间隔（毫秒）
+    HEARTBEAT_BUFFER_MAX_SIZE: int = 5000  # 缓冲客户端数达到该值时立即刷新
+    HEARTBEAT_BATCH_MAX_SIZE: int = 500  # 批量心跳接口单次请求最多包含的心跳数
+    LIVENESS_REGISTRY_TTL_SECONDS: float = 10  # 内存存活表记录的有效期（秒），过期后从数据库重新加载以获取其他worker的更新；0表示不过期
+    
+    # WebSocket
+    WEBSOCKET_SEND_QUEUE_SIZE: int = 256  # 每个连接的发送队列长度，0表示直接发送
+    WEBSOCKET_OVERFLOW_POLICY: str = "drop_oldest"  # 发送队列溢出策略: drop_oldest, coalesce, disconnect
+    WEBSOCKET_COALESCE_WINDOW_MS: int = 0  # 状态/心跳消息合并窗口（毫秒），如250；0表示逐条发送
+    WEBSOCKET_BROKER: str = ""  # 跨worker广播代理: redis；为空表示只在本进程内广播
+    WEBSOCKET_BROKER_CHANNEL: str = "xiaoxin_rpa:websocket"  # Redis广播频道
+    WEBSOCKET_BROKER_QUEUE_SIZE: int = 1000  # 等待发布到Redis的消息上限，超出时丢弃
+
+    @field_validator("WEBSOCKET_BROKER")
+    @classmethod
+    def validate_websocket_broker(cls, v: str) -> str:
+        v = v.strip().lower()
+        if v not in ("", "redis"):
+            # LocalBroker只在单个进程内转发，不能跨worker广播，仅供测试直接构造使用
+            raise ValueError(f"不支持的WebSocket广播代理: {v}，可选值: redis或留空")
+        return v
+    
+    # Export
+    EXPORT_BATCH_SIZE: int = 1000  # 流式导出每批从数据库读取的行数
+    EXPORT_CHUNK_SIZE: int = 64 * 1024  # 流式导出每次发送的数据块大小（字节）
+    
+    # Redis
+    REDIS_URL: str = "redis://localhost:6379/0"
     
     # Logging
     LOG_LEVEL: str = "INFO"  # 日志级别: DEBUG, INFO, WARNING, ERROR, CRITICAL
+    REQUEST_LOG_EXCLUDE_PATHS: List[str] = ["/api/v1/client/heartbeat"]  # 不记录INFO请求日志的路径前缀（错误仍记录）
+    REQUEST_LOG_SAMPLE_RATES: Dict[str, float] = {}  # 按路径前缀采样INFO请求日志，如 {"/api/v1/logs": 0.1}
     LOG_FILE_MAX_SIZE: int = 10 * 1024 * 1024  # 日志文件最大大小（字节）
     LOG_FILE_BACKUP_COUNT: int = 5  # 保留的日志文件数量
     LOG_DAILY_BACKUP_COUNT: int = 30  # 每日日志保留天数
+    LOG_QUEUE_ENABLED: bool = True  # 通过队列由后台线程写日志，避免阻塞请求
+    LOG_QUEUE_MAX_SIZE: int = 10000  # 日志队列容量，队列满时丢弃并计数
+    LOG_STORE_ENABLED: bool = True  # 是否把后端和前端日志写入结构化日志存储（支持查询）
+    LOG_STORE_DIR: str = "logs/store"  # 结构化日志存储目录
+    LOG_STORE_SEGMENT_MAX_BYTES: int = 16 * 1024 * 1024  # 单个段文件最大大小（字节）
+    LOG_STORE_BLOCK_RECORDS: int = 256  # 每多少条记录生成一个稀疏索引项
+    LOG_STORE_MAX_SEGMENTS: int = 64  # 最多保留的段文件数量
+    
+    # Frontend logs
+    FRONTEND_LOG_DIR: str = "frontend/logs"  # 前端日志目录
+    FRONTEND_LOG_FLUSH_INTERVAL_MS: int = 500  # 前端日志批量写入间隔（毫秒）
+    FRONTEND_LOG_FSYNC_INTERVAL_MS: int = 5000  # 前端日志fsync间隔（毫秒）
+    FRONTEND_LOG_MAX_PENDING: int = 50000  # 等待写入的最大行数，超出后丢弃并计数
+    FRONTEND_LOG_BATCH_MAX_SIZE: int = 1000  # 批量日志接口单次请求最多包含的日志条数
+    FRONTEND_LOG_MAX_BODY_SIZE: int = 5 * 1024 * 1024  # NDJSON日志接口请求体（解压后）最大字节数
+    FRONTEND_LOG_FILE_MAX_SIZE: int = 10 * 1024 * 1024  # 前端日志文件最大大小（字节）
+    FRONTEND_LOG_FILE_BACKUP_COUNT: int = 5  # 保留的前端日志文件数量
+    FRONTEND_LOG_DAILY_BACKUP_COUNT: int = 30  # 前端每日日志保留天数
 
     class Config:
         case_sensitive = True
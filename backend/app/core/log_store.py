@@ -0,0 +1,468 @@
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.core.config import settings
+
+
+# 日志级别数值，前端的WARN等同于WARNING
+LEVEL_NUMBERS = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "WARN": 30,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50
+}
+
+
+def level_number(level: Optional[str]) -> int:
+    """日志级别名称转换为数值，未知级别按INFO处理"""
+    return LEVEL_NUMBERS.get(str(level).upper(), 20)
+
+
+def logger_matches(name: str, prefix: str) -> bool:
+    """日志器名称等于prefix或是其子日志器（prefix.xxx）"""
+    return name == prefix or name.startswith(prefix + ".")
+
+
+@dataclass
+class BlockIndex:
+    """
+    稀疏索引项：描述段文件中一段连续记录
+
+    记录该块的字节范围、时间范围、出现过的级别、日志器和来源，
+    查询时不满足条件的块直接跳过，不读取数据
+    """
+    offset: int
+    length: int
+    count: int
+    ts_min: float
+    ts_max: float
+    levels: List[int]
+    loggers: Optional[List[str]]  # None表示日志器过多未记录，查询时不按日志器跳过
+    sources: List[str]
+
+    def matches(
+        self,
+        start: Optional[float],
+        end: Optional[float],
+        min_level: int,
+        logger: Optional[str],
+        source: Optional[str]
+    ) -> bool:
+        """判断块中是否可能存在满足条件的记录"""
+        if start is not None and self.ts_max < start:
+            return False
+        if end is not None and self.ts_min > end:
+            return False
+        if min_level and max(self.levels) < min_level:
+            return False
+        if logger and self.loggers is not None and not any(logger_matches(name, logger) for name in self.loggers):
+            return False
+        if source and source not in self.sources:
+            return False
+        return True
+
+
+@dataclass
+class BlockBuilder:
+    """正在写入的块，达到记录数上限后生成索引项"""
+    offset: int
+    max_loggers: int
+    length: int = 0
+    count: int = 0
+    ts_min: float = float("inf")
+    ts_max: float = float("-inf")
+    levels: Set[int] = field(default_factory=set)
+    loggers: Optional[Set[str]] = field(default_factory=set)
+    sources: Set[str] = field(default_factory=set)
+
+    def add(self, record: Dict[str, Any], nbytes: int):
+        ts = record["ts"]
+        self.length += nbytes
+        self.count += 1
+        self.ts_min = min(self.ts_min, ts)
+        self.ts_max = max(self.ts_max, ts)
+        self.levels.add(level_number(record.get("level")))
+        if self.loggers is not None:
+            self.loggers.add(str(record.get("logger", "")))
+            if len(self.loggers) > self.max_loggers:
+                self.loggers = None
+        self.sources.add(str(record.get("source", "")))
+
+    def build(self) -> BlockIndex:
+        return BlockIndex(
+            offset=self.offset,
+            length=self.length,
+            count=self.count,
+            ts_min=self.ts_min,
+            ts_max=self.ts_max,
+            levels=sorted(self.levels),
+            loggers=sorted(self.loggers) if self.loggers is not None else None,
+            sources=sorted(self.sources)
+        )
+
+
+@dataclass
+class Segment:
+    """
+    一个段：只追加的NDJSON数据文件及其稀疏索引文件
+
+    每个段只由一个写入者（进程）追加，索引中的字节范围只指向该段自己的数据
+    """
+    name: str
+    writer: str
+    data_path: Path
+    index_path: Path
+    blocks: List[BlockIndex] = field(default_factory=list)
+    index_loaded: int = 0  # 已加载的.idx字节数
+
+    @property
+    def indexed_end(self) -> int:
+        """已建索引的数据末尾偏移量"""
+        return self.blocks[-1].offset + self.blocks[-1].length if self.blocks else 0
+
+
+class LogStore:
+    """
+    分段结构化日志存储
+
+    - 每条记录是一行JSON（ts、level、logger、message、source及其他字段），只追加写入
+    - 每个进程写自己的段文件（segment-<创建毫秒>-<写入者>.ndjson），多个worker共用一个目录时互不干扰；
+      进程启动后总是开始新段，段文件超过 segment_max_bytes 后开始新段
+    - 所有写入者的段合计最多保留 max_segments 个，每个写入者最新的段不会被删除
+    - 每 block_records 条记录生成一个稀疏索引项（字节范围、时间范围、级别、日志器、来源），
+      写入段对应的.idx文件；查询时增量加载其他进程新写入的索引
+    - 查询时先用索引跳过不相关的段和块，只对候选块定位读取并按子串过滤；
+      其他进程尚未建索引的尾部（包括异常退出留下的）在查询时扫描，不完整的最后一行被忽略
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        segment_max_bytes: Optional[int] = None,
+        block_records: Optional[int] = None,
+        max_segments: Optional[int] = None,
+        max_loggers_per_block: int = 64
+    ):
+        self.directory = Path(directory or settings.LOG_STORE_DIR)
+        self.segment_max_bytes = segment_max_bytes or settings.LOG_STORE_SEGMENT_MAX_BYTES
+        self.block_records = block_records or settings.LOG_STORE_BLOCK_RECORDS
+        self.max_segments = max_segments or settings.LOG_STORE_MAX_SEGMENTS
+        self.max_loggers_per_block = max_loggers_per_block
+        # 进程号加随机后缀，避免进程号复用时写入旧段
+        self.writer_id = f"{os.getpid()}_{uuid.uuid4().hex[:6]}"
+
+        # 段名 -> 段，段名按创建时间排序
+        self.segments: Dict[str, Segment] = {}
+        self._active: Optional[Segment] = None
+        self._builder: Optional[BlockBuilder] = None
+        self._stream = None
+        self._index_stream = None
+        self._size = 0
+        self._lock = threading.RLock()
+
+    # ---- 段文件管理 ----
+
+    def _segment(self, name: str) -> Segment:
+        return Segment(
+            name=name,
+            writer=name.split("-", 1)[1],
+            data_path=self.directory / f"segment-{name}.ndjson",
+            index_path=self.directory / f"segment-{name}.idx"
+        )
+
+    def _load_index(self, segment: Segment):
+        """增量加载段索引文件中新写入的完整行"""
+        try:
+            with open(segment.index_path, "rb") as f:
+                f.seek(segment.index_loaded)
+                data = f.read()
+        except FileNotFoundError:
+            return
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.splitlines():
+            if line.strip():
+                segment.blocks.append(BlockIndex(**json.loads(line)))
+        segment.index_loaded += len(complete)
+
+    def _refresh(self):
+        """发现目录中的段（包括其他进程的段）并加载其新增索引"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        names = {path.name[len("segment-"):-len(".ndjson")] for path in self.directory.glob("segment-*-*.ndjson")}
+        for name in list(self.segments):
+            if name not in names and self.segments[name] is not self._active:
+                del self.segments[name]
+        for name in sorted(names):
+            segment = self.segments.get(name)
+            if segment is None:
+                segment = self.segments[name] = self._segment(name)
+            if segment is not self._active:
+                self._load_index(segment)
+
+    def _new_segment(self):
+        """为本进程开始一个新段"""
+        created = int(time.time() * 1000)
+        while True:
+            name = f"{created:013d}-{self.writer_id}"
+            if name not in self.segments:
+                break
+            created += 1
+        segment = self._segment(name)
+        self.segments[name] = segment
+        self._active = segment
+        self._stream = open(segment.data_path, "ab")
+        self._index_stream = open(segment.index_path, "a", encoding="utf-8")
+        self._size = 0
+        self._builder = BlockBuilder(offset=0, max_loggers=self.max_loggers_per_block)
+
+    def _ensure_open(self):
+        """首次写入时发现已有的段并开始本进程的新段"""
+        if self._stream is not None:
+            return
+        self._refresh()
+        self._new_segment()
+
+    def _seal_block(self):
+        """把当前块写入索引"""
+        if not self._builder or self._builder.count == 0:
+            return
+        self._stream.flush()
+        block = self._builder.build()
+        line = json.dumps(asdict(block), ensure_ascii=False) + "\n"
+        self._index_stream.write(line)
+        self._index_stream.flush()
+        self._active.blocks.append(block)
+        self._active.index_loaded += len(line.encode("utf-8"))
+        self._builder = BlockBuilder(offset=self._size, max_loggers=self.max_loggers_per_block)
+
+    def _roll(self):
+        """关闭当前段并开始新段，删除超出保留数量的旧段"""
+        self._seal_block()
+        self._stream.close()
+        self._index_stream.close()
+        self._new_segment()
+        self._enforce_retention()
+
+    def _enforce_retention(self):
+        """删除最旧的段，直到段数不超过max_segments；每个写入者最新的段可能仍在写入，不删除"""
+        self._refresh()
+        names = sorted(self.segments)
+        latest = {}
+        for name in names:
+            latest[self.segments[name].writer] = name
+        removable = [name for name in names if name not in latest.values()]
+        excess = len(names) - self.max_segments
+        for name in removable[:max(0, excess)]:
+            old = self.segments.pop(name)
+            old.data_path.unlink(missing_ok=True)
+            old.index_path.unlink(missing_ok=True)
+
+    def _scan_tail(self, segment: Segment) -> Optional[BlockIndex]:
+        """扫描其他进程的段中尚未建索引的完整行，生成临时索引项"""
+        offset = segment.indexed_end
+        try:
+            if segment.data_path.stat().st_size <= offset:
+                return None
+            with open(segment.data_path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return None
+
+        builder = BlockBuilder(offset=offset, max_loggers=self.max_loggers_per_block)
+        for line in data[:data.rfind(b"\n") + 1].splitlines(keepends=True):
+            try:
+                builder.add(json.loads(line), len(line))
+            except (ValueError, KeyError, TypeError):
+                # 无法解析的行不计入索引，但保留其字节范围
+                builder.length += len(line)
+        return builder.build() if builder.count else None
+
+    # ---- 写入 ----
+
+    def append(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        追加记录
+
+        每条记录至少包含ts（时间戳，秒）、level、logger、message
+
+        Returns:
+            int: 写入的记录数
+        """
+        written = 0
+        with self._lock:
+            self._ensure_open()
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+                if self._size and self._size + len(line) > self.segment_max_bytes:
+                    self._roll()
+                self._stream.write(line)
+                self._builder.add(record, len(line))
+                self._size += len(line)
+                written += 1
+                if self._builder.count >= self.block_records:
+                    self._seal_block()
+            # 每次追加后交给操作系统，其他进程查询时可以读到未建索引的尾部
+            self._stream.flush()
+        return written
+
+    def flush(self):
+        """把已写入的数据交给操作系统，当前块保持打开"""
+        with self._lock:
+            if self._stream is not None:
+                self._stream.flush()
+
+    def close(self):
+        """写入当前块的索引并关闭文件，之后再写入时开始新段"""
+        with self._lock:
+            if self._stream is None:
+                return
+            self._seal_block()
+            self._stream.close()
+            self._index_stream.close()
+            self._stream = None
+            self._index_stream = None
+            self._active = None
+
+    # ---- 查询 ----
+
+    def query(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        level: Optional[str] = None,
+        logger: Optional[str] = None,
+        source: Optional[str] = None,
+        q: Optional[str] = None,
+        limit: int = 100
+    ) -> Dict[str, Any]:
+        """
+        按时间范围、最低级别、日志器、来源和消息子串查询日志
+
+        按段的创建顺序和段内写入顺序从新到旧返回最多limit条记录
+
+        Returns:
+            dict: records，truncated（还有更多匹配的记录时为True），以及扫描的段数和块数（用于观察索引效果）
+        """
+        start_ts = start.timestamp() if start else None
+        end_ts = end.timestamp() if end else None
+        min_level = level_number(level) if level else 0
+
+        # 在锁内取得索引快照；本进程当前块的数据先交给操作系统以便读取
+        with self._lock:
+            self._refresh()
+            if self._stream is not None:
+                self._stream.flush()
+            snapshot = []
+            for name in sorted(self.segments):
+                segment = self.segments[name]
+                blocks = list(segment.blocks)
+                if segment is self._active:
+                    if self._builder.count:
+                        blocks.append(self._builder.build())
+                    snapshot.append((segment, blocks, False))
+                else:
+                    snapshot.append((segment, blocks, True))
+
+        # 其他进程未建索引的尾部在锁外扫描
+        snapshot = [
+            (segment.data_path, blocks + [tail] if scan_tail and (tail := self._scan_tail(segment)) else blocks)
+            for segment, blocks, scan_tail in snapshot
+        ]
+
+        # 不需要转义的子串可以直接在原始字节中预筛选
+        needle = None
+        if q and json.dumps(q, ensure_ascii=False)[1:-1] == q:
+            needle = q.encode("utf-8")
+
+        records: List[Dict[str, Any]] = []
+        scanned_segments = 0
+        scanned_blocks = 0
+        # 多取一条用于判断是否还有更多匹配的记录
+        done = False
+
+        for data_path, blocks in reversed(snapshot):
+            candidates = [block for block in blocks if block.matches(start_ts, end_ts, min_level, logger, source)]
+            if not candidates:
+                continue
+            scanned_segments += 1
+            try:
+                f = open(data_path, "rb")
+            except FileNotFoundError:
+                # 查询过程中旧段被删除
+                continue
+            with f:
+                for block in reversed(candidates):
+                    scanned_blocks += 1
+                    f.seek(block.offset)
+                    data = f.read(block.length)
+                    for line in reversed(data.splitlines()):
+                        if needle is not None and needle not in line:
+                            continue
+                        try:
+                            record = json.loads(line)
+                            ts = record["ts"]
+                        except (ValueError, KeyError, TypeError):
+                            continue
+                        if start_ts is not None and ts < start_ts:
+                            continue
+                        if end_ts is not None and ts > end_ts:
+                            continue
+                        if min_level and level_number(record.get("level")) < min_level:
+                            continue
+                        if logger and not logger_matches(str(record.get("logger", "")), logger):
+                            continue
+                        if source and record.get("source") != source:
+                            continue
+                        if q and q not in str(record.get("message", "")):
+                            continue
+
+                        record["timestamp"] = datetime.fromtimestamp(ts).isoformat()
+                        records.append(record)
+                        if len(records) > limit:
+                            done = True
+                            break
+                    if done:
+                        break
+            if done:
+                break
+
+        return {
+            "records": records[:limit],
+            "truncated": len(records) > limit,
+            "scanned_segments": scanned_segments,
+            "scanned_blocks": scanned_blocks,
+            "total_segments": len(snapshot),
+            "total_blocks": sum(len(blocks) for _, blocks in snapshot)
+        }
+
+    def get_info(self) -> Dict[str, Any]:
+        """获取段数、块数和数据大小"""
+        with self._lock:
+            self._refresh()
+            size = 0
+            for segment in self.segments.values():
+                try:
+                    size += segment.data_path.stat().st_size
+                except FileNotFoundError:
+                    pass
+            return {
+                "directory": str(self.directory),
+                "writer": self.writer_id,
+                "segments": len(self.segments),
+                "blocks": sum(len(segment.blocks) for segment in self.segments.values())
+                + (1 if self._builder and self._builder.count else 0),
+                "size": size
+            }
+
+
+# 全局日志存储实例
+log_store = LogStore()
@@ -1,12 +1,15 @@
+import atexit
 import logging
 import logging.config
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from app.core.config import settings
+from app.core.log_store import LogStore, log_store
 
 
 class ColoredFormatter(logging.Formatter):
@@ -38,12 +41,83 @@ class ColoredFormatter(logging.Formatter):
         return formatted
 
 
+class DroppingQueueHandler(QueueHandler):
+    """
+    有界队列日志处理器
+    
+    队列满时丢弃日志而不是阻塞调用方，并按级别统计丢弃数量；
+    队列恢复后补发一条警告说明丢弃了多少条日志。
+    """
+    
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.dropped_by_level: Dict[str, int] = {}
+        self._unreported = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        # handle()已持有处理器锁，计数无需额外加锁
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            self._unreported += 1
+            self.dropped_by_level[record.levelname] = self.dropped_by_level.get(record.levelname, 0) + 1
+            return
+        
+        if self._unreported:
+            notice = logging.makeLogRecord({
+                "name": __name__,
+                "levelno": logging.WARNING,
+                "levelname": "WARNING",
+                "msg": f"日志队列已满，丢弃了 {self._unreported} 条日志",
+            })
+            try:
+                self.queue.put_nowait(notice)
+                self._unreported = 0
+            except queue.Full:
+                pass
+
+
+class LogStoreHandler(logging.Handler):
+    """把日志记录写入结构化日志存储"""
+    
+    def __init__(self, store: LogStore, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.store = store
+    
+    def emit(self, record: logging.LogRecord):
+        try:
+            message = record.getMessage()
+            if record.exc_info and not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            if record.exc_text:
+                message = f"{message}\n{record.exc_text}"
+            self.store.append([{
+                "ts": record.created,
+                "level": record.levelname,
+                "logger": record.name,
+                "message": message,
+                "source": "backend"
+            }])
+        except Exception:
+            self.handleError(record)
+    
+    def close(self):
+        self.store.close()
+        super().close()
+
+
 class LoggerManager:
     """日志管理器"""
     
     def __init__(self):
         self.log_dir = Path("logs")
         self.log_dir.mkdir(exist_ok=True)
+        self.handlers: List[logging.Handler] = []
+        self.error_handler: Optional[logging.Handler] = None
+        self.queue_handler: Optional[DroppingQueueHandler] = None
+        self.listener: Optional[QueueListener] = None
         self._setup_logging()
     
     def _setup_logging(self):
@@ -106,11 +180,28 @@ class LoggerManager:
         daily_handler.setLevel(getattr(logging, log_level))
         daily_handler.setFormatter(file_formatter)
         
-        # 添加处理器到根日志器
-        root_logger.addHandler(console_handler)
-        root_logger.addHandler(file_handler)
-        root_logger.addHandler(error_handler)
-        root_logger.addHandler(daily_handler)
+        self.handlers = [console_handler, file_handler, error_handler, daily_handler]
+        
+        # 结构化日志存储 - 支持按时间、级别、日志器和关键字查询
+        if getattr(settings, 'LOG_STORE_ENABLED', True):
+            store_handler = LogStoreHandler(log_store)
+            store_handler.setLevel(getattr(logging, log_level))
+            self.handlers.append(store_handler)
+        self.error_handler = error_handler
+        
+        if getattr(settings, 'LOG_QUEUE_ENABLED', True):
+            # 根日志器只把记录放入有界队列，由后台线程写控制台和文件，
+            # 请求路径上不再有磁盘写入和滚动检查
+            log_queue = queue.Queue(maxsize=getattr(settings, 'LOG_QUEUE_MAX_SIZE', 10000))
+            self.queue_handler = DroppingQueueHandler(log_queue)
+            self.listener = QueueListener(log_queue, *self.handlers, respect_handler_level=True)
+            self.listener.start()
+            root_logger.addHandler(self.queue_handler)
+            atexit.register(self.shutdown)
+        else:
+            # 添加处理器到根日志器
+            for handler in self.handlers:
+                root_logger.addHandler(handler)
         
         # 设置第三方库的日志级别
         logging.getLogger("uvicorn").setLevel(logging.INFO)
@@ -128,9 +219,28 @@ class LoggerManager:
         root_logger.setLevel(level_obj)
         
         # 更新所有处理器的级别（除了错误处理器）
-        for handler in root_logger.handlers:
-            if not isinstance(handler, type(root_logger.handlers[2])):  # 不是error_handler
+        for handler in self.handlers:
+            if handler is not self.error_handler:
                 handler.setLevel(level_obj)
+    
+    def get_queue_stats(self) -> Dict[str, Any]:
+        """获取日志队列的长度和丢弃统计"""
+        if self.queue_handler is None:
+            return {"enabled": False}
+        log_queue = self.queue_handler.queue
+        return {
+            "enabled": True,
+            "size": log_queue.qsize(),
+            "max_size": log_queue.maxsize,
+            "dropped": self.queue_handler.dropped,
+            "dropped_by_level": dict(self.queue_handler.dropped_by_level)
+        }
+    
+    def shutdown(self):
+        """停止后台写日志线程，写完队列中剩余的日志"""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
 
 
 # 全局日志管理器实例
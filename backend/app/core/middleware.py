@@ -1,9 +1,12 @@
+import random
 import time
-from typing import List, Optional
+from typing import Dict, List, Optional
 from fastapi import Request, HTTPException, status
 from fastapi.security.utils import get_authorization_scheme_param
+from starlette.datastructures import MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from app.core.security import jwt_handler
 from app.core.config import settings
 from app.core.logger import auth_logger, api_logger
@@ -98,51 +101,86 @@ def get_current_user_from_state(request: Request) -> Optional[str]:
     return getattr(request.state, 'current_user', None)
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """
-    请求日志中间件
+    请求日志中间件（纯ASGI实现）
     
-    记录所有API请求的详细信息，包括请求时间、响应时间、状态码等
+    记录所有API请求的详细信息，包括请求时间、响应时间、状态码等，
+    并在响应头中添加 X-Process-Time。
+    
+    不经过BaseHTTPMiddleware，避免每个请求额外创建任务和内存流。
+    exclude_paths 和 sample_rates 按路径前缀匹配，只影响INFO级别的日志，
+    4xx/5xx响应和异常总是记录。
     """
     
-    async def dispatch(self, request: Request, call_next):
+    def __init__(
+        self,
+        app: ASGIApp,
+        exclude_paths: Optional[List[str]] = None,
+        sample_rates: Optional[Dict[str, float]] = None
+    ):
+        self.app = app
+        exclude_paths = settings.REQUEST_LOG_EXCLUDE_PATHS if exclude_paths is None else exclude_paths
+        sample_rates = settings.REQUEST_LOG_SAMPLE_RATES if sample_rates is None else sample_rates
+        self.exclude_prefixes = tuple(exclude_paths)
+        # 前缀越长越优先
+        self.sample_rates = sorted(sample_rates.items(), key=lambda item: len(item[0]), reverse=True)
+    
+    def _should_log_info(self, path: str) -> bool:
+        """判断该请求是否记录INFO级别日志（排除或采样）"""
+        if self.exclude_prefixes and path.startswith(self.exclude_prefixes):
+            return False
+        for prefix, rate in self.sample_rates:
+            if path.startswith(prefix):
+                return random.random() < rate
+        return True
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
         """处理请求并记录日志"""
-        start_time = time.time()
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start_time = time.perf_counter()
         
         # 获取请求信息
-        method = request.method
-        url = str(request.url)
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("User-Agent", "unknown")
+        method = scope["method"]
+        path = scope["path"]
+        query_string = scope.get("query_string")
+        url = f"{path}?{query_string.decode('latin-1')}" if query_string else path
+        log_info = self._should_log_info(path)
         
         # 记录请求开始
-        api_logger.info(f"🚀 {method} {url} - IP: {client_ip}")
+        if log_info:
+            client = scope.get("client")
+            client_ip = client[0] if client else "unknown"
+            api_logger.info(f"🚀 {method} {url} - IP: {client_ip}")
+        
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # 计算处理时间
+                process_time = time.perf_counter() - start_time
+                
+                # 记录响应
+                status_code = message["status"]
+                if status_code < 400:
+                    if log_info:
+                        api_logger.info(f"✅ {method} {url} - {status_code} - {process_time:.3f}s")
+                elif status_code < 500:
+                    api_logger.warning(f"⚠️ {method} {url} - {status_code} - {process_time:.3f}s")
+                else:
+                    api_logger.error(f"❌ {method} {url} - {status_code} - {process_time:.3f}s")
+                
+                # 添加处理时间到响应头
+                MutableHeaders(scope=message).append("X-Process-Time", str(process_time))
+            await send(message)
         
         try:
-            # 处理请求
-            response = await call_next(request)
-            
-            # 计算处理时间
-            process_time = time.time() - start_time
-            
-            # 记录响应
-            status_code = response.status_code
-            if status_code < 400:
-                api_logger.info(f"✅ {method} {url} - {status_code} - {process_time:.3f}s")
-            elif status_code < 500:
-                api_logger.warning(f"⚠️ {method} {url} - {status_code} - {process_time:.3f}s")
-            else:
-                api_logger.error(f"❌ {method} {url} - {status_code} - {process_time:.3f}s")
-            
-            # 添加处理时间到响应头
-            response.headers["X-Process-Time"] = str(process_time)
-            
-            return response
-            
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             # 计算处理时间
-            process_time = time.time() - start_time
+            process_time = time.perf_counter() - start_time
             
             # 记录异常
             api_logger.error(f"💥 {method} {url} - Exception: {str(e)} - {process_time:.3f}s")
-            raise
\ No newline at end of file
+            raise
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+from app.core.security import jwt_handler
+
+T = TypeVar("T")
+
+
+class PasswordHasherBusy(Exception):
+    """等待中的密码哈希任务已达上限"""
+
+
+class PasswordHasher:
+    """
+    在专用的有界线程池中执行bcrypt计算
+    
+    - 线程数限制同时占用的CPU核数，避免登录高峰挤占其他请求
+    - 信号量限制排队和执行中的任务总数，超出时立即拒绝而不是无限排队
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None):
+        self.max_workers = max_workers or settings.PASSWORD_HASH_WORKERS
+        self.max_pending = max_pending or settings.PASSWORD_HASH_MAX_PENDING
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.stats = {"completed": 0, "rejected": 0}
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+            return self._executor
+    
+    async def _run(self, func: Callable[..., T], *args) -> T:
+        if not self._slots.acquire(blocking=False):
+            self.stats["rejected"] += 1
+            raise PasswordHasherBusy("密码验证繁忙，请稍后重试")
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(self._get_executor(), func, *args)
+            self.stats["completed"] += 1
+            return result
+        finally:
+            self._slots.release()
+    
+    async def hash(self, password: str) -> str:
+        """生成密码哈希值"""
+        return await self._run(jwt_handler.get_password_hash, password)
+    
+    async def verify_and_update(self, password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，计算成本变化时同时返回新哈希值
+        
+        Raises:
+            PasswordHasherBusy: 等待中的任务已达上限
+        """
+        return await self._run(jwt_handler.verify_and_update_password, password, hashed_password)
+    
+    def shutdown(self):
+        """关闭线程池（下次使用时重新创建）"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+# 全局实例
+password_hasher = PasswordHasher()
@@ -1,5 +1,5 @@
 from datetime import datetime, timedelta
-from typing import Optional, Union, Any
+from typing import Optional, Tuple, Union, Any
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -12,7 +12,14 @@ class JWTHandler:
         self.secret_key = settings.SECRET_KEY
         self.algorithm = settings.ALGORITHM
         self.access_token_expire_minutes = settings.ACCESS_TOKEN_EXPIRE_MINUTES
-        self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        # 只接受当前配置的计算成本，其他成本的哈希会被needs_update标记为需要重新计算
+        self.pwd_context = CryptContext(
+            schemes=["bcrypt"],
+            deprecated="auto",
+            bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+            bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+        )
 
     def create_access_token(
         self, 
@@ -149,5 +156,14 @@ class JWTHandler:
         """生成密码哈希值"""
         return self.pwd_context.hash(password)
 
+    def verify_and_update_password(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        验证密码，并在哈希的计算成本与当前配置不一致时返回重新计算的哈希
+        
+        Returns:
+            Tuple[bool, Optional[str]]: (是否验证通过, 新哈希值或None)
+        """
+        return self.pwd_context.verify_and_update(plain_password, hashed_password)
+
 
 jwt_handler = JWTHandler()
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.config import settings
+from app.core.logger import websocket_logger
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis为可选依赖，仅在使用Redis广播时需要
+    aioredis = None
+
+
+# 回调参数: (主题, 已编码的消息, 合并键)，主题为None表示广播给所有连接
+MessageHandler = Callable[[Optional[str], str, Optional[str]], Awaitable[None]]
+
+
+class BroadcastBroker(ABC):
+    """
+    跨进程广播代理基类
+
+    WebSocketManager先向本进程的连接投递消息，再通过代理发布；
+    代理把其他进程发布的消息交给on_message，在本进程的连接上投递。
+    publish在心跳/状态推送路径上被调用，实现不应在其中等待网络IO。
+    """
+
+    def __init__(self):
+        # 进程标识，用于忽略自己发布的消息
+        self.origin = uuid.uuid4().hex
+        self.on_message: Optional[MessageHandler] = None
+
+    @abstractmethod
+    async def start(self, on_message: MessageHandler):
+        """开始接收其他进程发布的消息"""
+        self.on_message = on_message
+
+    @abstractmethod
+    async def publish(self, topic: Optional[str], payload: str, key: Optional[str] = None):
+        """发布消息给其他进程"""
+
+    @abstractmethod
+    async def stop(self):
+        """停止接收消息并释放资源"""
+        self.on_message = None
+
+
+class LocalBroker(BroadcastBroker):
+    """
+    进程内广播代理（仅用于测试）
+
+    共享同一个hub的代理互相转发消息，用于在单个进程中模拟多个worker；
+    它无法跨进程转发，因此不能通过WEBSOCKET_BROKER配置启用。
+    """
+
+    def __init__(self, hub: Optional[List["LocalBroker"]] = None):
+        super().__init__()
+        self.hub = hub if hub is not None else []
+
+    async def start(self, on_message: MessageHandler):
+        await super().start(on_message)
+        if self not in self.hub:
+            self.hub.append(self)
+
+    async def publish(self, topic: Optional[str], payload: str, key: Optional[str] = None):
+        for broker in list(self.hub):
+            if broker is not self and broker.on_message is not None:
+                await broker.on_message(topic, payload, key)
+
+    async def stop(self):
+        if self in self.hub:
+            self.hub.remove(self)
+        await super().stop()
+
+
+class RedisBroker(BroadcastBroker):
+    """
+    基于Redis发布/订阅的跨进程广播代理
+
+    publish只把消息放入有界队列，由后台任务发布到Redis，Redis变慢或不可用时
+    不会拖慢本进程的推送；队列满时丢弃新消息并计数。
+    """
+
+    def __init__(self, url: str, channel: str, reconnect_delay: float = 1.0, queue_size: Optional[int] = None):
+        if aioredis is None:
+            raise RuntimeError("使用Redis广播需要安装redis包")
+        super().__init__()
+        self.url = url
+        self.channel = channel
+        self.reconnect_delay = reconnect_delay
+        self._redis = None
+        self._task: Optional[asyncio.Task] = None
+        self._publisher: Optional[asyncio.Task] = None
+        self._queue: asyncio.Queue = asyncio.Queue(
+            maxsize=settings.WEBSOCKET_BROKER_QUEUE_SIZE if queue_size is None else queue_size
+        )
+        self.stats = {"published": 0, "dropped": 0, "errors": 0}
+
+    async def start(self, on_message: MessageHandler):
+        await super().start(on_message)
+        self._redis = aioredis.from_url(self.url)
+        loop = asyncio.get_running_loop()
+        self._task = loop.create_task(self._listen())
+        self._publisher = loop.create_task(self._publish_loop())
+        websocket_logger.info(f"Redis广播代理已启动: {self.channel}")
+
+    async def publish(self, topic: Optional[str], payload: str, key: Optional[str] = None):
+        envelope = json.dumps({
+            "origin": self.origin,
+            "topic": topic,
+            "payload": payload,
+            "key": key
+        }, ensure_ascii=False)
+        try:
+            self._queue.put_nowait(envelope)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+
+    async def _publish_loop(self):
+        """从队列中取出消息发布到Redis"""
+        while True:
+            envelope = await self._queue.get()
+            try:
+                await self._redis.publish(self.channel, envelope)
+                self.stats["published"] += 1
+            except Exception as e:
+                self.stats["errors"] += 1
+                websocket_logger.warning(f"Redis广播发布失败: {e}")
+
+    async def _listen(self):
+        """订阅频道并转发其他进程发布的消息，连接断开后自动重连"""
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    envelope = json.loads(message["data"])
+                    if envelope.get("origin") == self.origin or self.on_message is None:
+                        continue
+                    await self.on_message(envelope.get("topic"), envelope["payload"], envelope.get("key"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                websocket_logger.warning(f"Redis广播订阅中断，{self.reconnect_delay}秒后重连: {e}")
+                await asyncio.sleep(self.reconnect_delay)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def stop(self):
+        for task in (self._task, self._publisher):
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._publisher = None
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+        await super().stop()
+
+
+def create_broker(name: Optional[str] = None) -> Optional[BroadcastBroker]:
+    """根据配置创建广播代理，未配置时返回None（仅在本进程内广播）"""
+    name = (settings.WEBSOCKET_BROKER if name is None else name).lower()
+    if not name:
+        return None
+    if name == "redis":
+        return RedisBroker(settings.REDIS_URL, settings.WEBSOCKET_BROKER_CHANNEL)
+    raise ValueError(f"未知的WebSocket广播代理: {name}")
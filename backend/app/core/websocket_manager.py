@@ -1,10 +1,31 @@
-from typing import Dict, List, Set
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from collections import deque
 import json
 import asyncio
 from fastapi import WebSocket, WebSocketDisconnect
 from datetime import datetime
 from enum import Enum
 
+from app.core.config import settings
+from app.core.logger import websocket_logger
+from app.core.websocket_broker import BroadcastBroker, create_broker
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖，未安装时使用标准库json
+    orjson = None
+
+
+def encode_message(message: dict) -> str:
+    """
+    将消息编码为JSON文本
+    
+    安装了orjson时使用orjson，否则使用标准库json（不转义非ASCII字符）
+    """
+    if orjson is not None:
+        return orjson.dumps(message).decode("utf-8")
+    return json.dumps(message, ensure_ascii=False, separators=(",", ":"))
+
 
 class MessageType(str, Enum):
     """WebSocket消息类型枚举"""
@@ -13,18 +34,118 @@ class MessageType(str, Enum):
     CLIENT_DISCONNECTED = "client_disconnected"
     HEARTBEAT_RECEIVED = "heartbeat_received"
     SYSTEM_MESSAGE = "system_message"
+    CLIENT_STATUS_BATCH = "client_status_batch"
+    HEARTBEAT_BATCH = "heartbeat_batch"
+
+
+class OverflowPolicy(str, Enum):
+    """发送队列溢出策略"""
+    DROP_OLDEST = "drop_oldest"  # 丢弃最早的待发送消息
+    COALESCE = "coalesce"  # 丢弃同一合并键的旧消息，没有则丢弃最早的消息
+    DISCONNECT = "disconnect"  # 断开慢速连接
+
+
+class ConnectionSender:
+    """
+    单个连接的有界发送队列
+    
+    广播只负责入队，由每个连接自己的写任务按顺序发送，慢速连接不会阻塞其他连接和心跳请求。
+    """
+    
+    def __init__(self, websocket: WebSocket, maxsize: int, policy: OverflowPolicy):
+        self.websocket = websocket
+        self.maxsize = maxsize
+        self.policy = policy
+        # (合并键, 负载)
+        self.queue: Deque[Tuple[Optional[str], str]] = deque()
+        self.dropped = 0
+        self._ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def start(self, on_error):
+        """启动写任务，发送失败时调用on_error"""
+        self._task = asyncio.get_running_loop().create_task(self._run(on_error))
+    
+    def stop(self):
+        """停止写任务并丢弃未发送的消息"""
+        self.queue.clear()
+        if self._task and not self._task.done():
+            self._task.cancel()
+    
+    def enqueue(self, payload: str, key: Optional[str] = None) -> bool:
+        """
+        将消息加入发送队列
+        
+        Returns:
+            False表示队列已满且策略为断开连接
+        """
+        if len(self.queue) >= self.maxsize:
+            if self.policy == OverflowPolicy.DISCONNECT:
+                return False
+            self.dropped += 1
+            if self.policy == OverflowPolicy.COALESCE and key is not None:
+                for index, (pending_key, _) in enumerate(self.queue):
+                    if pending_key == key:
+                        del self.queue[index]
+                        break
+                else:
+                    self.queue.popleft()
+            else:
+                self.queue.popleft()
+        
+        self.queue.append((key, payload))
+        self._ready.set()
+        return True
+    
+    async def _run(self, on_error):
+        """按顺序发送队列中的消息"""
+        while True:
+            while not self.queue:
+                self._ready.clear()
+                await self._ready.wait()
+            _, payload = self.queue.popleft()
+            try:
+                await self.websocket.send_text(payload)
+            except Exception:
+                on_error()
+                return
 
 
 class WebSocketManager:
     """WebSocket连接管理器"""
     
-    def __init__(self):
-        # 存储所有活跃的WebSocket连接
-        self.active_connections: List[WebSocket] = []
+    def __init__(
+        self,
+        queue_size: Optional[int] = None,
+        overflow_policy: Optional[str] = None,
+        coalesce_window_ms: Optional[int] = None
+    ):
+        # 每个连接的发送队列长度，0表示直接发送（不使用队列）
+        self.queue_size = settings.WEBSOCKET_SEND_QUEUE_SIZE if queue_size is None else queue_size
+        self.overflow_policy = OverflowPolicy(overflow_policy or settings.WEBSOCKET_OVERFLOW_POLICY)
+        # 状态/心跳消息合并窗口（秒），0表示每条消息立即发送
+        if coalesce_window_ms is None:
+            coalesce_window_ms = settings.WEBSOCKET_COALESCE_WINDOW_MS
+        self.coalesce_window = coalesce_window_ms / 1000
+        # 合并窗口内待发送的状态更新和心跳（按客户端ID，后写覆盖）
+        self._pending_status: Dict[int, dict] = {}
+        self._pending_heartbeats: Dict[int, dict] = {}
+        # 每个客户端最后一次发出的状态，用于过滤未变化的状态
+        self._last_status: Dict[int, str] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        # 连接ID到发送队列的映射
+        self.senders: Dict[str, ConnectionSender] = {}
+        # 跨进程广播代理（多worker部署时使用），None表示只在本进程内广播
+        self.broker: Optional[BroadcastBroker] = None
+        # 存储所有活跃的WebSocket连接（WebSocket到连接ID的映射，按连接顺序）
+        self.active_connections: Dict[WebSocket, str] = {}
         # 存储连接ID到WebSocket的映射
         self.connection_map: Dict[str, WebSocket] = {}
         # 存储每个连接的订阅主题
         self.subscriptions: Dict[str, Set[str]] = {}
+        # 主题到订阅连接ID的反向索引
+        self.topic_subscribers: Dict[str, Set[str]] = {}
     
     async def connect(self, websocket: WebSocket, connection_id: str = None) -> str:
         """
@@ -42,12 +163,15 @@ class WebSocketManager:
         if not connection_id:
             connection_id = f"conn_{len(self.active_connections)}_{datetime.utcnow().timestamp()}"
         
-        self.active_connections.append(websocket)
-        self.connection_map[connection_id] = websocket
-        self.subscriptions[connection_id] = set()
+        self._register(websocket, connection_id)
+        
+        if self.queue_size > 0:
+            sender = ConnectionSender(websocket, self.queue_size, self.overflow_policy)
+            self.senders[connection_id] = sender
+            sender.start(lambda: self.disconnect(connection_id))
         
         # 发送连接成功消息
-        await self._send_to_connection(connection_id, {
+        await self.send_to_connection(connection_id, {
             "type": MessageType.SYSTEM_MESSAGE,
             "message": "WebSocket连接已建立",
             "connection_id": connection_id,
@@ -63,13 +187,68 @@ class WebSocketManager:
         Args:
             connection_id: 连接ID
         """
-        if connection_id in self.connection_map:
-            websocket = self.connection_map[connection_id]
-            if websocket in self.active_connections:
-                self.active_connections.remove(websocket)
-            del self.connection_map[connection_id]
-            if connection_id in self.subscriptions:
-                del self.subscriptions[connection_id]
+        websocket = self.connection_map.pop(connection_id, None)
+        if websocket is not None and self.active_connections.get(websocket) == connection_id:
+            del self.active_connections[websocket]
+        
+        topics = self.subscriptions.pop(connection_id, None)
+        if topics:
+            self._remove_from_index(connection_id, topics)
+        
+        sender = self.senders.pop(connection_id, None)
+        if sender is not None:
+            sender.stop()
+    
+    def _disconnect_slow_consumer(self, connection_id: str, websocket: WebSocket):
+        """断开发送队列溢出的慢速连接"""
+        websocket_logger.warning(f"WebSocket连接 {connection_id} 发送队列已满，断开慢速连接")
+        self.disconnect(connection_id)
+        
+        async def close():
+            try:
+                await websocket.close(code=1013)
+            except Exception:
+                pass
+        
+        asyncio.get_running_loop().create_task(close())
+    
+    async def _deliver(self, connection_id: str, websocket: WebSocket, payload: str, key: Optional[str] = None) -> bool:
+        """
+        向连接投递已编码的消息：有发送队列时只入队，否则直接发送
+        
+        Returns:
+            False表示直接发送失败，需要清理该连接
+        """
+        sender = self.senders.get(connection_id)
+        if sender is not None:
+            if not sender.enqueue(payload, key):
+                self._disconnect_slow_consumer(connection_id, websocket)
+            return True
+        try:
+            await websocket.send_text(payload)
+            return True
+        except Exception:
+            return False
+    
+    def _register(self, websocket: WebSocket, connection_id: str):
+        """登记新连接"""
+        self.active_connections[websocket] = connection_id
+        self.connection_map[connection_id] = websocket
+        self.subscriptions[connection_id] = set()
+    
+    def _add_to_index(self, connection_id: str, topics: List[str]):
+        """将连接加入主题反向索引"""
+        for topic in topics:
+            self.topic_subscribers.setdefault(topic, set()).add(connection_id)
+    
+    def _remove_from_index(self, connection_id: str, topics):
+        """将连接从主题反向索引中移除"""
+        for topic in topics:
+            subscribers = self.topic_subscribers.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection_id)
+                if not subscribers:
+                    del self.topic_subscribers[topic]
     
     async def subscribe(self, connection_id: str, topics: List[str]):
         """
@@ -81,7 +260,8 @@ class WebSocketManager:
         """
         if connection_id in self.subscriptions:
             self.subscriptions[connection_id].update(topics)
-            await self._send_to_connection(connection_id, {
+            self._add_to_index(connection_id, topics)
+            await self.send_to_connection(connection_id, {
                 "type": MessageType.SYSTEM_MESSAGE,
                 "message": f"已订阅主题: {', '.join(topics)}",
                 "subscribed_topics": list(self.subscriptions[connection_id]),
@@ -98,78 +278,148 @@ class WebSocketManager:
         """
         if connection_id in self.subscriptions:
             self.subscriptions[connection_id].difference_update(topics)
-            await self._send_to_connection(connection_id, {
+            self._remove_from_index(connection_id, topics)
+            await self.send_to_connection(connection_id, {
                 "type": MessageType.SYSTEM_MESSAGE,
                 "message": f"已取消订阅主题: {', '.join(topics)}",
                 "subscribed_topics": list(self.subscriptions[connection_id]),
                 "timestamp": datetime.utcnow().isoformat()
             })
     
+    async def start_broker(self, broker: Optional[BroadcastBroker] = None):
+        """
+        启用跨进程广播代理
+        
+        Args:
+            broker: 广播代理，未提供时根据WEBSOCKET_BROKER配置创建
+        """
+        self.broker = broker if broker is not None else create_broker()
+        if self.broker is not None:
+            await self.broker.start(self._on_broker_message)
+    
+    async def stop_broker(self):
+        """停止跨进程广播代理"""
+        if self.broker is not None:
+            await self.broker.stop()
+            self.broker = None
+    
+    async def _on_broker_message(self, topic: Optional[str], payload: str, key: Optional[str] = None):
+        """投递其他进程发布的消息"""
+        if topic is None:
+            await self._fanout_all(payload)
+        else:
+            await self._fanout_topic(topic, payload, key)
+    
     async def broadcast_to_all(self, message: dict):
         """
-        向所有连接广播消息
+        向所有连接广播消息（启用广播代理时同时发布给其他进程）
         
         Args:
             message: 要广播的消息
         """
-        if self.active_connections:
+        if self.active_connections or self.broker is not None:
             message["timestamp"] = datetime.utcnow().isoformat()
-            disconnected = []
-            
-            for connection in self.active_connections:
-                try:
-                    await connection.send_text(json.dumps(message, ensure_ascii=False))
-                except Exception:
-                    disconnected.append(connection)
-            
-            # 清理断开的连接
-            for conn in disconnected:
-                self._cleanup_connection(conn)
-    
-    async def broadcast_to_topic(self, topic: str, message: dict):
+            # 只编码一次，所有连接复用同一负载
+            payload = encode_message(message)
+            await self._fanout_all(payload)
+            if self.broker is not None:
+                await self.broker.publish(None, payload)
+    
+    async def _fanout_all(self, payload: str):
+        """向本进程的所有连接投递已编码的消息"""
+        disconnected = []
+        
+        for connection, connection_id in list(self.active_connections.items()):
+            if not await self._deliver(connection_id, connection, payload):
+                disconnected.append(connection)
+        
+        # 清理断开的连接
+        for conn in disconnected:
+            self._cleanup_connection(conn)
+    
+    async def broadcast_to_topic(self, topic: str, message: dict, coalesce_key: Optional[str] = None):
         """
-        向订阅特定主题的连接广播消息
+        向订阅特定主题的连接广播消息（启用广播代理时同时发布给其他进程）
         
         Args:
             topic: 主题名称
             message: 要广播的消息
+            coalesce_key: 合并键，发送队列溢出且策略为coalesce时替换同键的旧消息
         """
         message["timestamp"] = datetime.utcnow().isoformat()
         message["topic"] = topic
         
+        if not self.topic_subscribers.get(topic) and self.broker is None:
+            return
+        
+        # 只编码一次，所有订阅者复用同一负载
+        payload = encode_message(message)
+        await self._fanout_topic(topic, payload, coalesce_key)
+        if self.broker is not None:
+            await self.broker.publish(topic, payload, coalesce_key)
+    
+    async def _fanout_topic(self, topic: str, payload: str, coalesce_key: Optional[str] = None):
+        """向本进程中订阅了主题的连接投递已编码的消息"""
+        subscribers = self.topic_subscribers.get(topic)
+        if not subscribers:
+            return
+        
         disconnected = []
         
-        for connection_id, topics in self.subscriptions.items():
-            if topic in topics and connection_id in self.connection_map:
-                try:
-                    websocket = self.connection_map[connection_id]
-                    await websocket.send_text(json.dumps(message, ensure_ascii=False))
-                except Exception:
-                    disconnected.append(connection_id)
+        for connection_id in list(subscribers):
+            websocket = self.connection_map.get(connection_id)
+            if websocket is None:
+                continue
+            if not await self._deliver(connection_id, websocket, payload, coalesce_key):
+                disconnected.append(connection_id)
         
         # 清理断开的连接
         for conn_id in disconnected:
             self.disconnect(conn_id)
     
-    async def send_client_status_update(self, client_id: int, status: str, last_heartbeat: datetime = None):
+    async def send_client_status_update(
+        self,
+        client_id: int,
+        status: str,
+        last_heartbeat: datetime = None,
+        name: Optional[str] = None,
+        reason: Optional[str] = None
+    ):
         """
         发送客户端状态更新消息
         
+        启用合并窗口时，更新会在窗口内按客户端合并，并只发出状态实际变化的客户端
+        
         Args:
             client_id: 客户端ID
             status: 客户端状态
             last_heartbeat: 最后心跳时间
+            name: 客户端名称（可选）
+            reason: 状态变化原因（可选）
         """
-        message = {
-            "type": MessageType.CLIENT_STATUS_UPDATE,
+        update = {
             "client_id": client_id,
             "status": status,
             "last_heartbeat": last_heartbeat.isoformat() if last_heartbeat else None,
+        }
+        if name is not None:
+            update["name"] = name
+        if reason is not None:
+            update["reason"] = reason
+        
+        if self.coalesce_window > 0:
+            self._pending_status[client_id] = update
+            self._schedule_flush()
+            return
+        
+        message = {
+            "type": MessageType.CLIENT_STATUS_UPDATE,
+            **update,
             "timestamp": datetime.utcnow().isoformat()
         }
         
         # 广播到订阅了客户端状态更新的连接
-        await self.broadcast_to_topic("client_status", message)
+        await self.broadcast_to_topic("client_status", message, coalesce_key=f"client_status:{client_id}")
     
     async def send_heartbeat_received(self, client_id: int, client_info: dict):
         """
@@ -179,6 +429,15 @@ class WebSocketManager:
             client_id: 客户端ID
             client_info: 客户端信息
         """
+        if self.coalesce_window > 0:
+            self._pending_heartbeats[client_id] = {
+                "client_id": client_id,
+                "client_info": client_info,
+                "received_at": datetime.utcnow().isoformat()
+            }
+            self._schedule_flush()
+            return
+        
         message = {
             "type": MessageType.HEARTBEAT_RECEIVED,
             "client_id": client_id,
@@ -186,9 +445,48 @@ class WebSocketManager:
             "timestamp": datetime.utcnow().isoformat()
         }
         
-        await self.broadcast_to_topic("heartbeat", message)
+        await self.broadcast_to_topic("heartbeat", message, coalesce_key=f"heartbeat:{client_id}")
+    
+    def _schedule_flush(self):
+        """在合并窗口结束时发送合并后的消息"""
+        if self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.coalesce_window, self._start_flush)
+    
+    def _start_flush(self):
+        """合并窗口到期，启动发送任务"""
+        self._flush_handle = None
+        self._flush_task = asyncio.get_running_loop().create_task(self.flush_coalesced())
     
-    async def _send_to_connection(self, connection_id: str, message: dict):
+    async def flush_coalesced(self):
+        """
+        发送合并窗口内累积的更新
+        
+        - client_status主题：一帧包含所有状态发生变化的客户端
+        - heartbeat主题：一帧包含窗口内每个客户端的最新心跳
+        """
+        statuses, self._pending_status = self._pending_status, {}
+        heartbeats, self._pending_heartbeats = self._pending_heartbeats, {}
+        
+        changed = []
+        for client_id, update in statuses.items():
+            if self._last_status.get(client_id) != update["status"]:
+                self._last_status[client_id] = update["status"]
+                changed.append(update)
+        
+        if changed:
+            await self.broadcast_to_topic("client_status", {
+                "type": MessageType.CLIENT_STATUS_BATCH,
+                "clients": changed
+            })
+        
+        if heartbeats:
+            await self.broadcast_to_topic("heartbeat", {
+                "type": MessageType.HEARTBEAT_BATCH,
+                "heartbeats": list(heartbeats.values())
+            })
+    
+    async def send_to_connection(self, connection_id: str, message: dict):
         """
         向特定连接发送消息
         
@@ -196,11 +494,9 @@ class WebSocketManager:
             connection_id: 连接ID
             message: 要发送的消息
         """
-        if connection_id in self.connection_map:
-            try:
-                websocket = self.connection_map[connection_id]
-                await websocket.send_text(json.dumps(message, ensure_ascii=False))
-            except Exception:
+        websocket = self.connection_map.get(connection_id)
+        if websocket is not None:
+            if not await self._deliver(connection_id, websocket, encode_message(message)):
                 self.disconnect(connection_id)
     
     def _cleanup_connection(self, websocket: WebSocket):
@@ -210,19 +506,9 @@ class WebSocketManager:
         Args:
             websocket: 要清理的WebSocket连接
         """
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        
-        # 从映射中移除
-        to_remove = []
-        for conn_id, ws in self.connection_map.items():
-            if ws == websocket:
-                to_remove.append(conn_id)
-        
-        for conn_id in to_remove:
-            del self.connection_map[conn_id]
-            if conn_id in self.subscriptions:
-                del self.subscriptions[conn_id]
+        connection_id = self.active_connections.pop(websocket, None)
+        if connection_id is not None:
+            self.disconnect(connection_id)
     
     def get_connection_count(self) -> int:
         """获取当前连接数"""
@@ -237,6 +523,14 @@ class WebSocketManager:
             "subscriptions": {
                 conn_id: list(topics) 
                 for conn_id, topics in self.subscriptions.items()
+            },
+            "topic_subscribers": {
+                topic: len(conn_ids)
+                for topic, conn_ids in self.topic_subscribers.items()
+            },
+            "send_queues": {
+                conn_id: {"queued": len(sender.queue), "dropped": sender.dropped}
+                for conn_id, sender in self.senders.items()
             }
         }
     
@@ -244,15 +538,14 @@ class WebSocketManager:
     def connect_sync(self, websocket) -> str:
         """同步版本的连接方法，用于测试"""
         connection_id = f"test_conn_{len(self.active_connections)}_{datetime.utcnow().timestamp()}"
-        self.active_connections.append(websocket)
-        self.connection_map[connection_id] = websocket
-        self.subscriptions[connection_id] = set()
+        self._register(websocket, connection_id)
         return connection_id
     
     def subscribe_sync(self, connection_id: str, topics: List[str]):
         """同步版本的订阅方法，用于测试"""
         if connection_id in self.subscriptions:
             self.subscriptions[connection_id].update(topics)
+            self._add_to_index(connection_id, topics)
     
     @property
     def _connections(self):
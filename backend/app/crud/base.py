@@ -1,6 +1,12 @@
-from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
+import base64
+import json
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Generic, Iterator, List, Optional, Sequence, Tuple, Type, TypeVar, Union
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import Row, inspect, literal, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.base import Base
 
@@ -9,6 +15,58 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+@lru_cache(maxsize=None)
+def get_attribute_names(model: Type[Base]) -> FrozenSet[str]:
+    """模型所有映射属性名（列和关系），按模型缓存"""
+    return frozenset(inspect(model).attrs.keys())
+
+
+@lru_cache(maxsize=None)
+def get_column_names(model: Type[Base]) -> FrozenSet[str]:
+    """模型所有列属性名，按模型缓存"""
+    return frozenset(inspect(model).column_attrs.keys())
+
+
+class InvalidCursorError(ValueError):
+    """分页游标无法解析或与排序方式不匹配"""
+
+
+def encode_cursor(order: str, values: Sequence[Any]) -> str:
+    """将排序方式和最后一行的排序键编码为不透明游标"""
+    payload = {
+        "o": order,
+        "v": [v.isoformat() if isinstance(v, (date, datetime)) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str, columns: Sequence[Any]) -> List[Any]:
+    """解析游标，返回按列类型还原的排序键值"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError("无效的分页游标") from e
+    if payload.get("o") != order or not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursorError("分页游标与当前排序方式不匹配")
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None:
+            python_type = column.type.python_type
+            try:
+                if python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif python_type is date:
+                    value = date.fromisoformat(value)
+            except (TypeError, ValueError) as e:
+                raise InvalidCursorError("无效的分页游标") from e
+        decoded.append(value)
+    return decoded
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     """基础CRUD操作类"""
     
@@ -32,6 +90,69 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         """获取多个对象，支持分页"""
         return db.query(self.model).offset(skip).limit(limit).all()
 
+    def get_page(
+        self,
+        db: Session,
+        *,
+        cursor: Optional[str] = None,
+        limit: int = 100,
+        order_by: Sequence[str] = ("created_at", "id"),
+        descending: bool = True,
+        filters: Sequence[Any] = ()
+    ) -> Tuple[List[ModelType], Optional[str]]:
+        """
+        基于游标（keyset）的分页查询
+        
+        按order_by排序（自动追加id保证顺序稳定，排序列不能为空），用上一页最后一行的排序键作为条件
+        WHERE (keys) < (:last_keys) 继续查询，每页开销与翻页深度无关。
+        
+        Returns:
+            (本页对象, 下一页游标)，没有更多数据时游标为None
+        """
+        keys = list(order_by)
+        if "id" not in keys:
+            keys.append("id")
+        columns = [getattr(self.model, key) for key in keys]
+        order = ",".join(keys) + (":desc" if descending else ":asc")
+
+        query = db.query(self.model).filter(*filters)
+        if cursor:
+            last_values = decode_cursor(cursor, order, columns)
+            position = tuple_(*columns)
+            last_position = tuple_(*[literal(v, c.type) for c, v in zip(columns, last_values)])
+            query = query.filter(position < last_position if descending else position > last_position)
+        query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+
+        items = query.limit(limit + 1).all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(order, [getattr(items[-1], key) for key in keys])
+        return items, next_cursor
+
+    def iter_rows(
+        self,
+        db: Session,
+        *,
+        filters: Sequence[Any] = (),
+        order_by: Sequence[str] = ("id",),
+        batch_size: int = 1000
+    ) -> Iterator[Row]:
+        """
+        流式遍历所有列（用于导出）
+        
+        使用yield_per分批从数据库游标读取，不构造ORM对象，内存占用与总行数无关。
+        返回的行可按列名访问，列顺序同模型表定义。
+        """
+        table = self.model.__table__
+        stmt = (
+            select(*table.columns)
+            .where(*filters)
+            .order_by(*[table.c[key] for key in order_by])
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.execute(stmt)
+
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """创建新对象"""
         obj_in_data = jsonable_encoder(obj_in)
@@ -49,14 +170,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj_in: Union[UpdateSchemaType, Dict[str, Any]]
     ) -> ModelType:
         """更新对象"""
-        obj_data = jsonable_encoder(db_obj)
-        if isinstance(obj_in, dict):
-            update_data = obj_in
-        else:
-            update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        self._apply_update(db_obj, obj_in)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
@@ -67,4 +181,126 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         obj = db.query(self.model).get(id)
         db.delete(obj)
         db.commit()
-        return obj
\ No newline at end of file
+        return obj
+
+    def update_fields(
+        self,
+        db: Session,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        returning: bool = True,
+        commit: bool = True
+    ) -> Optional[ModelType]:
+        """
+        按ID直接更新指定列（轻量更新）
+        
+        只对obj_in中属于模型列的字段发出一条UPDATE，不先加载对象、不序列化整行。
+        returning为True时通过RETURNING取回更新后的对象（数据库不支持时退化为一次查询），
+        对象不存在时返回None；returning为False时不取回，返回None。
+        commit为False时不提交，便于调用方合并多个更新后一次提交。
+        注意：会话配置expire_on_commit=True时，提交后访问返回对象的属性会重新加载。
+        """
+        stmt = self._update_statement(id, obj_in)
+        if returning and db.get_bind().dialect.update_returning:
+            db_obj = db.scalars(
+                stmt.returning(self.model), execution_options={"populate_existing": True}
+            ).first()
+        else:
+            db.execute(stmt)
+            db_obj = db.get(self.model, id, populate_existing=True) if returning else None
+        if commit:
+            db.commit()
+        return db_obj
+
+    def _update_data(self, obj_in: Union[UpdateSchemaType, Dict[str, Any]]) -> Dict[str, Any]:
+        """提取更新数据（schema只取显式设置的字段）"""
+        if isinstance(obj_in, dict):
+            return obj_in
+        return obj_in.model_dump(exclude_unset=True)
+
+    def _apply_update(
+        self, db_obj: ModelType, obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> None:
+        """将更新数据写入对象属性"""
+        attribute_names = get_attribute_names(self.model)
+        for field, value in self._update_data(obj_in).items():
+            if field in attribute_names:
+                setattr(db_obj, field, value)
+
+    def _update_statement(self, id: Any, obj_in: Union[UpdateSchemaType, Dict[str, Any]]):
+        """只包含模型列的UPDATE语句"""
+        column_names = get_column_names(self.model)
+        values = {k: v for k, v in self._update_data(obj_in).items() if k in column_names and k != "id"}
+        return (
+            update(self.model)
+            .where(self.model.id == id)
+            .values(**values)
+            .execution_options(synchronize_session=False)
+        )
+
+    # 异步版本（AsyncSession），供高频接口使用，数据库调用不阻塞事件循环
+
+    async def get_async(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """根据ID获取单个对象（异步）"""
+        return await db.get(self.model, id)
+
+    async def get_multi_async(
+        self, db: AsyncSession, *, skip: int = 0, limit: int = 100
+    ) -> List[ModelType]:
+        """获取多个对象，支持分页（异步）"""
+        result = await db.execute(select(self.model).offset(skip).limit(limit))
+        return list(result.scalars().all())
+
+    async def create_async(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """创建新对象（异步）"""
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update_async(
+        self,
+        db: AsyncSession,
+        *,
+        db_obj: ModelType,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """更新对象（异步）"""
+        self._apply_update(db_obj, obj_in)
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove_async(self, db: AsyncSession, *, id: int) -> Optional[ModelType]:
+        """删除对象（异步）"""
+        obj = await db.get(self.model, id)
+        if obj is not None:
+            await db.delete(obj)
+            await db.commit()
+        return obj
+
+    async def update_fields_async(
+        self,
+        db: AsyncSession,
+        *,
+        id: Any,
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        returning: bool = True,
+        commit: bool = True
+    ) -> Optional[ModelType]:
+        """按ID直接更新指定列（轻量更新，异步），语义同 update_fields"""
+        stmt = self._update_statement(id, obj_in)
+        if returning and db.get_bind().dialect.update_returning:
+            db_obj = (await db.scalars(
+                stmt.returning(self.model), execution_options={"populate_existing": True}
+            )).first()
+        else:
+            await db.execute(stmt)
+            db_obj = await db.get(self.model, id, populate_existing=True) if returning else None
+        if commit:
+            await db.commit()
+        return db_obj
@@ -1,4 +1,6 @@
 from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
 from app.models.admin import Admin
@@ -27,6 +29,34 @@ class CRUDAdmin(CRUDBase[Admin, AdminCreate, AdminUpdate]):
             return None
         return admin
     
+    async def get_by_username_async(self, db: AsyncSession, *, username: str) -> Optional[Admin]:
+        """根据用户名获取管理员（异步）"""
+        result = await db.execute(select(Admin).where(Admin.username == username))
+        return result.scalars().first()
+    
+    async def authenticate_async(self, db: AsyncSession, *, username: str, password: str) -> Optional[Admin]:
+        """
+        验证管理员账号密码（异步）
+        
+        bcrypt计算在专用线程池中执行；密码哈希的计算成本与当前配置不一致时，
+        验证通过后用新成本重新计算并保存。
+        
+        Raises:
+            PasswordHasherBusy: 密码验证任务过多
+        """
+        from app.core.password_hasher import password_hasher
+        
+        admin = await self.get_by_username_async(db, username=username)
+        if not admin:
+            return None
+        valid, new_hash = await password_hasher.verify_and_update(password, admin.password_hash)
+        if not valid:
+            return None
+        if new_hash:
+            admin.password_hash = new_hash
+            await db.commit()
+        return admin
+    
     def create_with_password(self, db: Session, *, obj_in: AdminCreate) -> Admin:
         """创建管理员（加密密码）"""
         from app.core.security import jwt_handler
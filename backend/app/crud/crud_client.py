@@ -1,6 +1,8 @@
-from typing import List, Optional
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import bindparam, desc, func, select, update
 from app.crud.base import CRUDBase
 from app.models.client import Client
 from app.schemas.client import ClientCreate, ClientUpdate
@@ -13,6 +15,19 @@ class CRUDClient(CRUDBase[Client, ClientCreate, ClientUpdate]):
         """根据IP地址获取客户端"""
         return db.query(Client).filter(Client.ip_address == ip_address).first()
     
+    def get_multi_by_ids(self, db: Session, *, ids: List[int]) -> List[Client]:
+        """根据ID列表批量获取客户端"""
+        if not ids:
+            return []
+        return db.query(Client).filter(Client.id.in_(ids)).all()
+    
+    async def get_multi_by_ids_async(self, db: AsyncSession, *, ids: List[int]) -> List[Client]:
+        """根据ID列表批量获取客户端（异步）"""
+        if not ids:
+            return []
+        result = await db.execute(select(Client).where(Client.id.in_(ids)))
+        return list(result.scalars().all())
+    
     def get_by_status(self, db: Session, *, status: str) -> List[Client]:
         """根据状态获取客户端列表"""
         return db.query(Client).filter(Client.status == status).all()
@@ -21,6 +36,19 @@ class CRUDClient(CRUDBase[Client, ClientCreate, ClientUpdate]):
         """获取在线客户端列表"""
         return self.get_by_status(db, status="online")
     
+    def get_online_heartbeats(self, db: Session) -> List[Any]:
+        """
+        获取所有在线客户端的最后心跳时间
+        
+        只查询 (id, last_heartbeat) 两列，可由 (status, last_heartbeat) 索引直接覆盖
+        
+        Returns:
+            在线客户端行 (id, last_heartbeat)
+        """
+        return db.execute(
+            select(Client.id, Client.last_heartbeat).where(Client.status == "online")
+        ).all()
+    
     def get_recent_heartbeat(self, db: Session, *, limit: int = 10) -> List[Client]:
         """获取最近心跳的客户端"""
         return (
@@ -33,8 +61,6 @@ class CRUDClient(CRUDBase[Client, ClientCreate, ClientUpdate]):
     
     def update_heartbeat(self, db: Session, *, client_id: int) -> Optional[Client]:
         """更新客户端心跳时间"""
-        from datetime import datetime
-        
         client = self.get(db, client_id)
         if client:
             client.last_heartbeat = datetime.utcnow()
@@ -43,6 +69,100 @@ class CRUDClient(CRUDBase[Client, ClientCreate, ClientUpdate]):
             db.commit()
             db.refresh(client)
         return client
-
+    
+    def mark_offline(
+        self, db: Session, *, threshold: datetime, client_ids: Optional[List[int]] = None
+    ) -> List[Any]:
+        """
+        将心跳超时的在线客户端批量标记为离线
+        
+        只更新仍为online且最后心跳早于threshold的客户端，使用单条UPDATE语句：
+        UPDATE clients SET status='offline' WHERE status='online' AND last_heartbeat < :threshold
+        传入client_ids时仅限这些客户端，否则一次更新所有超时客户端。
+        
+        Returns:
+            被标记为离线的客户端行 (id, name, last_heartbeat)
+        """
+        if client_ids is not None and not client_ids:
+            return []
+        
+        conditions = [
+            Client.status == "online",
+            Client.last_heartbeat < threshold,
+        ]
+        if client_ids is not None:
+            conditions.append(Client.id.in_(client_ids))
+        
+        stmt = (
+            update(Client)
+            .where(*conditions)
+            .values(status="offline")
+            .execution_options(synchronize_session=False)
+        )
+        
+        if db.get_bind().dialect.update_returning:
+            rows = db.execute(stmt.returning(Client.id, Client.name, Client.last_heartbeat)).all()
+        else:
+            rows = db.query(Client.id, Client.name, Client.last_heartbeat).filter(*conditions).all()
+            db.execute(stmt)
+        db.commit()
+        return rows
+    
+    def bulk_update_heartbeats(self, db: Session, *, heartbeats: List[Dict[str, Any]]) -> int:
+        """
+        批量更新客户端心跳信息
+        
+        所有心跳通过一条参数化UPDATE语句（executemany）写入并只提交一次。
+        每项需包含 id、status、last_heartbeat，version 和 ip_address 为空时保留原值。
+        
+        Returns:
+            受影响的行数
+        """
+        if not heartbeats:
+            return 0
+        
+        result = db.execute(self._heartbeat_update_statement(), self._heartbeat_update_params(heartbeats))
+        db.commit()
+        return result.rowcount
+    
+    async def bulk_update_heartbeats_async(
+        self, db: AsyncSession, *, heartbeats: List[Dict[str, Any]]
+    ) -> int:
+        """批量更新客户端心跳信息（异步），语义同 bulk_update_heartbeats"""
+        if not heartbeats:
+            return 0
+        
+        result = await db.execute(self._heartbeat_update_statement(), self._heartbeat_update_params(heartbeats))
+        await db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    def _heartbeat_update_statement():
+        """按ID更新心跳的参数化UPDATE语句，version和ip_address为空时保留原值"""
+        table = Client.__table__
+        return (
+            update(table)
+            .where(table.c.id == bindparam("_id"))
+            .values(
+                status=bindparam("_status"),
+                last_heartbeat=bindparam("_last_heartbeat"),
+                version=func.coalesce(bindparam("_version", type_=table.c.version.type), table.c.version),
+                ip_address=func.coalesce(bindparam("_ip_address", type_=table.c.ip_address.type), table.c.ip_address),
+            )
+        )
+    
+    @staticmethod
+    def _heartbeat_update_params(heartbeats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """将心跳列表转换为executemany参数"""
+        return [
+            {
+                "_id": item["id"],
+                "_status": item["status"],
+                "_last_heartbeat": item["last_heartbeat"],
+                "_version": item.get("version"),
+                "_ip_address": item.get("ip_address"),
+            }
+            for item in heartbeats
+        ]
 
 client = CRUDClient(Client)
\ No newline at end of file
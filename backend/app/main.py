@@ -1,10 +1,18 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.api_v1.api import api_router
+from app.core.auth_cache import auth_cache
 from app.core.config import settings
+from app.core.database import async_engine
+from app.core.password_hasher import password_hasher
 from app.core.middleware import JWTAuthMiddleware, RequestLoggingMiddleware
 from app.core.logger import app_logger
-# from app.services.monitoring import monitoring_service  # Temporarily disabled until APScheduler is installed
+from app.core.websocket_manager import websocket_manager
+from app.services.frontend_log_writer import frontend_log_writer
+from app.services.heartbeat_buffer import heartbeat_buffer
+from app.services.liveness_registry import liveness_registry
+from app.services.monitoring import monitoring_service
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -38,8 +46,28 @@ async def startup_event():
     """应用启动时的事件处理"""
     app_logger.info(f"🚀 {settings.PROJECT_NAME} v{settings.VERSION} 正在启动...")
     
+    # 清空认证缓存
+    auth_cache.clear()
+    
+    # 加载客户端存活状态到内存
+    liveness_registry.clear()
+    try:
+        loop = asyncio.get_running_loop()
+        loaded = await loop.run_in_executor(None, liveness_registry.load)
+        app_logger.info(f"已加载 {loaded} 个客户端存活状态")
+    except Exception as e:
+        app_logger.warning(f"加载客户端存活状态失败，将按需从数据库加载: {e}")
+    
+    # 启动WebSocket跨worker广播代理
+    if settings.WEBSOCKET_BROKER:
+        await websocket_manager.start_broker()
+    
+    # 启动心跳写缓冲
+    if settings.HEARTBEAT_BUFFER_ENABLED:
+        heartbeat_buffer.start()
+    
     # 启动客户端监控服务
-    # monitoring_service.start()  # Temporarily disabled until APScheduler is installed
+    monitoring_service.start()
     
     app_logger.info("✅ 应用启动完成")
 
@@ -49,8 +77,24 @@ async def shutdown_event():
     """应用关闭时的事件处理"""
     app_logger.info("🛑 应用正在关闭...")
     
+    # 停止心跳写缓冲并刷新剩余心跳
+    if settings.HEARTBEAT_BUFFER_ENABLED:
+        await heartbeat_buffer.stop()
+    
     # 停止客户端监控服务
-    # monitoring_service.stop()  # Temporarily disabled until APScheduler is installed
+    monitoring_service.stop()
+    
+    # 写出剩余的前端日志并关闭文件
+    await asyncio.get_running_loop().run_in_executor(None, frontend_log_writer.stop)
+    
+    # 停止WebSocket跨worker广播代理
+    await websocket_manager.stop_broker()
+    
+    # 关闭密码哈希线程池
+    password_hasher.shutdown()
+    
+    # 关闭异步数据库连接池
+    await async_engine.dispose()
     
     app_logger.info("✅ 应用关闭完成")
 
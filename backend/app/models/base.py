@@ -1,15 +1,23 @@
+from datetime import datetime
+
 from sqlalchemy import Column, Integer, DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.sql import func
 
 Base = declarative_base()
 
 
 class TimestampMixin:
-    """Mixin for adding created_at and updated_at timestamps to models"""
+    """
+    Mixin for adding created_at and updated_at timestamps to models
+
+    Timestamps are generated in Python (UTC, like CURRENT_TIMESTAMP) rather than
+    by the database: SQLite's CURRENT_TIMESTAMP has one-second resolution and is
+    stored without fractional seconds, while bound datetimes are stored with
+    microseconds, so keyset cursors compared the two text formats incorrectly.
+    """
     
-    created_at = Column(DateTime, default=func.now(), nullable=False)
-    updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
 class BaseModel(Base, TimestampMixin):
@@ -17,4 +25,4 @@ class BaseModel(Base, TimestampMixin):
     
     __abstract__ = True
     
-    id = Column(Integer, primary_key=True, index=True)
\ No newline at end of file
+    id = Column(Integer, primary_key=True, index=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, DateTime
+from sqlalchemy import Column, String, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -7,6 +7,19 @@ class Client(BaseModel):
     """客户端模型 - 管理连接到系统的RPA客户端信息"""
     
     __tablename__ = "clients"
+    __table_args__ = (
+        # 按状态查询，以及超时扫描 status='online' AND last_heartbeat < ?
+        Index("ix_clients_status_last_heartbeat", "status", "last_heartbeat"),
+        # 按最后心跳排序（只索引有心跳的客户端）
+        Index(
+            "ix_clients_last_heartbeat",
+            "last_heartbeat",
+            sqlite_where=text("last_heartbeat IS NOT NULL"),
+            postgresql_where=text("last_heartbeat IS NOT NULL"),
+        ),
+        # 游标分页（按创建时间倒序翻页）
+        Index("ix_clients_created_at_id", "created_at", "id"),
+    )
     
     name = Column(String(100), nullable=False, comment="客户端名称")
     ip_address = Column(String(45), nullable=False, comment="客户端IP地址")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import Column, String, Integer, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -7,6 +7,12 @@ class UpgradePackage(BaseModel):
     """升级包模型 - 管理系统升级包文件和版本信息"""
     
     __tablename__ = "upgrade_packages"
+    __table_args__ = (
+        # 按名称查询及每个名称的最新升级包
+        Index("ix_upgrade_packages_name_created_at", "name", "created_at"),
+        # 游标分页（按创建时间倒序翻页）
+        Index("ix_upgrade_packages_created_at_id", "created_at", "id"),
+    )
     
     name = Column(String(100), nullable=False, comment="升级包名称")
     version = Column(String(20), nullable=False, comment="升级包版本号")
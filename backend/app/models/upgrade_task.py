@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
@@ -7,6 +7,14 @@ class UpgradeTask(BaseModel):
     """升级任务模型 - 管理客户端升级任务的状态和进度"""
     
     __tablename__ = "upgrade_tasks"
+    __table_args__ = (
+        # 客户端的任务列表和当前活跃任务
+        Index("ix_upgrade_tasks_client_id_status_created_at", "client_id", "status", "created_at"),
+        # 按状态查询并按创建时间排序
+        Index("ix_upgrade_tasks_status_created_at", "status", "created_at"),
+        # 游标分页（按创建时间倒序翻页）
+        Index("ix_upgrade_tasks_created_at_id", "created_at", "id"),
+    )
     
     client_id = Column(Integer, ForeignKey("clients.id"), nullable=False, comment="关联的客户端ID")
     package_id = Column(Integer, ForeignKey("upgrade_packages.id"), nullable=False, comment="关联的升级包ID")
@@ -3,10 +3,12 @@ from .admin import Admin, AdminCreate, AdminUpdate
 from .client import Client, ClientCreate, ClientUpdate
 from .upgrade_package import UpgradePackage, UpgradePackageCreate, UpgradePackageUpdate
 from .upgrade_task import UpgradeTask, UpgradeTaskCreate, UpgradeTaskUpdate
+from .pagination import CursorPage
 
 __all__ = [
     "Admin", "AdminCreate", "AdminUpdate",
     "Client", "ClientCreate", "ClientUpdate", 
     "UpgradePackage", "UpgradePackageCreate", "UpgradePackageUpdate",
-    "UpgradeTask", "UpgradeTaskCreate", "UpgradeTaskUpdate"
+    "UpgradeTask", "UpgradeTaskCreate", "UpgradeTaskUpdate",
+    "CursorPage"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -17,4 +17,26 @@ class HeartbeatResponse(BaseModel):
     success: bool
     message: str
     timestamp: datetime
-    client_status: Optional[str] = None
\ No newline at end of file
+    client_status: Optional[str] = None
+
+
+class HeartbeatBatchRequest(BaseModel):
+    """批量心跳请求schema（边缘网关代理多个客户端上报）"""
+    heartbeats: List[HeartbeatRequest] = Field(..., description="心跳列表")
+
+
+class HeartbeatBatchItemResult(BaseModel):
+    """批量心跳中单个心跳的处理结果"""
+    client_id: int
+    success: bool
+    message: str
+    client_status: Optional[str] = None
+
+
+class HeartbeatBatchResponse(BaseModel):
+    """批量心跳响应schema"""
+    success: bool
+    timestamp: datetime
+    accepted: int
+    rejected: int
+    results: List[HeartbeatBatchItemResult]
@@ -0,0 +1,11 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel
+
+ItemType = TypeVar("ItemType")
+
+
+class CursorPage(BaseModel, Generic[ItemType]):
+    """游标分页响应schema"""
+    items: List[ItemType]
+    next_cursor: Optional[str] = None
+    has_more: bool = False
@@ -1,3 +1,5 @@
 from .monitoring import monitoring_service
+from .heartbeat_buffer import heartbeat_buffer
+from .liveness_registry import liveness_registry
 
-__all__ = ["monitoring_service"]
\ No newline at end of file
+__all__ = ["monitoring_service", "heartbeat_buffer", "liveness_registry"]
\ No newline at end of file
@@ -0,0 +1,89 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core import database
+from app.crud.base import CRUDBase
+
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(rows: Iterable[Any], columns: Sequence[str], chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """Serialize rows as newline-delimited JSON, yielding chunks of about chunk_size bytes"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    buffer = []
+    size = 0
+    for row in rows:
+        line = json.dumps(
+            dict(zip(columns, row)), ensure_ascii=False, separators=(",", ":"), default=_json_default
+        ).encode("utf-8") + b"\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def iter_csv(rows: Iterable[Any], columns: Sequence[str], chunk_size: Optional[int] = None) -> Iterator[bytes]:
+    """Serialize rows as CSV with a header row, yielding chunks of about chunk_size bytes"""
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM so that spreadsheet applications detect UTF-8
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def stream_export(
+    crud: CRUDBase,
+    *,
+    fmt: str,
+    filters: Sequence[Any] = (),
+    session_factory: Optional[Callable[[], Session]] = None
+) -> Iterator[bytes]:
+    """
+    Stream every row of a model as NDJSON or CSV.
+
+    The generator owns its session, so it stays valid for the whole response
+    body regardless of when request dependencies are torn down. Rows are read
+    in batches with yield_per and never materialized as ORM objects.
+    """
+    serializer = iter_csv if fmt == "csv" else iter_ndjson
+    columns = [column.key for column in crud.model.__table__.columns]
+    db = (session_factory or database.SessionLocal)()
+    try:
+        rows = crud.iter_rows(db, filters=filters, batch_size=settings.EXPORT_BATCH_SIZE)
+        yield from serializer(rows, columns)
+    finally:
+        db.close()
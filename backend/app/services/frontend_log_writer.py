@@ -0,0 +1,269 @@
+import logging
+import os
+import threading
+import time
+from logging.handlers import RotatingFileHandler, TimedRotatingFileHandler
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.log_store import LogStore, log_store
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class LogFile:
+    """
+    批量写入的日志文件（与标准库文件处理器组合使用的混入类）
+
+    滚动判断与滚动本身（shouldRollover/doRollover）沿用标准库处理器的实现，
+    这里只负责保持文件句柄常开、使用较大的写缓冲，并按批写入而不是逐行flush
+    """
+
+    def __init__(self, path: Path, *args, buffer_size: int = 64 * 1024, **kwargs):
+        self.buffer_size = buffer_size
+        self.size = 0
+        # 复用同一条记录对象传给shouldRollover，避免每行创建LogRecord
+        self._record = logging.LogRecord("frontend", logging.INFO, "", 0, "", None, None)
+        super().__init__(str(path), *args, encoding="utf-8", delay=True, **kwargs)
+
+    @property
+    def path(self) -> Path:
+        return Path(self.baseFilename)
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        stream = open(self.baseFilename, self.mode, buffering=self.buffer_size, encoding=self.encoding, errors=self.errors)
+        self.size = stream.tell()
+        return stream
+
+    def write_lines(self, lines: Iterable[str]):
+        """追加写入多行（不含换行符），需要滚动时先滚动再写入"""
+        record = self._record
+        for line in lines:
+            record.msg = line
+            if self.shouldRollover(record):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(line)
+            self.stream.write("\n")
+            self.size += len(line.encode("utf-8")) + 1
+
+    def fsync(self):
+        """刷新缓冲并强制落盘"""
+        if self.stream is not None:
+            self.stream.flush()
+            os.fsync(self.stream.fileno())
+
+
+class SizeRotatingLogFile(LogFile, RotatingFileHandler):
+    """超过max_bytes时滚动为path.1 ... path.N"""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int, **kwargs):
+        super().__init__(path, maxBytes=max_bytes, backupCount=backup_count, **kwargs)
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        # 标准库每次判断都会stat文件并tell（会冲掉写缓冲），这里先用已写入的字节数过滤掉明显不需要滚动的行
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is not None and self.size + len(record.msg.encode("utf-8")) + 1 < self.maxBytes:
+            return False
+        return super().shouldRollover(record)
+
+
+class DailyRotatingLogFile(LogFile, TimedRotatingFileHandler):
+    """每天午夜滚动为path.YYYY-MM-DD，保留backup_count天"""
+
+    def __init__(self, path: Path, backup_count: int, **kwargs):
+        super().__init__(path, when="midnight", backupCount=backup_count, **kwargs)
+
+
+class FrontendLogWriter:
+    """
+    前端日志的缓冲写入器
+
+    请求只把日志行追加到内存列表中，由后台线程批量写入app.log、daily.log
+    （错误日志另写error.log）。文件句柄保持打开，按大小/日期滚动，每批写完flush，
+    并按间隔fsync。等待写入的行数超过max_pending时，新日志直接丢弃并计数，不阻塞调用方。
+
+    传入LogStore时，随每行一起提交的结构化记录也在同一线程中写入日志存储。
+    """
+
+    def __init__(
+        self,
+        log_dir: Optional[Path] = None,
+        flush_interval_ms: Optional[int] = None,
+        fsync_interval_ms: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        store: Optional[LogStore] = None
+    ):
+        self.log_dir = Path(log_dir or settings.FRONTEND_LOG_DIR)
+        self.flush_interval = (flush_interval_ms or settings.FRONTEND_LOG_FLUSH_INTERVAL_MS) / 1000
+        self.fsync_interval = (fsync_interval_ms or settings.FRONTEND_LOG_FSYNC_INTERVAL_MS) / 1000
+        self.max_pending = max_pending or settings.FRONTEND_LOG_MAX_PENDING
+        self.batch_size = max(1, self.max_pending // 10)
+        self.store = store
+
+        self.files: Dict[str, LogFile] = {
+            "app": SizeRotatingLogFile(
+                self.log_dir / "app.log",
+                max_bytes=settings.FRONTEND_LOG_FILE_MAX_SIZE,
+                backup_count=settings.FRONTEND_LOG_FILE_BACKUP_COUNT
+            ),
+            "error": SizeRotatingLogFile(
+                self.log_dir / "error.log",
+                max_bytes=settings.FRONTEND_LOG_FILE_MAX_SIZE,
+                backup_count=3
+            ),
+            "daily": DailyRotatingLogFile(
+                self.log_dir / "daily.log",
+                backup_count=settings.FRONTEND_LOG_DAILY_BACKUP_COUNT
+            ),
+        }
+
+        # 等待写线程处理的(级别, 日志行, 结构化记录)
+        self._pending: List[Tuple[str, str, Optional[Dict[str, Any]]]] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+
+        self.stats = {"received": 0, "written": 0, "dropped": 0, "batches": 0, "fsyncs": 0, "errors": 0}
+
+    @property
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def write_many(
+        self,
+        entries: Iterable[Tuple[str, str]],
+        records: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+    ) -> int:
+        """
+        非阻塞地提交多条(级别, 日志行)，返回被接收的条数
+
+        records可选，与entries一一对应，是写入日志存储的结构化记录
+        """
+        entries = list(entries)
+        if records is None:
+            records = [None] * len(entries)
+        entries = [(level, line, record) for (level, line), record in zip(entries, records)]
+        with self._cond:
+            room = max(0, self.max_pending - len(self._pending))
+            accepted = entries[:room]
+            self._pending.extend(accepted)
+            self.stats["received"] += len(entries)
+            self.stats["dropped"] += len(entries) - len(accepted)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify()
+
+        if self._thread is None:
+            self.start()
+        return len(accepted)
+
+    def write(self, level: str, line: str, record: Optional[Dict[str, Any]] = None) -> bool:
+        """提交单条日志，被丢弃时返回False"""
+        return self.write_many([(level, line)], [record]) == 1
+
+    def _write_batch(self, batch: List[Tuple[str, str, Optional[Dict[str, Any]]]]):
+        lines = [line for _, line, _ in batch]
+        error_lines = [line for level, line, _ in batch if level.upper() == "ERROR"]
+
+        with self._io_lock:
+            try:
+                self.files["app"].write_lines(lines)
+                self.files["daily"].write_lines(lines)
+                if error_lines:
+                    self.files["error"].write_lines(error_lines)
+                for log_file in self.files.values():
+                    log_file.flush()
+            except Exception as e:
+                # 写入失败的这批日志无法确认已落盘，按丢弃计数
+                self.stats["errors"] += 1
+                self.stats["dropped"] += len(batch)
+                logger.error(f"写入{len(batch)}条前端日志失败: {e}")
+                return
+            self._dirty = True
+
+        self.stats["written"] += len(batch)
+        self.stats["batches"] += 1
+
+        if self.store is not None:
+            try:
+                self.store.append(record for _, _, record in batch if record is not None)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"写入{len(batch)}条前端日志到日志存储失败: {e}")
+
+    def fsync(self):
+        """将已写入的内容强制落盘"""
+        with self._io_lock:
+            try:
+                for log_file in self.files.values():
+                    log_file.fsync()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"前端日志文件fsync失败: {e}")
+            self._dirty = False
+            self._last_fsync = time.monotonic()
+        self.stats["fsyncs"] += 1
+
+    def flush_sync(self) -> int:
+        """在调用线程中立即写入所有等待中的日志"""
+        with self._cond:
+            batch, self._pending = self._pending, []
+        if batch:
+            self._write_batch(batch)
+        return len(batch)
+
+    def _run(self):
+        """每个flush间隔写一批，等待的行数达到batch_size时提前写入"""
+        while True:
+            with self._cond:
+                if len(self._pending) < self.batch_size and not self._stopping:
+                    self._cond.wait(self.flush_interval)
+                stopping = self._stopping
+
+            self.flush_sync()
+            if self._dirty and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self.fsync()
+            if stopping:
+                return
+
+    def start(self):
+        """启动写线程（write_many首次调用时会自动启动）"""
+        with self._cond:
+            if self._thread is not None:
+                return
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="frontend-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """写完等待中的日志、fsync并关闭文件，阻塞到写线程退出"""
+        with self._cond:
+            thread = self._thread
+            self._stopping = True
+            self._cond.notify()
+        if thread is not None:
+            thread.join()
+
+        self.flush_sync()
+        self.fsync()
+        with self._io_lock:
+            for log_file in self.files.values():
+                log_file.close()
+        with self._cond:
+            self._thread = None
+            self._stopping = False
+
+    def get_stats(self) -> dict:
+        return {**self.stats, "pending": self.pending_count, "max_pending": self.max_pending}
+
+
+# 全局实例
+frontend_log_writer = FrontendLogWriter(store=log_store if settings.LOG_STORE_ENABLED else None)
@@ -0,0 +1,185 @@
+import asyncio
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.crud_client import client as client_crud
+from app.core.logger import monitoring_logger
+
+
+class HeartbeatBuffer:
+    """Write-behind buffer that coalesces client heartbeats and flushes them in bulk"""
+
+    def __init__(
+        self,
+        flush_interval_ms: Optional[int] = None,
+        max_size: Optional[int] = None,
+        session_factory: Callable[[], Session] = SessionLocal
+    ):
+        self.flush_interval = (flush_interval_ms or settings.HEARTBEAT_FLUSH_INTERVAL_MS) / 1000
+        self.max_size = max_size or settings.HEARTBEAT_BUFFER_MAX_SIZE
+        self.session_factory = session_factory
+
+        # client_id -> latest heartbeat fields (last write wins)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Flush currently running in the executor, awaited by stop()
+        self._inflight: Optional[asyncio.Future] = None
+
+        self.stats = {"received": 0, "flushed": 0, "flushes": 0, "errors": 0, "dropped": 0}
+
+    @property
+    def pending_count(self) -> int:
+        """Number of distinct clients waiting to be flushed"""
+        return len(self._pending)
+
+    def add(
+        self,
+        client_id: int,
+        status: str,
+        last_heartbeat: datetime,
+        version: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ):
+        """Queue a heartbeat, merging it with any pending beat of the same client"""
+        entry = {
+            "status": status,
+            "last_heartbeat": last_heartbeat,
+            "version": version,
+            "ip_address": ip_address,
+        }
+        with self._lock:
+            self._merge(client_id, entry)
+            self.stats["received"] += 1
+            size = len(self._pending)
+
+        if size >= self.max_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _merge(self, client_id: int, entry: Dict[str, Any]):
+        """Merge a newer entry over the pending one; optional fields keep older values if unset"""
+        previous = self._pending.get(client_id)
+        if previous:
+            for field in ("version", "ip_address"):
+                if entry[field] is None:
+                    entry[field] = previous[field]
+        self._pending[client_id] = entry
+
+    def _drain(self) -> Dict[int, Dict[str, Any]]:
+        """Take ownership of all pending heartbeats"""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        return batch
+
+    def _restore(self, batch: Dict[int, Dict[str, Any]]):
+        """
+        Put back a batch that failed to flush without overriding newer beats.
+
+        Clients that already have a newer pending beat are always merged. The
+        others only fill the buffer up to max_size, most recent heartbeats
+        first; the rest are dropped and counted so repeated failures cannot
+        grow the buffer without bound.
+        """
+        with self._lock:
+            restored = []
+            for client_id, entry in batch.items():
+                newer = self._pending.pop(client_id, None)
+                if newer:
+                    self._pending[client_id] = entry
+                    self._merge(client_id, newer)
+                else:
+                    restored.append((client_id, entry))
+
+            room = max(0, self.max_size - len(self._pending))
+            if len(restored) > room:
+                restored.sort(key=lambda item: item[1]["last_heartbeat"], reverse=True)
+                self.stats["dropped"] += len(restored) - room
+                restored = restored[:room]
+            for client_id, entry in restored:
+                self._pending[client_id] = entry
+
+    def flush_sync(self) -> int:
+        """Write all pending heartbeats with a single bulk UPDATE"""
+        batch = self._drain()
+        if not batch:
+            return 0
+
+        db = self.session_factory()
+        try:
+            client_crud.bulk_update_heartbeats(
+                db,
+                heartbeats=[{"id": client_id, **entry} for client_id, entry in batch.items()]
+            )
+        except Exception as e:
+            db.rollback()
+            self._restore(batch)
+            self.stats["errors"] += 1
+            monitoring_logger.error(f"Error flushing {len(batch)} buffered heartbeats: {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+        self.stats["flushed"] += len(batch)
+        self.stats["flushes"] += 1
+        monitoring_logger.debug(f"Flushed {len(batch)} buffered heartbeats")
+        return len(batch)
+
+    async def flush(self) -> int:
+        """Flush pending heartbeats in a worker thread"""
+        loop = asyncio.get_running_loop()
+        self._inflight = loop.run_in_executor(None, self.flush_sync)
+        # Shielded so cancelling the flush loop does not abandon a running flush
+        return await asyncio.shield(self._inflight)
+
+    async def _run(self):
+        """Flush every interval, or earlier when the buffer reaches max_size"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self):
+        """Start the background flush loop (must be called from a running event loop)"""
+        if self._task and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        monitoring_logger.info(
+            f"Heartbeat buffer started (interval: {self.flush_interval * 1000:.0f}ms, max size: {self.max_size})"
+        )
+
+    async def stop(self):
+        """Stop the flush loop and write out everything still pending"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._wakeup = None
+
+        # Let a flush still running in the executor finish (and restore its
+        # batch on failure) before writing out the rest
+        if self._inflight is not None:
+            try:
+                await self._inflight
+            except Exception as e:
+                monitoring_logger.error(f"Error waiting for in-flight heartbeat flush: {str(e)}")
+            self._inflight = None
+
+        flushed = self.flush_sync()
+        monitoring_logger.info(f"Heartbeat buffer stopped ({flushed} heartbeats flushed on shutdown)")
+
+
+# Global instance
+heartbeat_buffer = HeartbeatBuffer()
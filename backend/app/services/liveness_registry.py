@@ -0,0 +1,242 @@
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.crud_client import client as client_crud
+from app.models.client import Client
+
+
+class ClientLiveness:
+    """Compact in-memory liveness record of a single client"""
+
+    __slots__ = (
+        "id", "name", "ip_address", "version", "status",
+        "last_heartbeat", "created_at", "updated_at", "refreshed_at",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        ip_address: str,
+        version: str,
+        status: str,
+        last_heartbeat: Optional[datetime],
+        created_at: datetime,
+        updated_at: datetime,
+        refreshed_at: float = 0.0
+    ):
+        self.id = id
+        self.name = name
+        self.ip_address = ip_address
+        self.version = version
+        self.status = status
+        self.last_heartbeat = last_heartbeat
+        self.created_at = created_at
+        self.updated_at = updated_at
+        # Registry timer value when the record was last loaded or written by this process
+        self.refreshed_at = refreshed_at
+
+    @classmethod
+    def from_model(cls, client: Client, refreshed_at: float = 0.0) -> "ClientLiveness":
+        """Build a liveness record from a Client ORM object"""
+        return cls(
+            id=client.id,
+            name=client.name,
+            ip_address=client.ip_address,
+            version=client.version,
+            status=client.status,
+            last_heartbeat=client.last_heartbeat,
+            created_at=client.created_at,
+            updated_at=client.updated_at,
+            refreshed_at=refreshed_at,
+        )
+
+
+class ClientLivenessRegistry:
+    """
+    Process-local, authoritative view of client liveness.
+
+    Heartbeats update the registry first and status reads are served from it;
+    the clients table is brought up to date by the heartbeat buffer flushes.
+
+    With several workers each process has its own registry, so a record that
+    this process has not loaded or written for `ttl` seconds is treated as a
+    miss and reloaded from the database. The TTL should exceed the heartbeat
+    flush interval so reloads see this process' own buffered heartbeats;
+    0 disables expiry (single worker).
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        ttl: Optional[float] = None,
+        timer: Callable[[], float] = time.monotonic
+    ):
+        self.session_factory = session_factory
+        self.ttl = settings.LIVENESS_REGISTRY_TTL_SECONDS if ttl is None else ttl
+        self.timer = timer
+        self._clients: Dict[int, ClientLiveness] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0}
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def __contains__(self, client_id: int) -> bool:
+        return client_id in self._clients
+
+    def load(self, db: Optional[Session] = None) -> int:
+        """Populate the registry with every client from the database"""
+        own_session = db is None
+        db = db or self.session_factory()
+        try:
+            clients = db.query(Client).all()
+            now = self.timer()
+            with self._lock:
+                self._clients = {c.id: ClientLiveness.from_model(c, now) for c in clients}
+            return len(clients)
+        finally:
+            if own_session:
+                db.close()
+
+    def clear(self):
+        """Drop every cached record"""
+        with self._lock:
+            self._clients = {}
+
+    def put(self, client: Client) -> ClientLiveness:
+        """Insert or replace the record of a client from its ORM object"""
+        entry = ClientLiveness.from_model(client, self.timer())
+        with self._lock:
+            self._clients[entry.id] = entry
+        return entry
+
+    def invalidate(self, client_id: int):
+        """Forget a client so the next lookup reloads it from the database"""
+        with self._lock:
+            self._clients.pop(client_id, None)
+
+    def get(self, client_id: int) -> Optional[ClientLiveness]:
+        """Return the cached record of a client, or None if unknown or expired"""
+        entry = self._clients.get(client_id)
+        if entry is not None and self.ttl > 0 and self.timer() - entry.refreshed_at >= self.ttl:
+            self.stats["expired"] += 1
+            entry = None
+        if entry is None:
+            self.stats["misses"] += 1
+        else:
+            self.stats["hits"] += 1
+        return entry
+
+    def get_or_load(self, db: Session, client_id: int) -> Optional[ClientLiveness]:
+        """Return the cached record of a client, loading it from the database on a miss"""
+        entry = self.get(client_id)
+        if entry is None:
+            client = client_crud.get(db, client_id)
+            if client is not None:
+                entry = self.put(client)
+        return entry
+
+    def get_many_or_load(self, db: Session, client_ids: Iterable[int]) -> Dict[int, ClientLiveness]:
+        """Return records for the given ids, loading all misses with a single query"""
+        found, missing = self._split_cached(client_ids)
+        if missing:
+            for client in client_crud.get_multi_by_ids(db, ids=missing):
+                found[client.id] = self.put(client)
+        return found
+
+    async def get_or_load_async(self, db: AsyncSession, client_id: int) -> Optional[ClientLiveness]:
+        """Async variant of get_or_load"""
+        entry = self.get(client_id)
+        if entry is None:
+            client = await client_crud.get_async(db, client_id)
+            if client is not None:
+                entry = self.put(client)
+        return entry
+
+    async def get_many_or_load_async(
+        self, db: AsyncSession, client_ids: Iterable[int]
+    ) -> Dict[int, ClientLiveness]:
+        """Async variant of get_many_or_load"""
+        found, missing = self._split_cached(client_ids)
+        if missing:
+            for client in await client_crud.get_multi_by_ids_async(db, ids=missing):
+                found[client.id] = self.put(client)
+        return found
+
+    def _split_cached(self, client_ids: Iterable[int]) -> Tuple[Dict[int, ClientLiveness], List[int]]:
+        """Split ids into cached records and ids that must be loaded"""
+        found: Dict[int, ClientLiveness] = {}
+        missing: List[int] = []
+        for client_id in set(client_ids):
+            entry = self.get(client_id)
+            if entry is None:
+                missing.append(client_id)
+            else:
+                found[client_id] = entry
+        return found, missing
+
+    def record_heartbeat(
+        self,
+        client_id: int,
+        status: str,
+        last_heartbeat: datetime,
+        version: Optional[str] = None,
+        ip_address: Optional[str] = None
+    ) -> Optional[ClientLiveness]:
+        """Apply a heartbeat to a cached client; returns None if the client is unknown"""
+        with self._lock:
+            entry = self._clients.get(client_id)
+            if entry is None:
+                return None
+            entry.status = status
+            entry.last_heartbeat = last_heartbeat
+            entry.updated_at = last_heartbeat
+            entry.refreshed_at = self.timer()
+            if version:
+                entry.version = version
+            if ip_address:
+                entry.ip_address = ip_address
+        return entry
+
+    def snapshot(self) -> List[ClientLiveness]:
+        """Return the current records as a list"""
+        return list(self._clients.values())
+
+    def set_status(self, client_ids: Iterable[int], status: str):
+        """Set the status of several cached clients at once"""
+        now = self.timer()
+        with self._lock:
+            for client_id in client_ids:
+                entry = self._clients.get(client_id)
+                if entry is not None:
+                    entry.status = status
+                    entry.refreshed_at = now
+
+    def get_info(self) -> dict:
+        """Registry size and hit statistics"""
+        return {"clients": len(self._clients), **self.stats}
+
+
+# Global instance
+liveness_registry = ClientLivenessRegistry()
+
+
+@event.listens_for(Client, "after_update")
+@event.listens_for(Client, "after_delete")
+def _invalidate_changed_client(mapper, connection, target: Client):
+    """
+    Forget a client updated or deleted through the ORM so its record is reloaded.
+
+    Set-based UPDATE statements (heartbeat flushes, timeout sweeps) bypass
+    these events; their callers update the registry themselves.
+    """
+    liveness_registry.invalidate(target.id)
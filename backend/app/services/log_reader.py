@@ -0,0 +1,208 @@
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+@dataclass
+class LogChunk:
+    """A slice of a log file made of whole lines"""
+    content: bytes
+    start_offset: int
+    end_offset: int
+    file_id: str
+    line_count: int
+    reset: bool = False
+
+
+def file_identity(stat: os.stat_result) -> str:
+    """Identify the file behind a path so followers notice rotation"""
+    return f"{stat.st_dev}:{stat.st_ino}"
+
+
+def tail_lines(path: Path, lines: int, block_size: int = DEFAULT_BLOCK_SIZE) -> LogChunk:
+    """
+    Return the last `lines` lines of a file.
+
+    Reads fixed-size blocks backwards from the end until enough newlines have
+    been seen, so the cost depends on the requested lines, not the file size.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        end = stat.st_size
+        position = end
+        blocks = []
+        newlines = 0
+
+        # A trailing newline terminates the last line rather than starting a new one
+        if end:
+            f.seek(end - 1)
+            if f.read(1) == b"\n":
+                newlines = -1
+
+        while position > 0 and newlines < lines:
+            size = min(block_size, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            blocks.append(block)
+            newlines += block.count(b"\n")
+
+    data = b"".join(reversed(blocks))
+    start = position
+    if lines <= 0:
+        data, start = b"", end
+    elif newlines >= lines:
+        # Drop everything before the first of the requested lines
+        cut = len(data)
+        trailing = 1 if data.endswith(b"\n") else 0
+        for _ in range(lines + trailing):
+            cut = data.rindex(b"\n", 0, cut)
+        data = data[cut + 1:]
+        start = end - len(data)
+
+    return LogChunk(
+        content=data,
+        start_offset=start,
+        end_offset=end,
+        file_id=file_identity(stat),
+        line_count=count_lines(data)
+    )
+
+
+def read_from_offset(
+    path: Path,
+    offset: int,
+    max_bytes: int,
+    file_id: Optional[str] = None
+) -> LogChunk:
+    """
+    Return the complete lines appended after `offset`, at most `max_bytes`.
+
+    If the file was rotated (different identity) or truncated (smaller than
+    the offset), reading restarts from the beginning and `reset` is set. A
+    trailing partial line is left for the next call.
+    """
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        reset = offset > stat.st_size or (file_id is not None and file_id != file_identity(stat))
+        if reset:
+            offset = 0
+
+        f.seek(offset)
+        data = f.read(max(0, min(max_bytes, stat.st_size - offset)))
+
+    last_newline = data.rfind(b"\n")
+    if last_newline == -1 and len(data) == max_bytes:
+        # A single line longer than max_bytes: return it in pieces
+        complete = data
+    else:
+        complete = data[:last_newline + 1]
+
+    return LogChunk(
+        content=complete,
+        start_offset=offset,
+        end_offset=offset + len(complete),
+        file_id=file_identity(stat),
+        line_count=count_lines(complete),
+        reset=reset
+    )
+
+
+def count_lines(data: bytes) -> int:
+    """Count lines, including a final line without a trailing newline"""
+    if not data:
+        return 0
+    return data.count(b"\n") + (0 if data.endswith(b"\n") else 1)
+
+
+@dataclass
+class FileStats:
+    """Line and size metadata of a log file, valid up to `offset`"""
+    file_id: str
+    size: int
+    mtime: float
+    offset: int
+    newlines: int
+    partial: bool
+
+    @property
+    def lines(self) -> int:
+        return self.newlines + (1 if self.partial else 0)
+
+
+class LogStatsCache:
+    """
+    Per-file line counts that are updated incrementally.
+
+    An unchanged file (same identity, size and mtime) is answered from the
+    cache; a file that only grew is scanned from the last known offset; a
+    rotated or truncated file is rescanned from the start. The stats endpoint
+    therefore costs O(number of files) plus whatever was appended since the
+    previous call.
+    """
+
+    def __init__(self, block_size: int = 1024 * 1024):
+        self.block_size = block_size
+        self._entries: Dict[Path, FileStats] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "incremental": 0, "full_scans": 0}
+
+    def get(self, path: Path) -> FileStats:
+        path = Path(path)
+        with self._lock:
+            with open(path, "rb") as f:
+                stat = os.fstat(f.fileno())
+                file_id = file_identity(stat)
+                entry = self._entries.get(path)
+
+                if entry and entry.file_id == file_id and entry.size == stat.st_size and entry.mtime == stat.st_mtime:
+                    self.stats["hits"] += 1
+                    return entry
+
+                if entry and entry.file_id == file_id and stat.st_size > entry.offset:
+                    self.stats["incremental"] += 1
+                    start, newlines, partial = entry.offset, entry.newlines, entry.partial
+                else:
+                    self.stats["full_scans"] += 1
+                    start, newlines, partial = 0, 0, False
+
+                f.seek(start)
+                offset = start
+                while offset < stat.st_size:
+                    block = f.read(min(self.block_size, stat.st_size - offset))
+                    if not block:
+                        break
+                    newlines += block.count(b"\n")
+                    partial = not block.endswith(b"\n")
+                    offset += len(block)
+
+            entry = FileStats(
+                file_id=file_id,
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                offset=offset,
+                newlines=newlines,
+                partial=partial
+            )
+            self._entries[path] = entry
+            return entry
+
+    def prune(self, paths: Iterable[Path]):
+        """Forget files that are not in `paths` (deleted or rotated away)"""
+        keep = {Path(path) for path in paths}
+        with self._lock:
+            for path in list(self._entries):
+                if path not in keep:
+                    del self._entries[path]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global instance
+log_stats_cache = LogStatsCache()
@@ -1,6 +1,8 @@
 import asyncio
+import heapq
+import threading
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
@@ -8,117 +10,187 @@ from sqlalchemy.orm import Session
 
 from app.core.database import SessionLocal
 from app.crud.crud_client import client as client_crud
-from app.websocket.websocket_manager import WebSocketManager, MessageType
+from app.core.websocket_manager import websocket_manager
 from app.core.config import settings
 from app.core.logger import monitoring_logger
+from app.services.liveness_registry import liveness_registry
 
 
 class ClientMonitoringService:
-    """Service for monitoring client heartbeats and updating their status"""
-    
-    def __init__(self):
-        self.scheduler = AsyncIOScheduler()
-        self.ws_manager = WebSocketManager()
+    """
+    Service for monitoring client heartbeats and updating their status
+
+    Two modes are supported (HEARTBEAT_MONITOR_MODE):
+
+    - deadline: every heartbeat pushes the client's deadline (last heartbeat +
+      timeout) onto a min-heap, so each tick only pops the clients whose
+      deadline has passed instead of scanning all online clients.
+    - sweep: every check interval, all timed out clients are marked offline
+      with a single set-based UPDATE ... RETURNING.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.scheduler: Optional[AsyncIOScheduler] = None
+        self.ws_manager = websocket_manager
         self.heartbeat_timeout = getattr(settings, 'HEARTBEAT_TIMEOUT_SECONDS', 60)
         self.check_interval = getattr(settings, 'HEARTBEAT_CHECK_INTERVAL_SECONDS', 30)
-        
+        self.tick_interval = getattr(settings, 'HEARTBEAT_MONITOR_TICK_MS', 1000) / 1000
+        self.mode = getattr(settings, 'HEARTBEAT_MONITOR_MODE', 'deadline')
+
+        # Min-heap of (deadline, client_id); stale entries are skipped lazily
+        self._heap: List[Tuple[datetime, int]] = []
+        # client_id -> current deadline
+        self._deadlines: Dict[int, datetime] = {}
+        self._lock = threading.Lock()
+
+    def record_heartbeat(self, client_id: int, status: str, last_heartbeat: datetime):
+        """Reschedule a client's timeout deadline after a heartbeat"""
+        if self.mode != "deadline":
+            return
+        with self._lock:
+            if status != "online":
+                self._deadlines.pop(client_id, None)
+                return
+            deadline = last_heartbeat + timedelta(seconds=self.heartbeat_timeout)
+            self._deadlines[client_id] = deadline
+            heapq.heappush(self._heap, (deadline, client_id))
+
+            # Drop stale entries once they dominate the heap
+            if len(self._heap) > 4 * len(self._deadlines) + 1024:
+                self._heap = [(d, cid) for cid, d in self._deadlines.items()]
+                heapq.heapify(self._heap)
+
+    def seed_from_database(self) -> int:
+        """
+        Schedule deadlines for every client that is online in the database
+
+        Covers clients that were online before a restart (or were marked online
+        by another worker) and never send another heartbeat to this process;
+        without a deadline they would never time out in deadline mode.
+        """
+        db = self.session_factory()
+        try:
+            rows = client_crud.get_online_heartbeats(db)
+        finally:
+            db.close()
+        for row in rows:
+            if row.last_heartbeat:
+                self.record_heartbeat(row.id, "online", row.last_heartbeat)
+        return len(rows)
+
+    def pop_expired(self, now: datetime) -> List[int]:
+        """Remove and return the ids of clients whose deadline has passed"""
+        expired = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, client_id = heapq.heappop(self._heap)
+                if self._deadlines.get(client_id) == deadline:
+                    del self._deadlines[client_id]
+                    expired.append(client_id)
+        return expired
+
+    @property
+    def tracked_count(self) -> int:
+        """Number of clients with a pending deadline"""
+        return len(self._deadlines)
+
     async def check_client_heartbeats(self):
-        """Check all clients for heartbeat timeout and update their status"""
+        """Mark clients whose deadline has passed as offline"""
+        now = datetime.utcnow()
+        expired = self.pop_expired(now)
+        if not expired:
+            return
+
         # Run synchronous database operations in a thread pool
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, self._check_heartbeats_sync)
-    
-    def _check_heartbeats_sync(self):
-        """Synchronous method to check heartbeats"""
-        db = SessionLocal()
+        threshold = now - timedelta(seconds=self.heartbeat_timeout)
+        loop = asyncio.get_running_loop()
+        offline_clients = await loop.run_in_executor(None, self._mark_clients_offline_sync, threshold, expired)
+
+        for client in offline_clients:
+            await self._send_offline_notification(client)
+
+    async def sweep_client_heartbeats(self):
+        """Mark every timed out online client as offline with one set-based UPDATE"""
+        threshold = datetime.utcnow() - timedelta(seconds=self.heartbeat_timeout)
+        loop = asyncio.get_running_loop()
+        offline_clients = await loop.run_in_executor(None, self._mark_clients_offline_sync, threshold)
+
+        for client in offline_clients:
+            await self._send_offline_notification(client)
+
+    def _mark_clients_offline_sync(self, threshold: datetime, client_ids: Optional[List[int]] = None) -> list:
+        """Mark timed out clients offline with a single bulk UPDATE"""
+        db = self.session_factory()
         try:
-            # Get all online clients
-            online_clients = client_crud.get_by_status(db, status="online")
-            
-            # Current time
-            now = datetime.utcnow()
-            timeout_threshold = now - timedelta(seconds=self.heartbeat_timeout)
-            
-            # Check each client
-            for client in online_clients:
-                if client.last_heartbeat and client.last_heartbeat < timeout_threshold:
-                    # Mark client as offline
-                    self._mark_client_offline_sync(db, client.id)
-                    monitoring_monitoring_logger.info(f"Client {client.id} marked as offline due to heartbeat timeout")
-                    
+            rows = client_crud.mark_offline(db, threshold=threshold, client_ids=client_ids)
+            liveness_registry.set_status([row.id for row in rows], "offline")
+            for row in rows:
+                monitoring_logger.info(f"Client {row.id} marked as offline due to heartbeat timeout")
+            return rows
         except Exception as e:
-            monitoring_logger.error(f"Error during heartbeat monitoring: {str(e)}")
+            db.rollback()
+            monitoring_logger.error(f"Error marking timed out clients as offline: {str(e)}")
+            return []
         finally:
             db.close()
-    
-    def _mark_client_offline_sync(self, db: Session, client_id: int):
-        """Mark a client as offline synchronously"""
-        try:
-            # Get the client
-            client = client_crud.get(db, client_id)
-            if not client:
-                return
-            
-            # Update client status in database
-            updated_client = client_crud.update(
-                db, 
-                db_obj=client,
-                obj_in={"status": "offline"}
-            )
-            
-            # Send WebSocket notification (async)
-            asyncio.create_task(self._send_offline_notification(updated_client))
-                
-        except Exception as e:
-            monitoring_logger.error(f"Error marking client {client_id} as offline: {str(e)}")
-    
+
     async def _send_offline_notification(self, client):
         """Send WebSocket notification for offline client"""
         try:
-            await self.ws_manager.broadcast_to_topic(
-                "client_status",
-                {
-                    "type": MessageType.CLIENT_STATUS_UPDATE.value,
-                    "data": {
-                        "client_id": client.id,
-                        "name": client.name,
-                        "status": "offline",
-                        "last_heartbeat": client.last_heartbeat.isoformat() if client.last_heartbeat else None,
-                        "reason": "heartbeat_timeout"
-                    }
-                }
+            await self.ws_manager.send_client_status_update(
+                client_id=client.id,
+                status="offline",
+                last_heartbeat=client.last_heartbeat,
+                name=client.name,
+                reason="heartbeat_timeout"
             )
         except Exception as e:
             monitoring_logger.error(f"Error sending offline notification for client {client.id}: {str(e)}")
-    
+
     def start(self):
         """Start the monitoring service"""
         try:
-            # Add the heartbeat check job
+            if self.mode == "sweep":
+                job, interval = self.sweep_client_heartbeats, self.check_interval
+            else:
+                try:
+                    self.seed_from_database()
+                except Exception as e:
+                    monitoring_logger.warning(f"Failed to seed heartbeat deadlines from the database: {str(e)}")
+                job, interval = self.check_client_heartbeats, self.tick_interval
+
+            # A fresh scheduler binds to the currently running event loop
+            self.scheduler = AsyncIOScheduler()
             self.scheduler.add_job(
-                self.check_client_heartbeats,
-                trigger=IntervalTrigger(seconds=self.check_interval),
+                job,
+                trigger=IntervalTrigger(seconds=interval),
                 id="heartbeat_monitor",
                 name="Client Heartbeat Monitor",
-                replace_existing=True
+                replace_existing=True,
+                coalesce=True
             )
-            
+
             # Start the scheduler
             self.scheduler.start()
-            monitoring_logger.info(f"Client monitoring service started (interval: {self.check_interval}s, timeout: {self.heartbeat_timeout}s)")
-            
+            monitoring_logger.info(
+                f"Client monitoring service started (mode: {self.mode}, interval: {interval}s, "
+                f"timeout: {self.heartbeat_timeout}s, tracked clients: {self.tracked_count})"
+            )
+
         except Exception as e:
             monitoring_logger.error(f"Failed to start monitoring service: {str(e)}")
             raise
-    
+
     def stop(self):
         """Stop the monitoring service"""
         try:
-            self.scheduler.shutdown(wait=True)
+            if self.scheduler and self.scheduler.running:
+                self.scheduler.shutdown(wait=True)
             monitoring_logger.info("Client monitoring service stopped")
         except Exception as e:
             monitoring_logger.error(f"Error stopping monitoring service: {str(e)}")
 
 
 # Global instance
-monitoring_service = ClientMonitoringService()
\ No newline at end of file
+monitoring_service = ClientMonitoringService()
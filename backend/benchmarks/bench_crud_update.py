@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+CRUDBase更新路径微基准测试
+
+对比 update（jsonable_encoder + 提交 + refresh）与 update_fields（单条UPDATE ... RETURNING）
+以及不逐条提交、批量提交的 update_fields 的单次更新开销。
+
+用法:
+    cd backend && python -m benchmarks.bench_crud_update [客户端数] [轮数]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import client as client_crud
+from app.models.base import Base
+from app.models.client import Client
+
+
+def setup_database(path: str, clients: int):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    db = Session()
+    db.add_all(
+        Client(name=f"client-{i}", ip_address="10.0.0.1", version="1.0.0", status="offline")
+        for i in range(clients)
+    )
+    db.commit()
+    ids = [row.id for row in db.query(Client.id).all()]
+    db.close()
+    return engine, Session, ids
+
+
+def count_statements(engine):
+    counter = {"statements": 0}
+
+    def before_cursor_execute(*args):
+        counter["statements"] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    return counter
+
+
+def bench_update(db, ids):
+    for client_id in ids:
+        db_obj = client_crud.get(db, client_id)
+        client_crud.update(db, db_obj=db_obj, obj_in={"status": "online", "last_heartbeat": datetime.utcnow()})
+
+
+def bench_update_fields(db, ids):
+    for client_id in ids:
+        client_crud.update_fields(db, id=client_id, obj_in={"status": "online", "last_heartbeat": datetime.utcnow()})
+
+
+def bench_update_fields_batched(db, ids):
+    for client_id in ids:
+        client_crud.update_fields(
+            db, id=client_id, obj_in={"status": "online", "last_heartbeat": datetime.utcnow()},
+            returning=False, commit=False
+        )
+    db.commit()
+
+
+def run(clients: int, rounds: int):
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        engine, Session, ids = setup_database(path, clients)
+        counter = count_statements(engine)
+        results = {}
+        for name, bench in (
+            ("get + update + refresh", bench_update),
+            ("update_fields", bench_update_fields),
+            ("update_fields batched", bench_update_fields_batched),
+        ):
+            db = Session(expire_on_commit=False)
+            counter["statements"] = 0
+            start = time.perf_counter()
+            for _ in range(rounds):
+                bench(db, ids)
+            elapsed = time.perf_counter() - start
+            db.close()
+            updates = rounds * len(ids)
+            results[name] = (elapsed / updates * 1e6, counter["statements"] / updates)
+        engine.dispose()
+    finally:
+        os.unlink(path)
+
+    print(f"clients={clients} rounds={rounds}")
+    for name, (per_update_us, statements) in results.items():
+        print(f"  {name:<24} {per_update_us:9.1f} µs/update  {statements:4.2f} statements/update")
+
+
+if __name__ == "__main__":
+    clients = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    run(clients, rounds)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+请求日志中间件微基准测试
+
+对比基于BaseHTTPMiddleware的旧实现与纯ASGI实现的单个请求开销，
+以及排除心跳路径后不再输出INFO日志时的开销。
+
+用法:
+    cd backend && python -m benchmarks.bench_request_logging [请求数]
+"""
+
+import asyncio
+import logging
+import sys
+import time
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.logger import api_logger
+from app.core.middleware import RequestLoggingMiddleware
+
+
+class LegacyRequestLoggingMiddleware(BaseHTTPMiddleware):
+    """旧实现：BaseHTTPMiddleware + time.time()"""
+
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        method = request.method
+        url = str(request.url)
+        client_ip = request.client.host if request.client else "unknown"
+        api_logger.info(f"🚀 {method} {url} - IP: {client_ip}")
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        api_logger.info(f"✅ {method} {url} - {response.status_code} - {process_time:.3f}s")
+        response.headers["X-Process-Time"] = str(process_time)
+        return response
+
+
+async def endpoint(scope, receive, send):
+    """最小的ASGI应用，返回一个空JSON响应"""
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", b"2")],
+    })
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def build_scope(path: str) -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 50000),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"testserver")],
+    }
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def measure(app, path: str, requests: int) -> float:
+    for _ in range(100):
+        await app(build_scope(path), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(build_scope(path), receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def run(requests: int):
+    # 日志写入NullHandler，只测量中间件本身及格式化的开销
+    api_logger.handlers = [logging.NullHandler()]
+    api_logger.propagate = False
+    api_logger.setLevel(logging.INFO)
+
+    heartbeat = "/api/v1/client/heartbeat"
+    cases = (
+        ("no middleware", endpoint, heartbeat),
+        ("BaseHTTPMiddleware", LegacyRequestLoggingMiddleware(endpoint), heartbeat),
+        ("pure ASGI", RequestLoggingMiddleware(endpoint, exclude_paths=[]), heartbeat),
+        ("pure ASGI, excluded", RequestLoggingMiddleware(endpoint, exclude_paths=[heartbeat]), heartbeat),
+    )
+
+    results = {}
+    for name, app, path in cases:
+        results[name] = await measure(app, path, requests)
+
+    baseline = results.pop("no middleware")
+    print(f"requests={requests} bare app={baseline:.2f} µs/request")
+    for name, per_request_us in results.items():
+        print(f"  {name:<22} {per_request_us - baseline:8.2f} µs/request overhead")
+
+
+if __name__ == "__main__":
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    asyncio.run(run(requests))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+WebSocket广播微基准测试
+
+对比每个连接各自编码消息（旧实现）与只编码一次再复用负载（当前实现）的单个接收者开销。
+
+用法:
+    cd backend && python -m benchmarks.bench_websocket_broadcast [连接数] [广播次数]
+"""
+
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime
+
+from app.core.websocket_manager import WebSocketManager, MessageType, orjson
+
+
+class NullWebSocket:
+    """丢弃所有数据的WebSocket替身，只统计发送次数"""
+
+    def __init__(self):
+        self.sent = 0
+
+    async def send_text(self, data: str):
+        self.sent += 1
+
+
+def build_message() -> dict:
+    return {
+        "type": MessageType.HEARTBEAT_RECEIVED,
+        "client_id": 12345,
+        "client_info": {
+            "name": "测试客户端-工位12345",
+            "ip_address": "192.168.100.200",
+            "version": "2.3.1",
+            "status": "online",
+        },
+    }
+
+
+async def legacy_broadcast(manager: WebSocketManager, topic: str, message: dict):
+    """旧实现：在每个连接的循环内调用json.dumps"""
+    message["timestamp"] = datetime.utcnow().isoformat()
+    message["topic"] = topic
+    for connection_id, topics in manager.subscriptions.items():
+        if topic in topics and connection_id in manager.connection_map:
+            await manager.connection_map[connection_id].send_text(json.dumps(message, ensure_ascii=False))
+
+
+async def run(connections: int, rounds: int):
+    manager = WebSocketManager()
+    for _ in range(connections):
+        connection_id = manager.connect_sync(NullWebSocket())
+        manager.subscribe_sync(connection_id, ["heartbeat"])
+
+    results = {}
+    for name, broadcast in (
+        ("per-recipient json.dumps", lambda: legacy_broadcast(manager, "heartbeat", build_message())),
+        ("encode once", lambda: manager.broadcast_to_topic("heartbeat", build_message())),
+    ):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await broadcast()
+        elapsed = time.perf_counter() - start
+        results[name] = elapsed / (rounds * connections) * 1e6
+
+    backend = "orjson" if orjson is not None else "json"
+    print(f"connections={connections} rounds={rounds} backend={backend}")
+    for name, per_recipient_us in results.items():
+        print(f"  {name:<26} {per_recipient_us:8.3f} µs/recipient")
+    baseline, current = results.values()
+    print(f"  speedup: {baseline / current:.1f}x")
+
+
+if __name__ == "__main__":
+    connections = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(run(connections, rounds))
@@ -2,14 +2,23 @@
 Pytest configuration file with shared fixtures
 """
 
+from contextlib import ExitStack
+from unittest.mock import patch
+
 import pytest
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from fastapi.testclient import TestClient
 
 from app.main import app
 from app.models.base import Base
-from app.api.deps import get_db
+from app.api.deps import get_async_db, get_db
+from app.core.database import get_async_database_url
+from app.services.heartbeat_buffer import heartbeat_buffer
+from app.services.liveness_registry import liveness_registry
+from app.services.monitoring import monitoring_service
 
 
 import tempfile
@@ -43,8 +52,20 @@ def db_session():
             pass
 
 
+@pytest.fixture(scope="function")
+def async_session_factory(db_session):
+    """Create an async session factory bound to the same test database file"""
+    async_engine = create_async_engine(
+        get_async_database_url(db_session.get_bind().url.render_as_string()),
+        poolclass=NullPool
+    )
+    return async_sessionmaker(
+        bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+
 @pytest.fixture(scope="function")  
-def client(db_session):
+def client(db_session, async_session_factory):
     """Create a test client"""
     def override_get_db():
         try:
@@ -52,9 +73,21 @@ def client(db_session):
         finally:
             pass
     
+    async def override_get_async_db():
+        async with async_session_factory() as async_db:
+            yield async_db
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    
+    # Services that open their own sessions outside requests (registry load at
+    # startup, heartbeat flushes, timeout sweeps) must use the test database too
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_session.get_bind())
     try:
-        with TestClient(app) as test_client:
+        with ExitStack() as stack:
+            for service in (liveness_registry, heartbeat_buffer, monitoring_service):
+                stack.enter_context(patch.object(service, "session_factory", session_factory))
+            test_client = stack.enter_context(TestClient(app))
             yield test_client
     finally:
         app.dependency_overrides.clear()
@@ -0,0 +1,141 @@
+"""
+Query plan regression tests
+
+Runs the hot CRUD queries against a 100k-row SQLite fixture and checks with
+EXPLAIN QUERY PLAN that none of them falls back to a full table scan.
+"""
+
+import random
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import client, upgrade_package, upgrade_task
+from app.crud.base import encode_cursor
+from app.models.base import Base
+from app.models.client import Client
+from app.models.upgrade_package import UpgradePackage
+from app.models.upgrade_task import UpgradeTask
+
+
+ROWS = 100_000
+FULL_SCAN = re.compile(r"^SCAN (clients|upgrade_tasks|upgrade_packages)$")
+
+
+@pytest.fixture(scope="module")
+def plan_engine(tmp_path_factory):
+    """SQLite database with 100k clients, upgrade tasks and upgrade packages"""
+    path = tmp_path_factory.mktemp("query_plans") / "plans.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+
+    rng = random.Random(42)
+    base_time = datetime(2024, 1, 1)
+    client_statuses = ["offline"] * 90 + ["online"] * 8 + ["error"] * 2
+    task_statuses = ["completed"] * 85 + ["failed"] * 5 + ["pending", "downloading", "installing"] * 3 + ["pending"]
+
+    with engine.begin() as conn:
+        conn.execute(insert(Client), [
+            {
+                "name": f"client-{i}",
+                "ip_address": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}",
+                "version": "1.0.0",
+                "status": rng.choice(client_statuses),
+                "last_heartbeat": base_time + timedelta(seconds=i) if i % 10 else None,
+                "created_at": base_time,
+                "updated_at": base_time,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(UpgradePackage), [
+            {
+                "name": f"package-{i % 1000}",
+                "version": f"1.{i // 1000}.0",
+                "file_path": f"/packages/{i}.zip",
+                "file_size": 1024,
+                "created_at": base_time + timedelta(minutes=i),
+                "updated_at": base_time,
+            }
+            for i in range(ROWS)
+        ])
+        conn.execute(insert(UpgradeTask), [
+            {
+                "client_id": rng.randint(1, ROWS),
+                "package_id": rng.randint(1, ROWS),
+                "status": rng.choice(task_statuses),
+                "created_at": base_time + timedelta(seconds=i),
+                "updated_at": base_time,
+            }
+            for i in range(ROWS)
+        ])
+        conn.exec_driver_sql("ANALYZE")
+
+    yield engine
+    engine.dispose()
+
+
+def deep_page(crud, **kwargs):
+    """Fetch the page that follows a cursor deep into the table"""
+    def operation(db):
+        cursor = encode_cursor("created_at,id:desc", [datetime(2024, 1, 1, 12), ROWS // 2])
+        return crud.get_page(db, cursor=cursor, limit=50, **kwargs)
+    return operation
+
+
+def query_plans(engine, operation):
+    """Run a CRUD operation and return the EXPLAIN QUERY PLAN of each statement it issued"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    db = sessionmaker(bind=engine)()
+    try:
+        operation(db)
+    finally:
+        db.rollback()
+        db.close()
+        event.remove(engine, "before_cursor_execute", capture)
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+            plans.append([row[-1] for row in rows])
+    return plans
+
+
+@pytest.mark.integration
+@pytest.mark.slow
+class TestQueryPlans:
+    """Each hot query must be served by an index"""
+
+    @pytest.mark.parametrize("name, operation", [
+        ("client.get_by_status", lambda db: client.get_by_status(db, status="online")),
+        ("client.get_recent_heartbeat", lambda db: client.get_recent_heartbeat(db, limit=10)),
+        ("client.mark_offline", lambda db: client.mark_offline(db, threshold=datetime(2000, 1, 1))),
+        ("upgrade_task.get_by_client", lambda db: upgrade_task.get_by_client(db, client_id=123)),
+        ("upgrade_task.get_client_active_task", lambda db: upgrade_task.get_client_active_task(db, client_id=123)),
+        ("upgrade_task.get_by_status", lambda db: upgrade_task.get_by_status(db, status="pending")),
+        ("upgrade_package.get_by_name", lambda db: upgrade_package.get_by_name(db, name="package-7")),
+        ("upgrade_package.get_all_latest", lambda db: upgrade_package.get_all_latest(db)),
+        ("client.get_page", deep_page(client)),
+        ("upgrade_task.get_page", deep_page(upgrade_task)),
+        ("upgrade_task.get_page by status", deep_page(upgrade_task, filters=[UpgradeTask.status == "pending"])),
+        ("upgrade_package.get_page", deep_page(upgrade_package)),
+    ])
+    def test_query_uses_index(self, plan_engine, name, operation):
+        plans = query_plans(plan_engine, operation)
+
+        assert plans, f"{name} issued no query"
+        for plan in plans:
+            full_scans = [step for step in plan if FULL_SCAN.match(step)]
+            assert not full_scans, f"{name} scans a full table: {plan}"
+            assert any("INDEX" in step for step in plan), f"{name} uses no index: {plan}"
+            if "get_page" in name:
+                assert not any("TEMP B-TREE" in step for step in plan), f"{name} sorts in memory: {plan}"
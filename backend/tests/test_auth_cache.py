@@ -0,0 +1,147 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from app.core.auth_cache import AuthCache
+from app.core.cache import TTLCache
+from app.core.security import jwt_handler
+from app.crud import admin as admin_crud
+from tests.utils import create_test_admin
+
+
+class FakeTimer:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """测试TTL/LRU缓存"""
+
+    def test_lru_eviction(self):
+        """测试容量满时淘汰最久未使用的条目"""
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats["evictions"] == 1
+
+    def test_expiry_capped_by_ttl(self):
+        """测试条目在expires_at和TTL中较早的时间过期"""
+        timer = FakeTimer()
+        cache = TTLCache(maxsize=10, ttl=60, timer=timer)
+        cache.set("short", 1, expires_at=timer.now + 10)
+        cache.set("long", 2, expires_at=timer.now + 3600)
+
+        timer.now += 11
+        assert cache.get("short") is None
+        assert cache.get("long") == 2
+        timer.now += 50
+        assert cache.get("long") is None
+        assert cache.stats["expired"] == 2
+
+    def test_hit_rate(self):
+        """测试命中率统计"""
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("missing")
+
+        info = cache.get_info()
+        assert info["hits"] == 2
+        assert info["misses"] == 1
+        assert info["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+
+class TestAuthCache:
+    """测试token验证和管理员记录缓存"""
+
+    def test_verified_token_is_cached(self):
+        """测试同一token只做一次签名验证"""
+        cache = AuthCache(enabled=True)
+        token = jwt_handler.create_access_token(subject="alice")
+
+        with patch.object(jwt_handler, "decode_token", wraps=jwt_handler.decode_token) as decode:
+            assert cache.verify_token(token) == "alice"
+            assert cache.verify_token(token) == "alice"
+        assert decode.call_count == 1
+        assert cache.get_info()["tokens"]["hits"] == 1
+
+    def test_token_cache_expires_with_token(self):
+        """测试缓存不会超过token自身的过期时间"""
+        timer = FakeTimer(time.time())
+        cache = AuthCache(enabled=True)
+        cache.tokens = TTLCache(maxsize=10, ttl=3600, timer=timer)
+        token = jwt_handler.create_access_token(subject="alice", expires_delta=timedelta(minutes=5))
+        exp = jwt_handler.decode_token(token)["exp"]
+
+        with patch.object(jwt_handler, "decode_token", wraps=jwt_handler.decode_token) as decode:
+            cache.verify_token(token)
+            timer.now = exp - 1
+            cache.verify_token(token)
+            assert decode.call_count == 1
+            timer.now = exp
+            cache.verify_token(token)
+            assert decode.call_count == 2
+
+    def test_invalid_token_not_cached(self):
+        """测试无效token不写入缓存"""
+        cache = AuthCache(enabled=True)
+        assert cache.verify_token("invalid") is None
+        assert len(cache.tokens) == 0
+
+    def test_admin_lookup_cached_without_sql(self, db_session):
+        """测试管理员缓存命中时不查询数据库，且返回属于当前会话的对象"""
+        admin_user = create_test_admin(db_session)
+        cache = AuthCache(enabled=True)
+        cache.get_admin(db_session, admin_user.username)
+        db_session.expunge_all()
+
+        statements = []
+        engine = db_session.get_bind()
+        listener = lambda *args: statements.append(args[2])
+        event.listen(engine, "before_cursor_execute", listener)
+        try:
+            cached = cache.get_admin(db_session, admin_user.username)
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+
+        assert statements == []
+        assert cached.username == admin_user.username
+        assert cached in db_session
+
+    def test_admin_update_invalidates_cache(self, db_session):
+        """测试通过ORM更新管理员后缓存失效"""
+        admin_user = create_test_admin(db_session)
+        cache = AuthCache(enabled=True)
+        with patch("app.core.auth_cache.auth_cache", cache):
+            cache.get_admin(db_session, admin_user.username)
+            assert len(cache.admins) == 1
+
+            admin_crud.update(db_session, db_obj=admin_user, obj_in={"email": "changed@example.com"})
+            assert len(cache.admins) == 0
+
+            assert cache.get_admin(db_session, admin_user.username).email == "changed@example.com"
+
+    def test_auth_cache_stats_endpoint(self, client, db_session):
+        """测试重复请求命中缓存并可查询命中率"""
+        admin_user = create_test_admin(db_session)
+        headers = {"Authorization": f"Bearer {jwt_handler.create_access_token(subject=admin_user.username)}"}
+
+        for _ in range(3):
+            assert client.get("/api/v1/admin/me", headers=headers).status_code == 200
+
+        info = client.get("/api/v1/admin/auth-cache", headers=headers).json()
+        assert info["tokens"]["hits"] >= 3
+        assert info["admins"]["hits"] >= 3
@@ -0,0 +1,94 @@
+import csv
+import io
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.security import jwt_handler
+from app.crud import client as client_crud
+from app.services.export import iter_csv, iter_ndjson
+from tests.utils import create_test_admin, create_test_client, create_test_task
+
+
+class TestSerializers:
+    """测试增量序列化"""
+
+    def test_ndjson_chunks(self):
+        """测试NDJSON按块输出且每行是一个JSON对象"""
+        rows = [(i, f"客户端{i}", datetime(2024, 1, 1)) for i in range(100)]
+        chunks = list(iter_ndjson(rows, ["id", "name", "created_at"], chunk_size=512))
+
+        assert len(chunks) > 1
+        lines = b"".join(chunks).decode("utf-8").splitlines()
+        assert len(lines) == 100
+        assert json.loads(lines[3]) == {"id": 3, "name": "客户端3", "created_at": "2024-01-01T00:00:00"}
+
+    def test_csv_header_and_rows(self):
+        """测试CSV包含表头并正确转义"""
+        rows = [(1, "a,b", None), (2, 'say "hi"', datetime(2024, 1, 1))]
+        data = b"".join(iter_csv(rows, ["id", "name", "created_at"])).decode("utf-8-sig")
+
+        parsed = list(csv.reader(io.StringIO(data)))
+        assert parsed[0] == ["id", "name", "created_at"]
+        assert parsed[1] == ["1", "a,b", ""]
+        assert parsed[2] == ["2", 'say "hi"', "2024-01-01T00:00:00"]
+
+    def test_iter_rows_streams_all_columns(self, db_session):
+        """测试iter_rows返回所有列并按id排序"""
+        ids = [create_test_client(db_session).id for _ in range(5)]
+        rows = list(client_crud.iter_rows(db_session, batch_size=2))
+
+        assert [row.id for row in rows] == ids
+        assert rows[0]._fields[:2] == ("name", "ip_address")
+
+
+class TestExportEndpoints:
+    """测试流式导出接口"""
+
+    @pytest.fixture
+    def auth_headers(self, db_session):
+        admin = create_test_admin(db_session)
+        return {"Authorization": f"Bearer {jwt_handler.create_access_token(subject=admin.username)}"}
+
+    @pytest.fixture(autouse=True)
+    def export_sessions(self, db_session):
+        with patch("app.core.database.SessionLocal", sessionmaker(bind=db_session.get_bind())):
+            yield
+
+    def test_export_clients_ndjson(self, client, db_session, auth_headers):
+        """测试客户端NDJSON导出"""
+        for status in ["online", "offline", "online"]:
+            create_test_client(db_session, status=status)
+
+        response = client.get("/api/v1/clients/export", params={"status": "online"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "clients.ndjson" in response.headers["content-disposition"]
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert len(records) == 2
+        assert all(record["status"] == "online" for record in records)
+
+    def test_export_tasks_csv(self, client, db_session, auth_headers):
+        """测试升级任务CSV导出"""
+        target = create_test_client(db_session)
+        for _ in range(3):
+            create_test_task(db_session, client_id=target.id)
+
+        response = client.get(
+            "/api/v1/upgrades/tasks/export", params={"format": "csv", "client_id": target.id}, headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        parsed = list(csv.reader(io.StringIO(response.content.decode("utf-8-sig"))))
+        assert parsed[0][:3] == ["client_id", "package_id", "status"]
+        assert len(parsed) == 4
+
+    def test_export_invalid_format(self, client, auth_headers):
+        """测试不支持的导出格式"""
+        response = client.get("/api/v1/clients/export", params={"format": "xml"}, headers=auth_headers)
+        assert response.status_code == 422
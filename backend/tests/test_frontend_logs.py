@@ -0,0 +1,221 @@
+import gzip
+import json
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.core.config import settings
+from app.services.frontend_log_writer import FrontendLogWriter
+
+
+def log_entry(message: str, level: str = "INFO") -> dict:
+    return {
+        "timestamp": "2024-01-01T00:00:00",
+        "level": level,
+        "logger": "test",
+        "message": message,
+        "logLine": f"[{level}] {message}",
+    }
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = FrontendLogWriter(log_dir=tmp_path, flush_interval_ms=10, fsync_interval_ms=10, max_pending=1000)
+    yield writer
+    writer.stop()
+
+
+class TestFrontendLogWriter:
+    """测试前端日志写缓冲"""
+
+    def test_batch_written_to_app_daily_and_error(self, writer, tmp_path):
+        """测试日志批量写入app.log和daily.log，错误日志额外写入error.log"""
+        writer.write_many([("INFO", "第一行"), ("ERROR", "出错了"), ("debug", "第三行")])
+        writer.stop()
+
+        assert (tmp_path / "app.log").read_text(encoding="utf-8") == "第一行\n出错了\n第三行\n"
+        assert (tmp_path / "daily.log").read_text(encoding="utf-8") == "第一行\n出错了\n第三行\n"
+        assert (tmp_path / "error.log").read_text(encoding="utf-8") == "出错了\n"
+        assert writer.stats["written"] == 3
+        assert writer.stats["fsyncs"] >= 1
+
+    def test_background_thread_flushes(self, writer, tmp_path):
+        """测试后台线程按间隔写入，读取方无需等待关闭"""
+        writer.write("INFO", "hello")
+        for _ in range(200):
+            if writer.stats["written"]:
+                break
+            writer._thread.join(0.01)
+
+        assert (tmp_path / "app.log").read_text(encoding="utf-8") == "hello\n"
+
+    def test_drops_when_pending_is_full(self, tmp_path):
+        """测试等待写入的行数超过上限时丢弃并计数"""
+        writer = FrontendLogWriter(log_dir=tmp_path, max_pending=5)
+        writer._thread = object()  # 不启动写线程，让日志留在缓冲中
+
+        accepted = writer.write_many([("INFO", str(i)) for i in range(8)])
+
+        assert accepted == 5
+        assert writer.stats["dropped"] == 3
+        assert writer.pending_count == 5
+
+    def test_size_rotation(self, tmp_path):
+        """测试app.log超过大小上限时滚动为app.log.1"""
+        with patch.object(settings, "FRONTEND_LOG_FILE_MAX_SIZE", 20):
+            writer = FrontendLogWriter(log_dir=tmp_path, max_pending=100)
+        writer._thread = object()
+        writer.write_many([("INFO", "0123456789")] * 3)
+        writer.flush_sync()
+        writer._thread = None
+        writer.stop()
+
+        for name in ["app.log.2", "app.log.1", "app.log"]:
+            assert (tmp_path / name).read_text() == "0123456789\n"
+
+    def test_daily_rotation(self, tmp_path):
+        """测试跨过午夜时daily.log按日期滚动"""
+        writer = FrontendLogWriter(log_dir=tmp_path, max_pending=100)
+        writer._thread = object()
+        writer.write("INFO", "today")
+        writer.flush_sync()
+
+        writer.files["daily"].rolloverAt = int(time.time()) - 1  # 模拟已过午夜
+        writer.write("INFO", "tomorrow")
+        writer.flush_sync()
+        writer._thread = None
+        writer.stop()
+
+        backups = list(tmp_path.glob("daily.log.????-??-??"))
+        assert len(backups) == 1
+        assert backups[0].read_text() == "today\n"
+        assert (tmp_path / "daily.log").read_text() == "tomorrow\n"
+
+    def test_failed_batch_counted_as_dropped(self, tmp_path):
+        """测试写入文件失败时整批日志计入丢弃"""
+        writer = FrontendLogWriter(log_dir=tmp_path, max_pending=100)
+        writer._thread = object()
+        writer.write_many([("INFO", "a"), ("INFO", "b")])
+        with patch.object(writer.files["daily"], "write_lines", side_effect=OSError("disk full")):
+            writer.flush_sync()
+        writer._thread = None
+        writer.stop()
+
+        assert writer.stats["errors"] == 1
+        assert writer.stats["dropped"] == 2
+        assert writer.stats["written"] == 0
+
+
+class TestFrontendLogAPI:
+    """测试前端日志接口"""
+
+    def test_save_single_log(self, client, writer, tmp_path):
+        """测试单条日志接口写入缓冲"""
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post("/api/v1/logs/frontend", json=log_entry("hello"))
+            writer.stop()
+
+        assert response.status_code == 200
+        assert (tmp_path / "app.log").read_text(encoding="utf-8") == "[INFO] hello\n"
+
+    def test_save_batch(self, client, writer, tmp_path):
+        """测试批量日志接口"""
+        entries = [log_entry(f"message {i}") for i in range(5)] + [log_entry("boom", "ERROR")]
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post("/api/v1/logs/frontend/batch", json=entries)
+            writer.stop()
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "accepted": 6, "dropped": 0}
+        assert len((tmp_path / "app.log").read_text(encoding="utf-8").splitlines()) == 6
+        assert (tmp_path / "error.log").read_text(encoding="utf-8") == "[ERROR] boom\n"
+
+    def test_batch_too_large(self, client, writer):
+        """测试批量日志超过上限返回413"""
+        entries = [log_entry("x")] * 3
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer), \
+                patch.object(settings, "FRONTEND_LOG_BATCH_MAX_SIZE", 2):
+            response = client.post("/api/v1/logs/frontend/batch", json=entries)
+
+        assert response.status_code == 413
+
+    def test_batch_size_checked_before_item_validation(self, client, writer):
+        """测试超过批量上限时在逐条校验前拒绝（无效日志也返回413而不是422）"""
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer), \
+                patch.object(settings, "FRONTEND_LOG_BATCH_MAX_SIZE", 2):
+            response = client.post("/api/v1/logs/frontend/batch", json=[{"level": "INFO"}] * 3)
+
+        assert response.status_code == 413
+
+
+class TestFrontendLogNDJSON:
+    """测试NDJSON批量日志接口"""
+
+    @staticmethod
+    def ndjson(entries) -> bytes:
+        return "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries).encode("utf-8")
+
+    def test_gzip_ndjson_batch(self, client, writer, tmp_path):
+        """测试gzip压缩的NDJSON批量写入，无法解析的行计入rejected"""
+        body = self.ndjson([log_entry(f"消息 {i}") for i in range(300)] + [log_entry("boom", "ERROR")])
+        body += b"not json\n{\"level\": \"INFO\"}\n\n"
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post(
+                "/api/v1/logs/frontend/ndjson",
+                content=gzip.compress(body),
+                headers={"Content-Type": "application/x-ndjson", "Content-Encoding": "gzip"}
+            )
+            writer.stop()
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "success", "accepted": 301, "dropped": 0, "rejected": 2}
+        lines = (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()
+        assert len(lines) == 301
+        assert lines[0] == "[INFO] 消息 0"
+        assert (tmp_path / "error.log").read_text(encoding="utf-8") == "[ERROR] boom\n"
+
+    def test_gzip_detected_without_header(self, client, writer, tmp_path):
+        """测试sendBeacon无法设置Content-Encoding时按gzip文件头识别"""
+        body = gzip.compress(self.ndjson([log_entry("beacon")]))
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post("/api/v1/logs/frontend/ndjson", content=body)
+            writer.stop()
+
+        assert response.json()["accepted"] == 1
+        assert (tmp_path / "app.log").read_text(encoding="utf-8") == "[INFO] beacon\n"
+
+    def test_plain_ndjson(self, client, writer):
+        """测试未压缩的NDJSON（页面卸载时的sendBeacon）"""
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post("/api/v1/logs/frontend/ndjson", content=self.ndjson([log_entry("a"), log_entry("b")]))
+
+        assert response.json()["accepted"] == 2
+
+    def test_decompressed_size_limit(self, client, writer):
+        """测试解压后超过大小上限返回413（防止压缩炸弹）"""
+        body = gzip.compress(b"\n" * 100000)
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer), \
+                patch.object(settings, "FRONTEND_LOG_MAX_BODY_SIZE", 1000):
+            response = client.post(
+                "/api/v1/logs/frontend/ndjson", content=body, headers={"Content-Encoding": "gzip"}
+            )
+
+        assert response.status_code == 413
+
+    def test_invalid_gzip(self, client, writer):
+        """测试无效的gzip数据返回400"""
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            response = client.post(
+                "/api/v1/logs/frontend/ndjson", content=b"not gzip", headers={"Content-Encoding": "gzip"}
+            )
+
+        assert response.status_code == 400
+
+    def test_too_many_entries(self, client, writer):
+        """测试条数超过上限返回413"""
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer), \
+                patch.object(settings, "FRONTEND_LOG_BATCH_MAX_SIZE", 2):
+            response = client.post("/api/v1/logs/frontend/ndjson", content=self.ndjson([log_entry("x")] * 3))
+
+        assert response.status_code == 413
@@ -1,9 +1,14 @@
+import asyncio
+import threading
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
 from app.schemas.heartbeat import HeartbeatRequest, HeartbeatResponse
 from app.models.client import Client
+from app.services.heartbeat_buffer import HeartbeatBuffer
+from app.services.liveness_registry import ClientLivenessRegistry
+from tests.utils import create_test_client
 
 
 class TestHeartbeatAPI:
@@ -40,15 +45,14 @@ class TestHeartbeatAPI:
         response = client.post("/api/v1/client/heartbeat", json={})
         assert response.status_code in [200, 400, 404, 422]  # 端点存在
     
-    @patch('app.crud.crud_client.client.get')
-    @patch('app.crud.crud_client.client.update')
+    @patch('app.crud.crud_client.client.get_async')
+    @patch('app.services.heartbeat_buffer.heartbeat_buffer.add')
     @patch('app.core.websocket_manager.websocket_manager.send_client_status_update')
     @patch('app.core.websocket_manager.websocket_manager.send_heartbeat_received')
-    def test_heartbeat_success(self, mock_heartbeat_notification, mock_status_update, mock_update, mock_get, client, heartbeat_data, mock_client):
-        """测试心跳成功处理"""
+    def test_heartbeat_success(self, mock_heartbeat_notification, mock_status_update, mock_buffer_add, mock_get, client, heartbeat_data, mock_client):
+        """测试心跳成功处理（写入心跳缓冲）"""
         # 设置模拟
         mock_get.return_value = mock_client
-        mock_update.return_value = mock_client
         mock_status_update.return_value = None
         mock_heartbeat_notification.return_value = None
         
@@ -60,10 +64,47 @@ class TestHeartbeatAPI:
         data = response.json()
         assert data["success"] is True
         assert data["message"] == "Heartbeat received successfully"
+        assert data["client_status"] == "online"
         
         # 验证调用
         mock_get.assert_called_once()
+        mock_buffer_add.assert_called_once()
+        assert mock_buffer_add.call_args.kwargs["client_id"] == 1
+    
+    @patch('app.api.api_v1.endpoints.heartbeat.settings.HEARTBEAT_BUFFER_ENABLED', False)
+    @patch('app.crud.crud_client.client.update_fields_async')
+    @patch('app.core.websocket_manager.websocket_manager.send_client_status_update')
+    @patch('app.core.websocket_manager.websocket_manager.send_heartbeat_received')
+    def test_heartbeat_success_unbuffered(self, mock_heartbeat_notification, mock_status_update, mock_update, client, heartbeat_data, mock_client):
+        """测试关闭心跳缓冲时直接更新数据库"""
+        mock_update.return_value = mock_client
+        mock_status_update.return_value = None
+        mock_heartbeat_notification.return_value = None
+        
+        response = client.post("/api/v1/client/heartbeat", json=heartbeat_data)
+        
+        assert response.status_code == 200
+        assert response.json()["success"] is True
         mock_update.assert_called_once()
+        assert mock_update.call_args.kwargs["id"] == 1
+    
+    @patch('app.api.api_v1.endpoints.heartbeat.settings.HEARTBEAT_BUFFER_ENABLED', False)
+    def test_heartbeat_unbuffered_writes_database(self, client, db_session, heartbeat_data):
+        """测试关闭心跳缓冲时通过单条UPDATE写入数据库"""
+        client_id = create_test_client(db_session, status="offline").id
+        heartbeat_data["client_id"] = client_id
+        
+        response = client.post("/api/v1/client/heartbeat", json=heartbeat_data)
+        assert response.status_code == 200
+        
+        db_session.expire_all()
+        db_client = db_session.get(Client, client_id)
+        assert db_client.status == "online"
+        assert db_client.last_heartbeat is not None
+        
+        heartbeat_data["client_id"] = 99999
+        response = client.post("/api/v1/client/heartbeat", json=heartbeat_data)
+        assert response.status_code == 404
     
     def test_heartbeat_client_not_found(self, client, heartbeat_data):
         """测试客户端不存在时的心跳"""
@@ -88,7 +129,7 @@ class TestHeartbeatAPI:
         response = client.get("/api/v1/client/heartbeat/status/1")
         assert response.status_code in [200, 404]  # 端点存在
     
-    @patch('app.crud.crud_client.client.get')
+    @patch('app.crud.crud_client.client.get_async')
     def test_get_status_success(self, mock_get, client, mock_client):
         """测试获取客户端状态成功"""
         mock_get.return_value = mock_client
@@ -109,6 +150,85 @@ class TestHeartbeatAPI:
         assert "not found" in response.json()["detail"].lower()
 
 
+
+class TestHeartbeatBatchAPI:
+    """测试批量心跳API"""
+    
+    @patch('app.api.api_v1.endpoints.heartbeat.settings.HEARTBEAT_BUFFER_ENABLED', False)
+    def test_batch_heartbeat_bulk_update(self, client, db_session):
+        """测试批量心跳一次写入并返回逐项结果"""
+        client_a_id = create_test_client(db_session, status="offline").id
+        client_b_id = create_test_client(db_session, status="offline", version="1.0.0").id
+        now = datetime.utcnow().isoformat()
+        
+        response = client.post("/api/v1/client/heartbeat/batch", json={
+            "heartbeats": [
+                {"client_id": client_a_id, "timestamp": now, "status": "online"},
+                {"client_id": 99999, "timestamp": now},
+                {"client_id": client_b_id, "timestamp": now, "status": "error", "version": "2.0.0"},
+            ]
+        })
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["success"] is False
+        assert data["accepted"] == 2
+        assert data["rejected"] == 1
+        assert [r["success"] for r in data["results"]] == [True, False, True]
+        assert data["results"][1]["message"] == "Client not found"
+        
+        db_session.expire_all()
+        assert db_session.get(Client, client_a_id).status == "online"
+        client_b = db_session.get(Client, client_b_id)
+        assert client_b.status == "error"
+        assert client_b.version == "2.0.0"
+        assert client_b.last_heartbeat is not None
+    
+    @patch('app.services.heartbeat_buffer.heartbeat_buffer.add')
+    def test_batch_heartbeat_buffered(self, mock_buffer_add, client, db_session):
+        """测试启用心跳缓冲时批量心跳写入缓冲"""
+        client_id = create_test_client(db_session).id
+        now = datetime.utcnow().isoformat()
+        
+        response = client.post("/api/v1/client/heartbeat/batch", json={
+            "heartbeats": [
+                {"client_id": client_id, "timestamp": now, "status": "online"},
+                {"client_id": client_id, "timestamp": now, "status": "error"},
+            ]
+        })
+        
+        assert response.status_code == 200
+        assert response.json()["accepted"] == 2
+        mock_buffer_add.assert_called_once()
+        assert mock_buffer_add.call_args.kwargs["status"] == "error"
+    
+    @patch('app.api.api_v1.endpoints.heartbeat.settings.HEARTBEAT_BATCH_MAX_SIZE', 2)
+    def test_batch_heartbeat_too_large(self, client):
+        """测试超过批量上限时拒绝请求"""
+        now = datetime.utcnow().isoformat()
+        response = client.post("/api/v1/client/heartbeat/batch", json={
+            "heartbeats": [{"client_id": i, "timestamp": now} for i in range(3)]
+        })
+        
+        assert response.status_code == 413
+    
+    @patch('app.api.api_v1.endpoints.heartbeat.settings.HEARTBEAT_BATCH_MAX_SIZE', 2)
+    def test_batch_size_checked_before_item_validation(self, client):
+        """测试超过批量上限时在逐条校验前拒绝（无效心跳也返回413而不是422）"""
+        response = client.post("/api/v1/client/heartbeat/batch", json={
+            "heartbeats": [{"client_id": "invalid", "timestamp": "invalid date"}] * 3
+        })
+        
+        assert response.status_code == 413
+    
+    def test_batch_heartbeat_invalid_item(self, client):
+        """测试批量中存在无效心跳时返回验证错误"""
+        response = client.post("/api/v1/client/heartbeat/batch", json={
+            "heartbeats": [{"client_id": "invalid", "timestamp": "invalid date"}]
+        })
+        
+        assert response.status_code == 422
+
 class TestHeartbeatSchemas:
     """测试心跳数据模型"""
     
@@ -151,4 +271,237 @@ class TestHeartbeatSchemas:
         
         assert response.success is True
         assert response.message == "Test message"
-        assert isinstance(response.timestamp, datetime)
\ No newline at end of file
+        assert isinstance(response.timestamp, datetime)
+
+
+class TestHeartbeatBuffer:
+    """测试心跳写缓冲"""
+    
+    def test_coalesces_beats_per_client(self):
+        """测试同一客户端的多次心跳合并为一条（后写覆盖）"""
+        buffer = HeartbeatBuffer(flush_interval_ms=1000, max_size=100)
+        first = datetime(2024, 1, 1, 0, 0, 0)
+        second = datetime(2024, 1, 1, 0, 0, 30)
+        
+        buffer.add(client_id=1, status="online", last_heartbeat=first, version="1.0.0", ip_address="10.0.0.1")
+        buffer.add(client_id=1, status="error", last_heartbeat=second)
+        buffer.add(client_id=2, status="online", last_heartbeat=second)
+        
+        assert buffer.pending_count == 2
+        assert buffer.stats["received"] == 3
+        entry = buffer._pending[1]
+        assert entry["status"] == "error"
+        assert entry["last_heartbeat"] == second
+        assert entry["version"] == "1.0.0"
+        assert entry["ip_address"] == "10.0.0.1"
+    
+    def test_flush_writes_bulk_update(self, db_session):
+        """测试刷新时批量写入数据库"""
+        client_a_id = create_test_client(db_session, status="offline", version="1.0.0").id
+        client_b_id = create_test_client(db_session, status="offline", version="1.0.0").id
+        beat_time = datetime(2024, 1, 1, 12, 0, 0)
+        
+        buffer = HeartbeatBuffer(session_factory=lambda: db_session)
+        buffer.add(client_id=client_a_id, status="online", last_heartbeat=beat_time, version="2.0.0")
+        buffer.add(client_id=client_b_id, status="online", last_heartbeat=beat_time)
+        
+        assert buffer.flush_sync() == 2
+        assert buffer.pending_count == 0
+        assert buffer.stats["flushes"] == 1
+        
+        refreshed_a = db_session.get(Client, client_a_id)
+        refreshed_b = db_session.get(Client, client_b_id)
+        assert refreshed_a.status == "online"
+        assert refreshed_a.version == "2.0.0"
+        assert refreshed_a.last_heartbeat == beat_time
+        assert refreshed_b.status == "online"
+        assert refreshed_b.version == "1.0.0"
+    
+    def test_failed_flush_keeps_newer_beats(self):
+        """测试刷新失败时保留数据且不覆盖更新的心跳"""
+        failing_session = MagicMock()
+        failing_session.execute.side_effect = RuntimeError("database unavailable")
+        buffer = HeartbeatBuffer(session_factory=lambda: failing_session)
+        old_time = datetime(2024, 1, 1, 0, 0, 0)
+        
+        buffer.add(client_id=1, status="online", last_heartbeat=old_time, version="1.0.0")
+        assert buffer.flush_sync() == 0
+        assert buffer.stats["errors"] == 1
+        assert buffer._pending[1]["last_heartbeat"] == old_time
+        
+        new_time = datetime(2024, 1, 1, 0, 1, 0)
+        buffer.add(client_id=1, status="online", last_heartbeat=new_time)
+        buffer._restore({1: {"status": "offline", "last_heartbeat": old_time, "version": None, "ip_address": None}})
+        assert buffer._pending[1]["last_heartbeat"] == new_time
+        assert buffer._pending[1]["version"] == "1.0.0"
+    
+    def test_restore_bounded_by_max_size(self):
+        """测试刷新失败后放回的心跳不超过max_size，多出的最旧心跳计入丢弃"""
+        buffer = HeartbeatBuffer(max_size=3)
+        base = datetime(2024, 1, 1, 0, 0, 0)
+        buffer.add(client_id=1, status="online", last_heartbeat=base + timedelta(minutes=10))
+        
+        failed = {
+            client_id: {"status": "online", "last_heartbeat": base + timedelta(minutes=client_id),
+                        "version": None, "ip_address": None}
+            for client_id in range(1, 6)
+        }
+        buffer._restore(failed)
+        
+        # 客户端1已有更新的心跳，始终合并；其余只补满到max_size，保留最新的
+        assert sorted(buffer._pending) == [1, 4, 5]
+        assert buffer._pending[1]["last_heartbeat"] == base + timedelta(minutes=10)
+        assert buffer.stats["dropped"] == 2
+    
+    @pytest.mark.asyncio
+    async def test_stop_waits_for_inflight_flush(self):
+        """测试停止时等待执行中的刷新完成后再做最后一次刷新，两者不并发"""
+        entered = threading.Event()
+        release = threading.Event()
+        active = []
+        overlaps = []
+        
+        def execute(*args, **kwargs):
+            overlaps.append(len(active))
+            active.append(1)
+            entered.set()
+            release.wait(5)
+            active.pop()
+            return MagicMock(rowcount=1)
+        
+        session = MagicMock()
+        session.execute.side_effect = execute
+        buffer = HeartbeatBuffer(flush_interval_ms=10, session_factory=lambda: session)
+        
+        buffer.start()
+        buffer.add(client_id=1, status="online", last_heartbeat=datetime(2024, 1, 1))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, entered.wait, 5)
+        buffer.add(client_id=2, status="online", last_heartbeat=datetime(2024, 1, 1))
+        loop.call_later(0.05, release.set)
+        await buffer.stop()
+        
+        assert overlaps == [0, 0]
+        assert buffer.stats["flushed"] == 2
+        assert buffer.pending_count == 0
+
+
+
+class TestLivenessRegistry:
+    """测试客户端内存存活表"""
+    
+    def test_load_and_get(self, db_session):
+        """测试从数据库加载并读取"""
+        client_id = create_test_client(db_session, status="offline").id
+        registry = ClientLivenessRegistry()
+        
+        assert registry.load(db_session) == 1
+        entry = registry.get(client_id)
+        assert entry is not None
+        assert entry.status == "offline"
+        assert registry.get(99999) is None
+        assert registry.get_info() == {"clients": 1, "hits": 1, "misses": 1, "expired": 0}
+    
+    def test_record_heartbeat_updates_entry(self, db_session):
+        """测试心跳只更新内存记录"""
+        client_id = create_test_client(db_session, status="offline", version="1.0.0").id
+        registry = ClientLivenessRegistry()
+        registry.get_or_load(db_session, client_id)
+        beat_time = datetime(2024, 1, 1, 12, 0, 0)
+        
+        entry = registry.record_heartbeat(client_id, status="online", last_heartbeat=beat_time, version="2.0.0")
+        assert entry.status == "online"
+        assert entry.version == "2.0.0"
+        assert entry.last_heartbeat == beat_time
+        assert registry.record_heartbeat(99999, status="online", last_heartbeat=beat_time) is None
+        
+        # 数据库不受影响，直到心跳缓冲刷新
+        assert db_session.get(Client, client_id).status == "offline"
+    
+    def test_expired_record_reloaded_after_out_of_band_change(self, db_session):
+        """测试其他进程修改数据库后，过期的记录重新从数据库加载"""
+        from app.crud.crud_client import client as client_crud
+        
+        client_id = create_test_client(
+            db_session, status="online", last_heartbeat=datetime.utcnow() - timedelta(minutes=5)
+        ).id
+        now = [0.0]
+        registry = ClientLivenessRegistry(ttl=10, timer=lambda: now[0])
+        registry.get_or_load(db_session, client_id)
+        
+        # 模拟另一个worker的超时监控把客户端标记为离线（集合式UPDATE，不触发本进程的ORM事件）
+        client_crud.mark_offline(db_session, threshold=datetime.utcnow(), client_ids=[client_id])
+        now[0] = 5
+        assert registry.get_or_load(db_session, client_id).status == "online"
+        
+        now[0] = 10
+        assert registry.get_or_load(db_session, client_id).status == "offline"
+        assert registry.stats["expired"] == 1
+    
+    def test_local_writes_keep_record_fresh(self, db_session):
+        """测试本进程写入的心跳刷新记录有效期"""
+        client_id = create_test_client(db_session, status="offline").id
+        now = [0.0]
+        registry = ClientLivenessRegistry(ttl=10, timer=lambda: now[0])
+        registry.get_or_load(db_session, client_id)
+        
+        now[0] = 8
+        registry.record_heartbeat(client_id, status="online", last_heartbeat=datetime.utcnow())
+        now[0] = 15
+        assert registry.get(client_id).status == "online"
+    
+    def test_get_many_or_load(self, db_session):
+        """测试批量获取时未命中的一次加载"""
+        ids = [create_test_client(db_session).id for _ in range(3)]
+        registry = ClientLivenessRegistry()
+        registry.get_or_load(db_session, ids[0])
+        
+        found = registry.get_many_or_load(db_session, ids + [99999])
+        assert set(found) == set(ids)
+        assert len(registry) == 3
+    
+    def test_status_endpoint_served_from_registry(self, client, db_session):
+        """测试状态查询返回尚未刷新到数据库的心跳"""
+        client_id = create_test_client(db_session, status="offline").id
+        
+        with patch('app.services.heartbeat_buffer.heartbeat_buffer.add'):
+            response = client.post("/api/v1/client/heartbeat", json={
+                "client_id": client_id,
+                "timestamp": datetime.utcnow().isoformat(),
+                "status": "online"
+            })
+        assert response.status_code == 200
+        
+        with patch('app.crud.crud_client.client.get_async') as mock_get:
+            response = client.get(f"/api/v1/client/heartbeat/status/{client_id}")
+            mock_get.assert_not_called()
+        
+        assert response.status_code == 200
+        assert response.json()["status"] == "online"
+        assert response.json()["last_heartbeat"] is not None
+    
+    def test_orm_update_and_delete_invalidate(self, db_session):
+        """测试通过ORM更新或删除客户端后存活表记录失效"""
+        from app.crud.crud_client import client as client_crud
+        
+        db_client = create_test_client(db_session, version="1.0.0")
+        registry = ClientLivenessRegistry()
+        with patch("app.services.liveness_registry.liveness_registry", registry):
+            registry.get_or_load(db_session, db_client.id)
+            client_crud.update(db_session, db_obj=db_client, obj_in={"version": "2.0.0"})
+            assert db_client.id not in registry
+            assert registry.get_or_load(db_session, db_client.id).version == "2.0.0"
+            
+            client_crud.remove(db_session, id=db_client.id)
+            assert db_client.id not in registry
+            assert registry.get_or_load(db_session, db_client.id) is None
+    
+    def test_client_fixture_uses_test_database(self, client, db_session):
+        """测试应用启动时加载存活表使用的是测试数据库"""
+        from app.services.liveness_registry import liveness_registry
+        from app.services.monitoring import monitoring_service
+        
+        test_url = db_session.get_bind().url
+        for factory in (liveness_registry.session_factory, monitoring_service.session_factory):
+            with factory() as session:
+                assert session.get_bind().url == test_url
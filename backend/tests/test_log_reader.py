@@ -0,0 +1,224 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app.services.frontend_log_writer import FrontendLogWriter
+from app.services.log_reader import LogStatsCache, read_from_offset, tail_lines
+
+
+def write_lines(path, count, start=0):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(start, start + count):
+            f.write(f"第{i}行\n")
+
+
+class TestTailLines:
+    """测试从文件末尾按块读取"""
+
+    @pytest.mark.parametrize("block_size", [7, 64, 64 * 1024])
+    def test_last_lines(self, tmp_path, block_size):
+        """测试只返回最后N行，块大小不影响结果"""
+        path = tmp_path / "app.log"
+        write_lines(path, 1000)
+
+        chunk = tail_lines(path, 3, block_size=block_size)
+
+        assert chunk.content.decode("utf-8") == "第997行\n第998行\n第999行\n"
+        assert chunk.line_count == 3
+        assert chunk.end_offset == os.path.getsize(path)
+        assert chunk.start_offset == chunk.end_offset - len(chunk.content)
+
+    def test_reads_only_needed_blocks(self, tmp_path):
+        """测试只读取末尾少量数据而不是整个文件"""
+        path = tmp_path / "app.log"
+        write_lines(path, 100000)
+
+        chunk = tail_lines(path, 10, block_size=4096)
+
+        assert chunk.line_count == 10
+        assert os.path.getsize(path) - chunk.start_offset < 4096
+
+    def test_fewer_lines_than_requested(self, tmp_path):
+        """测试文件行数不足时返回全部内容"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"a\nb")
+
+        chunk = tail_lines(path, 10, block_size=2)
+
+        assert chunk.content == b"a\nb"
+        assert chunk.start_offset == 0
+        assert chunk.line_count == 2
+
+    def test_empty_file(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.touch()
+
+        chunk = tail_lines(path, 10)
+
+        assert chunk.content == b""
+        assert chunk.line_count == 0
+
+
+class TestReadFromOffset:
+    """测试按偏移量跟踪追加内容"""
+
+    def test_follow_appended_lines(self, tmp_path):
+        """测试只返回上次位置之后追加的完整行"""
+        path = tmp_path / "app.log"
+        write_lines(path, 5)
+        first = tail_lines(path, 5)
+
+        with open(path, "ab") as f:
+            f.write("新的一行\n未完成".encode("utf-8"))
+        chunk = read_from_offset(path, first.end_offset, 1024, first.file_id)
+
+        assert chunk.content.decode("utf-8") == "新的一行\n"
+        assert chunk.reset is False
+
+        with open(path, "ab") as f:
+            f.write(b"\n")
+        chunk = read_from_offset(path, chunk.end_offset, 1024, chunk.file_id)
+        assert chunk.content.decode("utf-8") == "未完成\n"
+
+    def test_max_bytes(self, tmp_path):
+        """测试单次最多返回max_bytes字节，剩余内容下次读取"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"aaaa\nbbbb\ncccc\n")
+
+        chunk = read_from_offset(path, 0, 12)
+        assert chunk.content == b"aaaa\nbbbb\n"
+        chunk = read_from_offset(path, chunk.end_offset, 12)
+        assert chunk.content == b"cccc\n"
+
+    def test_rotation_resets(self, tmp_path):
+        """测试文件滚动后从头读取并标记reset"""
+        path = tmp_path / "app.log"
+        write_lines(path, 5)
+        previous = tail_lines(path, 1)
+
+        os.replace(path, tmp_path / "app.log.1")
+        path.write_bytes(b"rotated\n")
+        chunk = read_from_offset(path, 3, 1024, previous.file_id)
+
+        assert chunk.reset is True
+        assert chunk.content == b"rotated\n"
+
+    def test_truncation_resets(self, tmp_path):
+        """测试文件被截断（小于偏移量）时从头读取"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"short\n")
+
+        chunk = read_from_offset(path, 1000, 1024)
+
+        assert chunk.reset is True
+        assert chunk.content == b"short\n"
+
+
+class TestLogStatsCache:
+    """测试增量文件统计缓存"""
+
+    def test_unchanged_file_served_from_cache(self, tmp_path):
+        """测试文件未变化时不重新读取"""
+        path = tmp_path / "app.log"
+        write_lines(path, 100)
+        cache = LogStatsCache()
+
+        assert cache.get(path).lines == 100
+        assert cache.get(path).lines == 100
+
+        assert cache.stats == {"hits": 1, "incremental": 0, "full_scans": 1}
+
+    def test_appended_lines_counted_incrementally(self, tmp_path):
+        """测试文件增长时只统计新增部分，包括未以换行结尾的最后一行"""
+        path = tmp_path / "app.log"
+        path.write_bytes(b"a\nb")
+        cache = LogStatsCache(block_size=2)
+        assert cache.get(path).lines == 2
+
+        with open(path, "ab") as f:
+            f.write(b"c\nd\n")
+        stats = cache.get(path)
+
+        assert stats.lines == 3
+        assert stats.offset == stats.size == 7
+        assert cache.stats["incremental"] == 1
+
+    def test_rotated_file_rescanned(self, tmp_path):
+        """测试文件滚动或截断后重新统计"""
+        path = tmp_path / "app.log"
+        write_lines(path, 10)
+        cache = LogStatsCache()
+        cache.get(path)
+
+        os.replace(path, tmp_path / "app.log.1")
+        path.write_bytes(b"new\n")
+
+        assert cache.get(path).lines == 1
+        assert cache.stats["full_scans"] == 2
+
+    def test_prune(self, tmp_path):
+        path = tmp_path / "app.log"
+        path.write_bytes(b"a\n")
+        cache = LogStatsCache()
+        cache.get(path)
+
+        cache.prune([])
+
+        assert cache._entries == {}
+
+
+class TestLogFileAPI:
+    """测试日志文件查看接口"""
+
+    @pytest.fixture
+    def log_dir(self, tmp_path):
+        writer = FrontendLogWriter(log_dir=tmp_path)
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            yield tmp_path
+
+    def test_tail_and_follow(self, client, log_dir):
+        """测试先读取末尾N行，再用offset只拉取新增内容"""
+        write_lines(log_dir / "app.log", 50)
+
+        response = client.get("/api/v1/logs/frontend/app.log?lines=2")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["content"] == "第48行\n第49行\n"
+        assert data["returned_lines"] == 2
+        assert data["total_lines"] == 50
+
+        write_lines(log_dir / "app.log", 2, start=50)
+        response = client.get(
+            "/api/v1/logs/frontend/app.log",
+            params={"offset": data["offset"], "file_id": data["file_id"]}
+        )
+        follow = response.json()
+        assert follow["content"] == "第50行\n第51行\n"
+        assert follow["returned_lines"] == 2
+        assert follow["reset"] is False
+        assert follow["offset"] == os.path.getsize(log_dir / "app.log")
+
+    def test_stats(self, client, log_dir):
+        """测试统计接口返回各文件的大小和行数"""
+        write_lines(log_dir / "app.log", 20)
+        (log_dir / "error.log").write_bytes(b"boom\n")
+
+        data = client.get("/api/v1/logs/frontend/stats").json()
+
+        assert data["files"]["app.log"]["lines"] == 20
+        assert data["files"]["error.log"] == {
+            "size": 5,
+            "modified": data["files"]["error.log"]["modified"],
+            "lines": 1
+        }
+        assert data["total_size"] == os.path.getsize(log_dir / "app.log") + 5
+
+    def test_missing_file(self, client, log_dir):
+        """测试文件不存在返回404"""
+        assert client.get("/api/v1/logs/frontend/missing.log").status_code == 404
+
+    def test_rejects_path_traversal(self, client, log_dir):
+        """测试拒绝访问日志目录之外的文件"""
+        assert client.get("/api/v1/logs/frontend/..%2F..%2Fapp.db").status_code in (400, 404)
+        assert client.get("/api/v1/logs/frontend/.hidden").status_code == 400
@@ -0,0 +1,239 @@
+import logging
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from app.core.log_store import LogStore
+from app.core.logger import LogStoreHandler
+from app.core.security import jwt_handler
+from app.services.frontend_log_writer import FrontendLogWriter
+from tests.utils import create_test_admin
+
+BASE_TS = datetime(2024, 1, 1, 0, 0, 0).timestamp()
+
+
+def make_records(count, start=0, level="INFO", logger="api", source="backend"):
+    return [
+        {
+            "ts": BASE_TS + i,
+            "level": level,
+            "logger": logger,
+            "message": f"请求 {i}",
+            "source": source
+        }
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LogStore(directory=tmp_path / "store", segment_max_bytes=64 * 1024, block_records=100, max_segments=100)
+    yield store
+    store.close()
+
+
+class TestLogStore:
+    """测试分段结构化日志存储"""
+
+    def test_time_range_uses_sparse_index(self, store):
+        """测试时间范围查询只读取覆盖该范围的块"""
+        store.append(make_records(5000))
+
+        result = store.query(
+            start=datetime.fromtimestamp(BASE_TS + 4200),
+            end=datetime.fromtimestamp(BASE_TS + 4250),
+            limit=1000
+        )
+
+        assert [r["message"] for r in result["records"]] == [f"请求 {i}" for i in range(4250, 4199, -1)]
+        assert result["total_blocks"] >= 50
+        assert result["scanned_blocks"] == 1
+        assert result["total_segments"] > 1
+        assert result["scanned_segments"] == 1
+
+    def test_level_filter_skips_blocks(self, store):
+        """测试最低级别过滤跳过不含该级别的块"""
+        store.append(make_records(1000))
+        store.append(make_records(1, start=1000, level="ERROR"))
+        store.append(make_records(1000, start=1001))
+
+        result = store.query(level="WARNING")
+
+        assert [r["message"] for r in result["records"]] == ["请求 1000"]
+        assert result["scanned_blocks"] == 1
+
+    def test_frontend_warn_matches_warning(self, store):
+        """测试前端的WARN级别按WARNING处理"""
+        store.append(make_records(1, level="WARN", source="frontend"))
+
+        assert len(store.query(level="WARNING")["records"]) == 1
+        assert store.query(level="ERROR")["records"] == []
+
+    def test_logger_source_and_substring(self, store):
+        """测试按日志器（含子日志器）、来源和消息子串过滤"""
+        store.append(make_records(300, logger="api"))
+        store.append(make_records(3, start=300, logger="auth.jwt"))
+        store.append(make_records(3, start=303, logger="App", source="frontend"))
+
+        assert len(store.query(logger="auth")["records"]) == 3
+        assert len(store.query(logger="aut")["records"]) == 0
+        assert len(store.query(source="frontend")["records"]) == 3
+        assert [r["message"] for r in store.query(q="请求 12", limit=3)["records"]] == [
+            "请求 129", "请求 128", "请求 127"
+        ]
+        assert store.query(logger="auth")["scanned_blocks"] == 1
+
+    def test_limit_returns_newest_first(self, store):
+        """测试按写入顺序从新到旧返回并标记截断"""
+        store.append(make_records(10))
+
+        result = store.query(limit=3)
+
+        assert [r["message"] for r in result["records"]] == ["请求 9", "请求 8", "请求 7"]
+        assert result["truncated"] is True
+        assert result["records"][0]["timestamp"] == datetime.fromtimestamp(BASE_TS + 9).isoformat()
+
+    def test_not_truncated_when_exactly_limit_match(self, store):
+        """测试恰好limit条记录匹配时不标记截断"""
+        store.append(make_records(10))
+
+        result = store.query(limit=10)
+
+        assert len(result["records"]) == 10
+        assert result["truncated"] is False
+        assert store.query(limit=9)["truncated"] is True
+
+    def test_retention(self, tmp_path):
+        """测试超出保留数量的旧段被删除"""
+        store = LogStore(directory=tmp_path, segment_max_bytes=4096, block_records=10, max_segments=3)
+        store.append(make_records(1000))
+        store.close()
+
+        assert len(list(tmp_path.glob("segment-*.ndjson"))) == 3
+        assert len(list(tmp_path.glob("segment-*.idx"))) == 3
+        assert len(LogStore(directory=tmp_path).query(limit=1000)["records"]) < 1000
+
+    def test_reopen_loads_index_and_reads_unindexed_tail(self, tmp_path):
+        """测试重新打开后加载索引，异常退出留下的未建索引尾部可以查询，不完整的最后一行被忽略"""
+        store = LogStore(directory=tmp_path, block_records=100)
+        store.append(make_records(250))
+        store.flush()
+        # 模拟异常退出：最后50条未写入索引，并留下半行数据
+        with open(store._active.data_path, "ab") as f:
+            f.write(b'{"ts": 1, "lev')
+
+        reopened = LogStore(directory=tmp_path, block_records=100)
+        result = reopened.query(limit=1000)
+        reopened.append(make_records(1, start=250))
+        reopened.close()
+
+        assert len(result["records"]) == 250
+        assert result["total_blocks"] == 3
+        assert len(LogStore(directory=tmp_path).query(limit=1000)["records"]) == 251
+        assert len(list(tmp_path.glob("segment-*.ndjson"))) == 2
+
+    def test_multiple_writers_share_directory(self, tmp_path):
+        """测试多个进程（写入者）共用目录时各写各的段，查询结果不重复不丢失"""
+        first = LogStore(directory=tmp_path, block_records=4)
+        second = LogStore(directory=tmp_path, block_records=4)
+        for i in range(20):
+            (first if i % 2 == 0 else second).append([{
+                "ts": BASE_TS + i, "level": "INFO", "logger": "api", "message": f"m{i}", "source": "backend"
+            }])
+
+        for store in (first, second):
+            messages = [r["message"] for r in store.query(limit=100)["records"]]
+            assert sorted(messages) == sorted(f"m{i}" for i in range(20))
+        first.close()
+        second.close()
+
+        assert sorted(r["message"] for r in LogStore(directory=tmp_path).query(limit=100)["records"]) == \
+            sorted(f"m{i}" for i in range(20))
+
+    def test_closed_segment_not_indexed_twice(self, store):
+        """测试关闭后重新写入时不会重复加载本进程已有的索引"""
+        store.append(make_records(250))
+        store.close()
+        store.append(make_records(1, start=250))
+
+        assert len(store.query(limit=1000)["records"]) == 251
+
+
+class TestLogStoreIntegration:
+    """测试日志子系统写入结构化存储"""
+
+    def test_backend_handler(self, store):
+        """测试后端日志记录写入存储"""
+        handler = LogStoreHandler(store)
+        test_logger = logging.getLogger("tests.log_store")
+        test_logger.addHandler(handler)
+        test_logger.propagate = False
+        try:
+            test_logger.warning("磁盘空间不足: %s", "/data")
+        finally:
+            test_logger.removeHandler(handler)
+            test_logger.propagate = True
+
+        record = store.query(source="backend")["records"][0]
+        assert record["message"] == "磁盘空间不足: /data"
+        assert record["level"] == "WARNING"
+        assert record["logger"] == "tests.log_store"
+
+    def test_frontend_writer_appends_records(self, store, tmp_path):
+        """测试前端日志写缓冲同时写入结构化存储"""
+        writer = FrontendLogWriter(log_dir=tmp_path / "frontend", store=store)
+        writer.write("ERROR", "[ERROR] boom", {"ts": BASE_TS, "level": "ERROR", "logger": "App",
+                                               "message": "boom", "source": "frontend"})
+        writer.write("INFO", "[INFO] plain")
+        writer.stop()
+
+        records = store.query(source="frontend")["records"]
+        assert [r["message"] for r in records] == ["boom"]
+
+    @pytest.fixture
+    def auth_headers(self, db_session):
+        admin = create_test_admin(db_session)
+        return {"Authorization": f"Bearer {jwt_handler.create_access_token(subject=admin.username)}"}
+
+    def test_query_api(self, client, store, auth_headers):
+        """测试查询接口"""
+        store.append(make_records(200))
+        store.append(make_records(1, start=200, level="ERROR", logger="App", source="frontend"))
+
+        with patch("app.api.api_v1.endpoints.logs.log_store", store):
+            response = client.get("/api/v1/logs/query", params={
+                "start": datetime.fromtimestamp(BASE_TS + 150).isoformat(),
+                "level": "error",
+                "source": "frontend",
+                "q": "请求"
+            }, headers=auth_headers)
+            invalid = client.get("/api/v1/logs/query", params={"level": "LOUD"}, headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert [r["message"] for r in data["records"]] == ["请求 200"]
+        assert data["scanned_blocks"] == 1
+        assert invalid.status_code == 400
+
+    def test_query_requires_admin(self, client, store):
+        """测试查询接口和存储信息接口需要管理员认证"""
+        with patch("app.api.api_v1.endpoints.logs.log_store", store):
+            assert client.get("/api/v1/logs/query").status_code in (401, 403)
+            assert client.get("/api/v1/logs/store").status_code in (401, 403)
+
+    def test_ndjson_endpoint_stores_records(self, client, store, tmp_path):
+        """测试NDJSON接口写入的日志可以被查询"""
+        writer = FrontendLogWriter(log_dir=tmp_path / "frontend", store=store)
+        body = (
+            '{"timestamp": "2024-01-01T00:00:00Z", "level": "WARN", "logger": "UI", '
+            '"message": "按钮点击过慢", "logLine": "[WARN] UI: 按钮点击过慢"}\n'
+        ).encode("utf-8")
+        with patch("app.api.api_v1.endpoints.logs.frontend_log_writer", writer):
+            client.post("/api/v1/logs/frontend/ndjson", content=body)
+            writer.stop()
+
+        record = store.query(logger="UI")["records"][0]
+        assert record["message"] == "按钮点击过慢"
+        assert record["level"] == "WARN"
+        assert record["client_timestamp"] == "2024-01-01T00:00:00Z"
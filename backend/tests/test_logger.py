@@ -0,0 +1,86 @@
+import logging
+import queue
+from logging.handlers import QueueListener
+
+from app.core.logger import DroppingQueueHandler, logger_manager
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.makeLogRecord({
+        "name": "test",
+        "levelno": level,
+        "levelname": logging.getLevelName(level),
+        "msg": message,
+    })
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class TestDroppingQueueHandler:
+    """测试有界日志队列"""
+
+    def test_drops_when_full_and_counts_by_level(self):
+        """测试队列满时丢弃日志并按级别计数，不阻塞调用方"""
+        handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+        handler.handle(make_record("a"))
+        handler.handle(make_record("b"))
+        handler.handle(make_record("c"))
+        handler.handle(make_record("d", logging.ERROR))
+
+        assert handler.queue.qsize() == 2
+        assert handler.dropped == 2
+        assert handler.dropped_by_level == {"INFO": 1, "ERROR": 1}
+
+    def test_reports_drops_once_queue_drains(self):
+        """测试队列恢复后补发一条丢弃数量的警告"""
+        log_queue = queue.Queue(maxsize=2)
+        handler = DroppingQueueHandler(log_queue)
+        for message in ("a", "b", "c", "d"):
+            handler.handle(make_record(message))
+        log_queue.get_nowait()
+        log_queue.get_nowait()
+
+        handler.handle(make_record("e"))
+
+        messages = [log_queue.get_nowait().getMessage() for _ in range(log_queue.qsize())]
+        assert messages == ["e", "日志队列已满，丢弃了 2 条日志"]
+
+    def test_listener_delivers_records(self):
+        """测试后台监听线程把记录交给实际处理器"""
+        log_queue = queue.Queue(maxsize=100)
+        handler = DroppingQueueHandler(log_queue)
+        sink = CollectingHandler()
+        listener = QueueListener(log_queue, sink, respect_handler_level=True)
+        listener.start()
+        try:
+            for i in range(10):
+                handler.handle(make_record(f"message {i}"))
+        finally:
+            listener.stop()
+
+        assert sink.messages == [f"message {i}" for i in range(10)]
+
+
+class TestLoggerManager:
+    """测试日志管理器的队列配置"""
+
+    def test_root_logger_only_has_queue_handler(self):
+        """测试根日志器只挂载队列处理器，文件写入由监听线程完成"""
+        root_handlers = logging.getLogger().handlers
+        assert logger_manager.queue_handler in root_handlers
+        assert not any(handler in root_handlers for handler in logger_manager.handlers)
+
+    def test_queue_stats(self):
+        """测试队列统计信息"""
+        stats = logger_manager.get_queue_stats()
+
+        assert stats["enabled"] is True
+        assert stats["max_size"] > 0
+        assert stats["dropped"] >= 0
@@ -0,0 +1,113 @@
+import pytest
+from datetime import datetime, timedelta
+
+from app.models.client import Client
+from app.services.monitoring import ClientMonitoringService
+from tests.utils import create_test_client
+
+
+class TestDeadlineHeap:
+    """测试基于截止时间堆的超时检测"""
+
+    @pytest.fixture
+    def service(self):
+        service = ClientMonitoringService()
+        service.heartbeat_timeout = 60
+        return service
+
+    def test_only_expired_clients_are_popped(self, service):
+        """测试每次只取出已到期的客户端"""
+        base = datetime(2024, 1, 1, 0, 0, 0)
+        service.record_heartbeat(1, "online", base)
+        service.record_heartbeat(2, "online", base + timedelta(seconds=10))
+        service.record_heartbeat(3, "online", base + timedelta(seconds=20))
+
+        assert service.pop_expired(base + timedelta(seconds=59)) == []
+        assert service.pop_expired(base + timedelta(seconds=71)) == [1, 2]
+        assert service.tracked_count == 1
+        assert service.pop_expired(base + timedelta(seconds=80)) == [3]
+
+    def test_new_heartbeat_reschedules_deadline(self, service):
+        """测试新心跳使旧截止时间失效"""
+        base = datetime(2024, 1, 1, 0, 0, 0)
+        service.record_heartbeat(1, "online", base)
+        service.record_heartbeat(1, "online", base + timedelta(seconds=30))
+
+        assert service.pop_expired(base + timedelta(seconds=61)) == []
+        assert service.pop_expired(base + timedelta(seconds=91)) == [1]
+
+    def test_non_online_heartbeat_stops_tracking(self, service):
+        """测试非在线状态的心跳不再参与超时检测"""
+        base = datetime(2024, 1, 1, 0, 0, 0)
+        service.record_heartbeat(1, "online", base)
+        service.record_heartbeat(1, "error", base + timedelta(seconds=1))
+
+        assert service.tracked_count == 0
+        assert service.pop_expired(base + timedelta(seconds=120)) == []
+
+    def test_mark_clients_offline_bulk(self, service, db_session):
+        """测试到期客户端通过一条UPDATE标记为离线"""
+        stale_time = datetime.utcnow() - timedelta(seconds=120)
+        stale_id = create_test_client(db_session, status="online", last_heartbeat=stale_time).id
+        fresh_id = create_test_client(db_session, status="online", last_heartbeat=datetime.utcnow()).id
+        threshold = datetime.utcnow() - timedelta(seconds=60)
+
+        service.session_factory = lambda: db_session
+        rows = service._mark_clients_offline_sync(threshold, [stale_id, fresh_id])
+
+        assert [row.id for row in rows] == [stale_id]
+        assert rows[0].last_heartbeat == stale_time
+        assert db_session.get(Client, stale_id).status == "offline"
+        assert db_session.get(Client, fresh_id).status == "online"
+
+
+class TestSweepMode:
+    """测试集合式超时扫描"""
+
+    def test_sweep_marks_all_timed_out_clients(self, db_session):
+        """测试一条UPDATE将所有超时客户端标记为离线并返回行"""
+        stale_time = datetime.utcnow() - timedelta(seconds=300)
+        stale_ids = [
+            create_test_client(db_session, status="online", last_heartbeat=stale_time).id
+            for _ in range(3)
+        ]
+        fresh_id = create_test_client(db_session, status="online", last_heartbeat=datetime.utcnow()).id
+        offline_id = create_test_client(db_session, status="offline", last_heartbeat=stale_time).id
+
+        service = ClientMonitoringService(session_factory=lambda: db_session)
+        service.mode = "sweep"
+        threshold = datetime.utcnow() - timedelta(seconds=60)
+        rows = service._mark_clients_offline_sync(threshold)
+
+        assert sorted(row.id for row in rows) == stale_ids
+        assert all(row.name for row in rows)
+        for client_id in stale_ids:
+            assert db_session.get(Client, client_id).status == "offline"
+        assert db_session.get(Client, fresh_id).status == "online"
+        assert db_session.get(Client, offline_id).status == "offline"
+
+    def test_sweep_mode_ignores_deadlines(self):
+        """测试sweep模式下心跳不进入截止时间堆"""
+        service = ClientMonitoringService()
+        service.mode = "sweep"
+        service.record_heartbeat(1, "online", datetime.utcnow())
+
+        assert service.tracked_count == 0
+
+
+class TestDeadlineSeeding:
+    """测试启动时从数据库初始化截止时间"""
+
+    def test_seed_tracks_online_clients_from_database(self, db_session):
+        """测试重启前在线、之后不再上报心跳的客户端也会超时"""
+        stale_time = datetime.utcnow() - timedelta(seconds=120)
+        online_id = create_test_client(db_session, status="online", last_heartbeat=stale_time).id
+        create_test_client(db_session, status="offline", last_heartbeat=stale_time)
+        create_test_client(db_session, status="online", last_heartbeat=None)
+
+        service = ClientMonitoringService(session_factory=lambda: db_session)
+        service.heartbeat_timeout = 60
+
+        assert service.seed_from_database() == 2
+        assert service.tracked_count == 1
+        assert service.pop_expired(datetime.utcnow()) == [online_id]
@@ -0,0 +1,153 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.security import jwt_handler
+from app.crud import client as client_crud
+from app.crud.base import InvalidCursorError, encode_cursor
+from app.models.client import Client
+from app.schemas.client import ClientCreate
+from tests.utils import create_test_admin, create_test_client, create_test_task
+
+
+def create_clients(db_session, count):
+    """批量创建客户端（时间戳使用模型默认值，同一秒内创建的行依靠id保证顺序稳定）"""
+    clients = [
+        Client(
+            name=f"client-{i}",
+            ip_address="10.0.0.1",
+            version="1.0.0",
+            status="online" if i % 2 else "offline"
+        )
+        for i in range(count)
+    ]
+    db_session.add_all(clients)
+    db_session.commit()
+    return clients
+
+
+class TestKeysetPagination:
+    """测试CRUDBase游标分页"""
+
+    def test_pages_cover_all_rows_in_order(self, db_session):
+        """测试逐页读取不重复、不遗漏，且顺序与一次性排序一致"""
+        create_clients(db_session, 25)
+        expected = [
+            c.id for c in db_session.query(Client).order_by(Client.created_at.desc(), Client.id.desc())
+        ]
+
+        seen, cursor = [], None
+        while True:
+            items, cursor = client_crud.get_page(db_session, cursor=cursor, limit=7)
+            seen.extend(c.id for c in items)
+            if cursor is None:
+                break
+
+        assert seen == expected
+
+    def test_pages_through_rows_created_by_crud(self, db_session):
+        """测试通过CRUD创建、created_at相同的行逐页读取不重复，最后游标为None"""
+        for i in range(25):
+            client_crud.create(db_session, obj_in=ClientCreate(name=f"crud-{i}", ip_address="10.0.0.2", version="1.0.0"))
+        db_session.execute(text("UPDATE clients SET created_at = (SELECT created_at FROM clients LIMIT 1)"))
+        db_session.commit()
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            items, cursor = client_crud.get_page(db_session, cursor=cursor, limit=7)
+            seen.extend(c.id for c in items)
+            pages += 1
+            if cursor is None or pages > 10:
+                break
+
+        assert cursor is None
+        assert len(seen) == len(set(seen)) == 25
+        assert pages == 4
+
+    def test_ascending_with_filters(self, db_session):
+        """测试升序分页和过滤条件"""
+        create_clients(db_session, 10)
+        filters = [Client.status == "online"]
+
+        first, cursor = client_crud.get_page(db_session, limit=3, descending=False, filters=filters)
+        second, last_cursor = client_crud.get_page(
+            db_session, cursor=cursor, limit=3, descending=False, filters=filters
+        )
+
+        ids = [c.id for c in first + second]
+        assert ids == sorted(ids)
+        assert all(c.status == "online" for c in first + second)
+        assert last_cursor is None
+
+    def test_last_page_has_no_cursor(self, db_session):
+        """测试数据恰好一页时不返回游标"""
+        create_clients(db_session, 5)
+        items, cursor = client_crud.get_page(db_session, limit=5)
+        assert len(items) == 5
+        assert cursor is None
+
+    def test_invalid_cursor(self, db_session):
+        """测试无效游标和排序不匹配的游标"""
+        with pytest.raises(InvalidCursorError):
+            client_crud.get_page(db_session, cursor="not-a-cursor")
+
+        foreign_cursor = encode_cursor("name,id:asc", ["a", 1])
+        with pytest.raises(InvalidCursorError):
+            client_crud.get_page(db_session, cursor=foreign_cursor)
+
+
+class TestListEndpoints:
+    """测试列表接口的游标分页"""
+
+    @pytest.fixture
+    def auth_headers(self, db_session):
+        admin = create_test_admin(db_session)
+        return {"Authorization": f"Bearer {jwt_handler.create_access_token(subject=admin.username)}"}
+
+    def test_list_clients_pages(self, client, db_session, auth_headers):
+        """测试客户端列表按游标翻页"""
+        create_clients(db_session, 7)
+
+        response = client.get("/api/v1/clients", params={"limit": 5}, headers=auth_headers)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) == 5
+        assert page["has_more"] is True
+
+        response = client.get(
+            "/api/v1/clients", params={"limit": 5, "cursor": page["next_cursor"]}, headers=auth_headers
+        )
+        last_page = response.json()
+        assert len(last_page["items"]) == 2
+        assert last_page["has_more"] is False
+        assert last_page["next_cursor"] is None
+        assert not {c["id"] for c in page["items"]} & {c["id"] for c in last_page["items"]}
+
+    def test_list_clients_invalid_cursor(self, client, auth_headers):
+        """测试无效游标返回400"""
+        response = client.get("/api/v1/clients", params={"cursor": "bogus"}, headers=auth_headers)
+        assert response.status_code == 400
+
+    def test_list_requires_auth(self, client):
+        """测试列表接口需要认证"""
+        response = client.get("/api/v1/clients")
+        assert response.status_code in [401, 403]
+
+    def test_list_upgrade_tasks_by_status(self, client, db_session, auth_headers):
+        """测试升级任务列表按状态过滤"""
+        target = create_test_client(db_session)
+        for task_status in ["pending", "completed", "pending"]:
+            create_test_task(db_session, client_id=target.id, status=task_status)
+
+        response = client.get(
+            "/api/v1/upgrades/tasks", params={"status": "pending", "client_id": target.id}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == 2
+        assert all(task["status"] == "pending" for task in items)
+
+    def test_list_upgrade_packages(self, client, db_session, auth_headers):
+        """测试升级包列表"""
+        response = client.get("/api/v1/upgrades/packages", headers=auth_headers)
+        assert response.status_code == 200
+        assert response.json() == {"items": [], "next_cursor": None, "has_more": False}
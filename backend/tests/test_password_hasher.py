@@ -0,0 +1,86 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+from passlib.context import CryptContext
+
+from app.core.password_hasher import PasswordHasher, PasswordHasherBusy
+from app.core.security import jwt_handler
+from app.models.admin import Admin
+from tests.utils import create_test_admin
+
+
+class TestPasswordHasher:
+    """测试有界密码哈希线程池"""
+
+    @pytest.mark.asyncio
+    async def test_verify_and_update(self):
+        """测试在线程池中验证密码"""
+        hasher = PasswordHasher(max_workers=1, max_pending=2)
+        hashed = jwt_handler.get_password_hash("secret")
+
+        try:
+            valid, new_hash = await hasher.verify_and_update("secret", hashed)
+            invalid, _ = await hasher.verify_and_update("wrong", hashed)
+        finally:
+            hasher.shutdown()
+        assert valid is True
+        assert new_hash is None
+        assert invalid is False
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_pending_limit_reached(self):
+        """测试排队任务达到上限时立即拒绝"""
+        hasher = PasswordHasher(max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        try:
+            running = asyncio.ensure_future(hasher._run(release.wait))
+            await asyncio.sleep(0.05)
+            with pytest.raises(PasswordHasherBusy):
+                await hasher.hash("secret")
+            release.set()
+            await running
+        finally:
+            release.set()
+            hasher.shutdown()
+        assert hasher.stats["rejected"] == 1
+
+
+class TestLoginRehash:
+    """测试登录时按新计算成本重新计算密码哈希"""
+
+    def test_login_rehashes_outdated_cost(self, client, db_session):
+        """测试旧成本的密码哈希在登录成功后被替换"""
+        current = CryptContext(
+            schemes=["bcrypt"], bcrypt__default_rounds=5, bcrypt__min_rounds=5, bcrypt__max_rounds=5
+        )
+        old_hash = CryptContext(schemes=["bcrypt"], bcrypt__default_rounds=4).hash("secret123")
+        admin_user = create_test_admin(db_session, password_hash=old_hash)
+
+        with patch.object(jwt_handler, "pwd_context", current):
+            response = client.post(
+                "/api/v1/auth/login", json={"username": admin_user.username, "password": "secret123"}
+            )
+
+        assert response.status_code == 200
+        db_session.expire_all()
+        new_hash = db_session.get(Admin, admin_user.id).password_hash
+        assert new_hash.startswith("$2b$05$")
+        assert current.verify("secret123", new_hash)
+
+    def test_login_busy_returns_503(self, client, db_session):
+        """测试密码验证繁忙时返回503"""
+        admin_user = create_test_admin(db_session)
+
+        with patch(
+            "app.core.password_hasher.password_hasher.verify_and_update",
+            side_effect=PasswordHasherBusy("busy")
+        ):
+            response = client.post(
+                "/api/v1/auth/login", json={"username": admin_user.username, "password": "test123"}
+            )
+
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "1"
@@ -0,0 +1,96 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.core.middleware import RequestLoggingMiddleware
+
+
+def build_app(**options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/v1/items")
+    def items():
+        return {"ok": True}
+
+    @app.post("/api/v1/client/heartbeat")
+    def heartbeat():
+        return {"ok": True}
+
+    @app.post("/api/v1/client/missing")
+    def missing():
+        raise HTTPException(status_code=404, detail="not found")
+
+    @app.get("/api/v1/boom")
+    def boom():
+        raise RuntimeError("boom")
+
+    app.add_middleware(RequestLoggingMiddleware, **options)
+    return app
+
+
+def api_messages(caplog):
+    return [record.getMessage() for record in caplog.records if record.name == "api"]
+
+
+class TestRequestLoggingMiddleware:
+    """测试纯ASGI请求日志中间件"""
+
+    def test_logs_request_and_sets_process_time(self, caplog):
+        """测试记录请求开始和响应，并添加X-Process-Time响应头"""
+        client = TestClient(build_app(exclude_paths=[]))
+        with caplog.at_level(logging.INFO, logger="api"):
+            response = client.get("/api/v1/items?page=2")
+
+        assert response.status_code == 200
+        assert float(response.headers["X-Process-Time"]) >= 0
+        messages = api_messages(caplog)
+        assert messages[0] == "🚀 GET /api/v1/items?page=2 - IP: testclient"
+        assert messages[1].startswith("✅ GET /api/v1/items?page=2 - 200 - ")
+
+    def test_excluded_path_skips_info_but_keeps_errors(self, caplog):
+        """测试排除路径不记录INFO日志，但错误响应仍然记录"""
+        client = TestClient(build_app(exclude_paths=["/api/v1/client/"]))
+        with caplog.at_level(logging.INFO, logger="api"):
+            response = client.post("/api/v1/client/heartbeat")
+            client.post("/api/v1/client/missing")
+
+        assert "X-Process-Time" in response.headers
+        messages = api_messages(caplog)
+        assert len(messages) == 1
+        assert messages[0].startswith("⚠️ POST /api/v1/client/missing - 404 - ")
+
+    def test_sample_rates_by_longest_prefix(self, caplog):
+        """测试按最长路径前缀采样INFO日志"""
+        client = TestClient(build_app(
+            exclude_paths=[],
+            sample_rates={"/api/v1": 1.0, "/api/v1/client": 0.0}
+        ))
+        with caplog.at_level(logging.INFO, logger="api"):
+            client.post("/api/v1/client/heartbeat")
+            client.get("/api/v1/items")
+
+        messages = api_messages(caplog)
+        assert len(messages) == 2
+        assert all("/api/v1/items" in message for message in messages)
+
+    def test_exception_is_logged_and_reraised(self, caplog):
+        """测试异常被记录后继续抛出"""
+        client = TestClient(build_app(exclude_paths=[]))
+        with caplog.at_level(logging.INFO, logger="api"):
+            with pytest.raises(RuntimeError):
+                client.get("/api/v1/boom")
+
+        assert any(message.startswith("💥 GET /api/v1/boom - Exception: boom") for message in api_messages(caplog))
+
+    def test_defaults_come_from_settings(self):
+        """测试未显式传入时使用配置中的排除路径和采样率"""
+        with patch("app.core.middleware.settings") as mock_settings:
+            mock_settings.REQUEST_LOG_EXCLUDE_PATHS = ["/health"]
+            mock_settings.REQUEST_LOG_SAMPLE_RATES = {"/api": 0.5}
+            middleware = RequestLoggingMiddleware(app=None)
+
+        assert middleware.exclude_prefixes == ("/health",)
+        assert middleware.sample_rates == [("/api", 0.5)]
@@ -38,7 +38,9 @@ class TestWebSocketIntegration:
         
         # 创建模拟WebSocket
         mock_websocket = MagicMock()
-        mock_websocket.receive_text.return_value = asyncio.Future()
+        loop = asyncio.new_event_loop()
+        mock_websocket.receive_text.return_value = loop.create_future()
+        loop.close()
         mock_websocket.receive_text.return_value.set_result(json.dumps({
             "action": "subscribe",
             "topics": ["client_status", "heartbeat"]
@@ -111,4 +113,281 @@ class TestWebSocketManager:
         # 验证消息类型值
         assert MessageType.CLIENT_STATUS_UPDATE == "client_status_update"
         assert MessageType.HEARTBEAT_RECEIVED == "heartbeat_received"  
-        assert MessageType.SYSTEM_MESSAGE == "system_message"
\ No newline at end of file
+        assert MessageType.SYSTEM_MESSAGE == "system_message"    
+    @pytest.mark.asyncio
+    async def test_broadcast_encodes_once(self):
+        """测试广播只编码一次并向所有订阅者发送相同负载"""
+        from unittest.mock import AsyncMock
+        from app.core import websocket_manager as ws_module
+        from app.core.websocket_manager import WebSocketManager
+        
+        manager = WebSocketManager()
+        sockets = [MagicMock(send_text=AsyncMock()) for _ in range(3)]
+        for ws in sockets:
+            connection_id = manager.connect_sync(ws)
+            manager.subscribe_sync(connection_id, ["client_status"])
+        other = MagicMock(send_text=AsyncMock())
+        manager.connect_sync(other)
+        
+        with patch.object(ws_module, 'encode_message', wraps=ws_module.encode_message) as mock_encode:
+            await manager.broadcast_to_topic("client_status", {"type": MessageType.CLIENT_STATUS_UPDATE, "client_id": 1})
+        
+        mock_encode.assert_called_once()
+        payloads = [ws.send_text.call_args.args[0] for ws in sockets]
+        assert len(set(payloads)) == 1
+        assert json.loads(payloads[0])["client_id"] == 1
+        other.send_text.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_topic_reverse_index(self):
+        """测试主题反向索引随订阅、取消订阅和断开连接维护"""
+        from unittest.mock import AsyncMock
+        from app.core.websocket_manager import WebSocketManager
+        
+        manager = WebSocketManager()
+        ws_a = MagicMock(send_text=AsyncMock())
+        ws_b = MagicMock(send_text=AsyncMock())
+        conn_a = manager.connect_sync(ws_a)
+        conn_b = manager.connect_sync(ws_b)
+        manager.subscribe_sync(conn_a, ["client_status", "heartbeat"])
+        manager.subscribe_sync(conn_b, ["client_status"])
+        
+        assert manager.topic_subscribers == {
+            "client_status": {conn_a, conn_b},
+            "heartbeat": {conn_a},
+        }
+        
+        await manager.unsubscribe(conn_a, ["client_status"])
+        assert manager.topic_subscribers["client_status"] == {conn_b}
+        
+        manager.disconnect(conn_a)
+        assert "heartbeat" not in manager.topic_subscribers
+        
+        # 发送失败的连接通过WebSocket映射直接清理
+        ws_b.send_text.side_effect = RuntimeError("closed")
+        await manager.broadcast_to_all({"type": MessageType.SYSTEM_MESSAGE})
+        assert manager.topic_subscribers == {}
+        assert manager.connection_map == {}
+        assert len(manager.active_connections) == 0
+
+
+class TestConnectionSender:
+    """WebSocket连接发送队列测试"""
+    
+    def test_drop_oldest_policy(self):
+        """测试队列满时丢弃最早的消息"""
+        from app.core.websocket_manager import ConnectionSender, OverflowPolicy
+        
+        sender = ConnectionSender(MagicMock(), maxsize=2, policy=OverflowPolicy.DROP_OLDEST)
+        for payload in ("a", "b", "c"):
+            assert sender.enqueue(payload)
+        
+        assert [p for _, p in sender.queue] == ["b", "c"]
+        assert sender.dropped == 1
+    
+    def test_coalesce_policy(self):
+        """测试队列满时替换同一合并键的旧消息"""
+        from app.core.websocket_manager import ConnectionSender, OverflowPolicy
+        
+        sender = ConnectionSender(MagicMock(), maxsize=2, policy=OverflowPolicy.COALESCE)
+        sender.enqueue("client1-old", key="client_status:1")
+        sender.enqueue("client2", key="client_status:2")
+        sender.enqueue("client1-new", key="client_status:1")
+        
+        assert [p for _, p in sender.queue] == ["client2", "client1-new"]
+        assert sender.dropped == 1
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_policy(self):
+        """测试队列满时断开慢速连接"""
+        from unittest.mock import AsyncMock
+        from app.core.websocket_manager import WebSocketManager
+        
+        manager = WebSocketManager(queue_size=2, overflow_policy="disconnect")
+        blocked = asyncio.Event()
+        
+        async def slow_send(data):
+            await blocked.wait()
+        
+        ws = MagicMock(accept=AsyncMock(), close=AsyncMock(), send_text=slow_send)
+        connection_id = await manager.connect(ws)
+        manager.subscribe_sync(connection_id, ["heartbeat"])
+        await asyncio.sleep(0)
+        
+        for i in range(5):
+            await manager.send_heartbeat_received(client_id=i, client_info={})
+        await asyncio.sleep(0)
+        
+        assert connection_id not in manager.connection_map
+        assert connection_id not in manager.senders
+        ws.close.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_does_not_wait_for_slow_connection(self):
+        """测试广播只入队，慢速连接不阻塞其他连接"""
+        from unittest.mock import AsyncMock
+        from app.core.websocket_manager import WebSocketManager
+        
+        manager = WebSocketManager(queue_size=16, overflow_policy="drop_oldest")
+        blocked = asyncio.Event()
+        fast_received = []
+        
+        async def slow_send(data):
+            await blocked.wait()
+        
+        async def fast_send(data):
+            fast_received.append(data)
+        
+        slow_ws = MagicMock(accept=AsyncMock(), send_text=slow_send)
+        fast_ws = MagicMock(accept=AsyncMock(), send_text=fast_send)
+        slow_id = await manager.connect(slow_ws)
+        fast_id = await manager.connect(fast_ws)
+        manager.subscribe_sync(slow_id, ["client_status"])
+        manager.subscribe_sync(fast_id, ["client_status"])
+        
+        await asyncio.wait_for(
+            manager.send_client_status_update(client_id=1, status="online"),
+            timeout=1
+        )
+        for _ in range(5):
+            await asyncio.sleep(0)
+        
+        info = manager.get_connection_info()["send_queues"]
+        manager.disconnect(slow_id)
+        manager.disconnect(fast_id)
+        
+        # 欢迎消息 + 状态更新
+        assert len(fast_received) == 2
+        assert json.loads(fast_received[-1])["client_id"] == 1
+        assert info[slow_id]["queued"] == 1
+
+
+class TestCoalescedStream:
+    """状态/心跳消息合并窗口测试"""
+    
+    @pytest.mark.asyncio
+    async def test_status_updates_coalesced_into_batch(self):
+        """测试窗口内的更新合并为一帧，且只包含状态变化的客户端"""
+        from unittest.mock import AsyncMock
+        from app.core.websocket_manager import WebSocketManager
+        
+        manager = WebSocketManager(queue_size=0, coalesce_window_ms=20)
+        ws = MagicMock(send_text=AsyncMock())
+        connection_id = manager.connect_sync(ws)
+        manager.subscribe_sync(connection_id, ["client_status", "heartbeat"])
+        
+        for _ in range(10):
+            await manager.send_client_status_update(client_id=1, status="online")
+            await manager.send_heartbeat_received(client_id=1, client_info={"status": "online"})
+        await manager.send_client_status_update(client_id=2, status="offline")
+        await asyncio.sleep(0.05)
+        first = [json.loads(c.args[0]) for c in ws.send_text.call_args_list]
+        
+        ws.send_text.reset_mock()
+        await manager.send_client_status_update(client_id=1, status="online")
+        await manager.send_client_status_update(client_id=2, status="online")
+        await asyncio.sleep(0.05)
+        second = [json.loads(c.args[0]) for c in ws.send_text.call_args_list]
+        
+        assert len(first) == 2
+        status_frame = next(f for f in first if f["type"] == MessageType.CLIENT_STATUS_BATCH)
+        heartbeat_frame = next(f for f in first if f["type"] == MessageType.HEARTBEAT_BATCH)
+        assert sorted(c["client_id"] for c in status_frame["clients"]) == [1, 2]
+        assert [h["client_id"] for h in heartbeat_frame["heartbeats"]] == [1]
+        
+        # 客户端1状态未变化，只发送客户端2
+        assert len(second) == 1
+        assert [c["client_id"] for c in second[0]["clients"]] == [2]
+
+
+class TestBroadcastBroker:
+    """跨worker广播代理测试"""
+    
+    @pytest.mark.asyncio
+    async def test_local_broker_fans_out_across_managers(self):
+        """测试一个worker的广播送达其他worker上的订阅者"""
+        from unittest.mock import AsyncMock
+        from app.core.websocket_manager import WebSocketManager
+        from app.core.websocket_broker import LocalBroker
+        
+        hub = []
+        worker_a = WebSocketManager(queue_size=0)
+        worker_b = WebSocketManager(queue_size=0)
+        await worker_a.start_broker(LocalBroker(hub))
+        await worker_b.start_broker(LocalBroker(hub))
+        
+        ws_a = MagicMock(send_text=AsyncMock())
+        ws_b = MagicMock(send_text=AsyncMock())
+        ws_b_other = MagicMock(send_text=AsyncMock())
+        worker_a.subscribe_sync(worker_a.connect_sync(ws_a), ["client_status"])
+        worker_b.subscribe_sync(worker_b.connect_sync(ws_b), ["client_status"])
+        worker_b.connect_sync(ws_b_other)
+        
+        await worker_a.send_client_status_update(client_id=7, status="online")
+        await worker_b.broadcast_to_all({"type": MessageType.SYSTEM_MESSAGE, "message": "hi"})
+        
+        await worker_a.stop_broker()
+        await worker_b.stop_broker()
+        
+        assert json.loads(ws_a.send_text.call_args_list[0].args[0])["client_id"] == 7
+        assert json.loads(ws_b.send_text.call_args_list[0].args[0])["client_id"] == 7
+        assert ws_a.send_text.call_count == 2
+        assert ws_b.send_text.call_count == 2
+        assert ws_b_other.send_text.call_count == 1
+        assert hub == []
+    
+    def test_create_broker_from_settings(self):
+        """测试根据配置创建广播代理"""
+        from app.core.websocket_broker import BroadcastBroker, create_broker, LocalBroker
+        
+        assert create_broker("") is None
+        with pytest.raises(ValueError):
+            create_broker("kafka")
+        # 进程内代理只能在测试中直接构造，不能通过配置启用
+        with pytest.raises(ValueError):
+            create_broker("local")
+        assert isinstance(LocalBroker(), BroadcastBroker)
+        with pytest.raises(TypeError):
+            BroadcastBroker()
+    
+    def test_settings_reject_local_broker(self):
+        """测试配置校验拒绝无法跨worker广播的代理"""
+        from pydantic import ValidationError
+        from app.core.config import Settings
+        
+        assert Settings(WEBSOCKET_BROKER=" Redis ").WEBSOCKET_BROKER == "redis"
+        with pytest.raises(ValidationError):
+            Settings(WEBSOCKET_BROKER="local")
+    
+    @pytest.mark.asyncio
+    async def test_redis_publish_does_not_wait_for_redis(self):
+        """测试Redis发布走有界队列，不在推送路径上等待Redis"""
+        from app.core.websocket_broker import RedisBroker
+        
+        release = asyncio.Event()
+        published = []
+        
+        class SlowRedis:
+            async def publish(self, channel, envelope):
+                await release.wait()
+                published.append(json.loads(envelope))
+        
+        broker = RedisBroker("redis://unused", "test", queue_size=2)
+        broker._redis = SlowRedis()
+        broker._publisher = asyncio.get_running_loop().create_task(broker._publish_loop())
+        
+        for i in range(4):
+            await asyncio.wait_for(broker.publish("client_status", f"m{i}"), timeout=1)
+        await asyncio.sleep(0)
+        
+        release.set()
+        for _ in range(100):
+            if len(published) == 3:
+                break
+            await asyncio.sleep(0)
+        broker._redis = None
+        await broker.stop()
+        
+        # 第一条已被发布任务取出，队列容量为2，第四条被丢弃
+        assert [p["payload"] for p in published] == ["m0", "m1", "m2"]
+        assert broker.stats == {"published": 3, "dropped": 1, "errors": 0}
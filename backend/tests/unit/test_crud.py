@@ -2,6 +2,8 @@
 Unit tests for CRUD operations
 """
 
+from datetime import datetime
+
 import pytest
 from passlib.context import CryptContext
 
@@ -30,7 +32,6 @@ class TestCRUDAdmin:
         pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
         
         # Create admin using direct model creation (not recommended for passwords)
-        from app.models.admin import Admin
         admin_model = Admin(
             username=sample_admin_data["username"],
             email=sample_admin_data["email"],
@@ -197,6 +198,84 @@ class TestCRUDClient:
         assert updated_client.last_heartbeat is not None
 
 
+@pytest.mark.unit
+class TestCRUDClientAsync:
+    """Test cases for the async Client CRUD variants"""
+
+    @pytest.mark.asyncio
+    async def test_create_get_update_remove(self, async_session_factory, sample_client_data):
+        """Test the async create/get/update/remove round trip"""
+        async with async_session_factory() as db:
+            created = await client.create_async(db, obj_in=ClientCreate(**sample_client_data))
+            fetched = await client.get_async(db, created.id)
+            updated = await client.update_async(db, db_obj=fetched, obj_in={"status": "offline"})
+            listed = await client.get_multi_async(db)
+            removed = await client.remove_async(db, id=created.id)
+            missing = await client.get_async(db, created.id)
+
+        assert updated.status == "offline"
+        assert len(listed) == 1
+        assert removed.id == created.id
+        assert missing is None
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_heartbeats_async(self, db_session, async_session_factory, sample_client_data):
+        """Test async bulk heartbeat update keeps fields that are not provided"""
+        created = client.create(db_session, obj_in=ClientCreate(**sample_client_data))
+        beat_time = datetime(2024, 1, 1, 12, 0, 0)
+
+        async with async_session_factory() as db:
+            updated = await client.bulk_update_heartbeats_async(db, heartbeats=[
+                {"id": created.id, "status": "busy", "last_heartbeat": beat_time}
+            ])
+
+        assert updated == 1
+        db_session.expire_all()
+        refreshed = db_session.get(Client, created.id)
+        assert refreshed.status == "busy"
+        assert refreshed.last_heartbeat == beat_time
+        assert refreshed.version == sample_client_data["version"]
+
+
+@pytest.mark.unit
+class TestCRUDUpdateFields:
+    """Test cases for the lean update path"""
+
+    def test_update_fields_returns_updated_object(self, db_session, sample_client_data):
+        """Test a targeted update returns the fresh row and ignores unknown fields"""
+        created = client.create(db_session, obj_in=ClientCreate(**sample_client_data))
+
+        updated = client.update_fields(
+            db_session, id=created.id, obj_in={"status": "offline", "unknown": 1}
+        )
+        assert updated.id == created.id
+        assert updated.status == "offline"
+        assert updated.name == sample_client_data["name"]
+
+    def test_update_fields_missing_row(self, db_session):
+        """Test updating a missing row returns None"""
+        assert client.update_fields(db_session, id=99999, obj_in={"status": "offline"}) is None
+
+    def test_update_fields_without_commit(self, db_session, sample_client_data):
+        """Test several updates can be batched into one commit"""
+        first = client.create(db_session, obj_in=ClientCreate(**sample_client_data))
+        second = client.create(db_session, obj_in=ClientCreate(**sample_client_data))
+
+        for db_obj in (first, second):
+            assert client.update_fields(
+                db_session, id=db_obj.id, obj_in=ClientUpdate(status="error"), returning=False, commit=False
+            ) is None
+        db_session.rollback()
+        db_session.expire_all()
+        assert db_session.get(Client, first.id).status == sample_client_data["status"]
+
+        for db_obj in (first, second):
+            client.update_fields(db_session, id=db_obj.id, obj_in={"status": "error"}, commit=False)
+        db_session.commit()
+        db_session.expire_all()
+        assert {db_session.get(Client, c.id).status for c in (first, second)} == {"error"}
+
+
 @pytest.mark.unit
 class TestCRUDUpgradePackage:
     """Test cases for UpgradePackage CRUD operations"""
@@ -4,6 +4,9 @@ import type { ClientStatusUpdate } from '@/stores/client'
 export interface WebSocketMessage {
   type: string
   data: any
+  // 服务端合并窗口模式下的批量帧
+  clients?: ClientStatusUpdate[]
+  heartbeats?: Array<{ client_id: number; client_info: any; received_at: string }>
 }
 
 export interface WebSocketAction {
@@ -123,6 +126,12 @@ export class WebSocketService {
         case 'HEARTBEAT_RECEIVED':
           this.handleHeartbeatReceived(message.data)
           break
+        case 'client_status_batch':
+          this.handleClientStatusBatch(message.clients || [])
+          break
+        case 'heartbeat_batch':
+          this.handleHeartbeatBatch(message.heartbeats || [])
+          break
         case 'SYSTEM_MESSAGE':
           this.handleSystemMessage(message.data)
           break
@@ -142,6 +151,21 @@ export class WebSocketService {
     clientStore.handleStatusUpdate(data)
   }
 
+  private handleClientStatusBatch(updates: ClientStatusUpdate[]): void {
+    const clientStore = useClientStore()
+    updates.forEach(update => clientStore.handleStatusUpdate(update))
+  }
+
+  private handleHeartbeatBatch(heartbeats: NonNullable<WebSocketMessage['heartbeats']>): void {
+    const clientStore = useClientStore()
+    heartbeats.forEach(heartbeat => {
+      clientStore.updateClient(heartbeat.client_id, {
+        last_heartbeat: heartbeat.received_at,
+        status: heartbeat.client_info?.status ?? 'online'
+      })
+    })
+  }
+
   private handleClientConnected(data: any): void {
     console.log('Client connected:', data)
     // 可以添加通知或其他处理
@@ -8,6 +8,7 @@
  * - 日志文件下载
  * - 性能监控
  * - 错误追踪
+ * - 批量发送到后端（gzip压缩的NDJSON）
  */
 
 export enum LogLevel {
@@ -28,11 +29,181 @@ export interface LogEntry {
   userAgent?: string
 }
 
+/**
+ * 发送到后端的日志格式（与后端 FrontendLogEntry 一致）
+ */
+export interface FrontendLogPayload {
+  timestamp: string
+  level: string
+  logger: string
+  message: string
+  data?: any
+  stack?: string
+  url?: string
+  userAgent?: string
+  logLine: string
+}
+
+export interface LogTransportOptions {
+  endpoint?: string
+  maxBatchSize?: number
+  flushInterval?: number
+  maxQueueSize?: number
+}
+
+/**
+ * gzip压缩文本，浏览器不支持 CompressionStream 时返回null
+ */
+async function gzip(text: string): Promise<Blob | null> {
+  if (typeof CompressionStream === 'undefined') {
+    return null
+  }
+  const stream = new Blob([text]).stream().pipeThrough(new CompressionStream('gzip'))
+  return await new Response(stream).blob()
+}
+
+/**
+ * 日志批量发送器
+ *
+ * - 日志先进入内存队列，攒够 maxBatchSize 条或等待 flushInterval 毫秒后一次发送
+ * - 以NDJSON格式发送，浏览器支持时使用gzip压缩
+ * - 页面隐藏或卸载时通过 sendBeacon 发送剩余日志
+ * - 队列超过 maxQueueSize 条时丢弃最老的日志
+ */
+export class LogTransport {
+  private endpoint: string
+  private maxBatchSize: number
+  private flushInterval: number
+  private maxQueueSize: number
+  private queue: string[] = []
+  private timer: ReturnType<typeof setTimeout> | null = null
+  private dropped = 0
+
+  constructor(options: LogTransportOptions = {}) {
+    this.endpoint = options.endpoint ?? '/api/v1/logs/frontend/ndjson'
+    this.maxBatchSize = options.maxBatchSize ?? 200
+    this.flushInterval = options.flushInterval ?? 2000
+    this.maxQueueSize = options.maxQueueSize ?? 5000
+
+    if (typeof window !== 'undefined') {
+      window.addEventListener('pagehide', () => this.flushWithBeacon())
+      document.addEventListener('visibilitychange', () => {
+        if (document.visibilityState === 'hidden') {
+          this.flushWithBeacon()
+        }
+      })
+    }
+  }
+
+  /**
+   * 将日志加入发送队列
+   */
+  enqueue(payload: FrontendLogPayload) {
+    let line: string
+    try {
+      line = JSON.stringify(payload)
+    } catch (error) {
+      line = JSON.stringify({ ...payload, data: '[Circular or non-serializable object]' })
+    }
+
+    if (this.queue.length >= this.maxQueueSize) {
+      this.queue.shift()
+      this.dropped++
+    }
+    this.queue.push(line)
+
+    if (this.queue.length >= this.maxBatchSize) {
+      void this.flush()
+    } else if (this.timer === null) {
+      this.timer = setTimeout(() => void this.flush(), this.flushInterval)
+    }
+  }
+
+  /**
+   * 取出一批日志并拼接为NDJSON
+   */
+  private takeBatch(): string | null {
+    if (this.timer !== null) {
+      clearTimeout(this.timer)
+      this.timer = null
+    }
+    if (this.queue.length === 0) {
+      return null
+    }
+    const batch = this.queue.splice(0, this.maxBatchSize)
+    if (this.queue.length > 0) {
+      this.timer = setTimeout(() => void this.flush(), 0)
+    }
+    return batch.join('\n') + '\n'
+  }
+
+  /**
+   * 发送一批日志
+   */
+  async flush() {
+    const body = this.takeBatch()
+    if (body === null) {
+      return
+    }
+
+    try {
+      const headers: Record<string, string> = { 'Content-Type': 'application/x-ndjson' }
+      const compressed = await gzip(body)
+      if (compressed) {
+        headers['Content-Encoding'] = 'gzip'
+      }
+
+      const response = await fetch(this.endpoint, {
+        method: 'POST',
+        headers,
+        body: compressed ?? body
+      })
+      if (!response.ok) {
+        console.warn(`Failed to save logs to file: HTTP ${response.status}`)
+      }
+    } catch (error) {
+      // 如果API调用失败，只在控制台显示警告，不影响程序运行
+      console.warn('Failed to save logs to file:', error)
+    }
+  }
+
+  /**
+   * 页面卸载时同步发送剩余日志（sendBeacon无法等待压缩，发送未压缩的NDJSON）
+   */
+  flushWithBeacon() {
+    let body = this.takeBatch()
+    while (body !== null) {
+      const blob = new Blob([body], { type: 'application/x-ndjson' })
+      const queued = typeof navigator.sendBeacon === 'function' && navigator.sendBeacon(this.endpoint, blob)
+      if (!queued) {
+        fetch(this.endpoint, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/x-ndjson' },
+          body: blob,
+          keepalive: true
+        }).catch(() => {})
+      }
+      body = this.takeBatch()
+    }
+  }
+
+  /**
+   * 获取发送队列统计信息
+   */
+  getStats() {
+    return {
+      pending: this.queue.length,
+      dropped: this.dropped
+    }
+  }
+}
+
 export class Logger {
   private name: string
   private static currentLevel: LogLevel = LogLevel.INFO
   private static maxStorageSize = 1024 * 1024 * 5 // 5MB
   private static storageKey = 'app_logs'
+  private static transport = new LogTransport()
   
   // 控制台样式
   private static styles = {
@@ -263,26 +434,17 @@ export class Logger {
       // 格式化日志条目为文本
       const logLine = this.formatLogEntry(entry)
       
-      // 发送到后端API保存到文件
-      fetch('/api/v1/logs/frontend', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-          timestamp: entry.timestamp,
-          level: Logger.levelNames[entry.level],
-          logger: entry.logger,
-          message: entry.message,
-          data: entry.data,
-          stack: entry.stack,
-          url: entry.url,
-          userAgent: entry.userAgent,
-          logLine: logLine
-        })
-      }).catch(error => {
-        // 如果API调用失败，只在控制台显示警告，不影响程序运行
-        console.warn('Failed to save log to file:', error)
+      // 加入批量发送队列，由发送器统一发送到后端API保存到文件
+      Logger.transport.enqueue({
+        timestamp: entry.timestamp,
+        level: Logger.levelNames[entry.level],
+        logger: entry.logger,
+        message: entry.message,
+        data: entry.data,
+        stack: entry.stack,
+        url: entry.url,
+        userAgent: entry.userAgent,
+        logLine: logLine
       })
     } catch (error) {
       console.warn('Failed to format log for file storage:', error)
@@ -326,6 +488,13 @@ export class Logger {
     }
   }
 
+  /**
+   * 立即发送队列中的日志
+   */
+  static flush(): Promise<void> {
+    return Logger.transport.flush()
+  }
+
   /**
    * 清除存储的日志
    */